@@ -0,0 +1,180 @@
+import hashlib
+import json
+import uuid
+
+from django import http
+from django.conf import settings
+from django.core import cache as django_cache
+from django.core.cache.backends import dummy, locmem
+from django.utils import http as http_utils
+
+from rest_framework import response as drf_response
+
+
+def get_cache():
+    return django_cache.caches[getattr(settings, 'API_RESPONSE_CACHE', 'default')]
+
+
+def is_cache_shared(cache):
+    """
+    Returns True if the given cache is shared between processes. Generations
+    are changed from other processes (for example monitoring workers), so
+    responses must not be cached in process-local caches.
+
+    :param cache: Cache instance
+    """
+
+    return not isinstance(cache, (locmem.LocMemCache, dummy.DummyCache))
+
+
+def get_generation_key(name):
+    return 'api:generation:%s' % name
+
+
+def get_generations(names):
+    """
+    Returns current generations for the given names. Generations are random
+    tokens, so that evicted generations never resurrect stale responses.
+
+    :param names: A list of generation names
+    :return: A list of generation tokens
+    """
+
+    cache = get_cache()
+    keys = [get_generation_key(name) for name in names]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, uuid.uuid4().hex, None)
+            generations[key] = cache.get(key)
+
+    return [generations[key] for key in keys]
+
+
+def invalidate(name):
+    """
+    Invalidates all cached responses that depend on the given generation.
+
+    :param name: Generation name
+    """
+
+    get_cache().set(get_generation_key(name), uuid.uuid4().hex, None)
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """
+    Checks whether the client already has a current representation based on
+    the conditional request headers.
+
+    :param request: Request instance
+    :param etag: Quoted entity tag of the current representation
+    :param last_modified: Optional UNIX timestamp of the last modification
+    :return: True if a not modified response should be returned
+    """
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', None)
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present.
+        etags = [tag.strip() for tag in if_none_match.split(',')]
+        return etag in etags or '*' in etags
+
+    if_modified_since = http_utils.parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and last_modified is not None and last_modified <= if_modified_since
+
+
+class CachedResponseMixin(object):
+    """
+    Viewset mixin, which caches rendered JSON responses of list and retrieve
+    requests and supports conditional requests. Responses are cached per user
+    and normalized query parameters. They are invalidated by changing any of
+    the generations returned by `get_cache_generations`. Caching is disabled
+    when the configured cache is not shared between processes.
+    """
+
+    cache_timeout = None
+
+    def get_cache_timeout(self):
+        return self.cache_timeout or getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 300)
+
+    def get_cache_generations(self, request):
+        """
+        Should return a list of generation names the response depends on or
+        None when the response should not be cached.
+
+        :param request: Request instance
+        """
+
+        return None
+
+    def get_cache_key(self, request):
+        """
+        Returns the cache key for the given request or None when the response
+        should not be cached.
+
+        :param request: Request instance
+        """
+
+        if request.method != 'GET' or request.accepted_renderer.format != 'json':
+            return None
+
+        if not is_cache_shared(get_cache()):
+            return None
+
+        names = self.get_cache_generations(request)
+        if names is None:
+            return None
+
+        user = request.user.pk if request.user.is_authenticated() else None
+        parameters = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+        key = json.dumps([
+            request.build_absolute_uri(request.path),
+            parameters,
+            user,
+            request.accepted_media_type,
+            get_generations(names),
+        ])
+        return 'api:response:%s' % hashlib.md5(key).hexdigest()
+
+    def get_cached_response(self, request, handler, *args, **kwargs):
+        """
+        Returns a cached response or calls the handler and caches its response.
+
+        :param request: Request instance
+        :param handler: Request handler
+        """
+
+        key = self.get_cache_key(request)
+        if key is None:
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if not isinstance(response, drf_response.Response) or response.status_code != 200:
+                return response
+
+            # Render the response now, so that the content can be cached.
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+
+            etag = '"%s"' % hashlib.md5(response.content).hexdigest()
+            cached = (response.content, response['Content-Type'], etag)
+            cache.set(key, cached, self.get_cache_timeout())
+
+        content, content_type, etag = cached
+        if is_not_modified(request, etag):
+            response = http.HttpResponseNotModified()
+        else:
+            response = http.HttpResponse(content, content_type=content_type)
+
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(request, super(CachedResponseMixin, self).list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(request, super(CachedResponseMixin, self).retrieve, *args, **kwargs)
@@ -1,5 +1,259 @@
-from rest_framework import pagination
+import base64
+import collections
+import datetime
+import decimal
+import json
+import operator
+import uuid
+
+from django.db.models import expressions, F, Q
+
+from rest_framework import exceptions, pagination, response
+from rest_framework.settings import api_settings
+from rest_framework.utils import urls
+
+
+def encode_cursor_value(value):
+    """
+    Encodes values, which are not natively supported by JSON, without any
+    loss of precision.
+    """
+
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    elif isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+
+    raise TypeError("Value of type '%s' cannot be used in a cursor." % type(value).__name__)
+
+
+def get_ordering(queryset):
+    """
+    Returns a list of (expression, descending) tuples describing the ordering
+    of the given queryset. Primary key is always added to make the ordering
+    total.
+
+    :param queryset: Ordered queryset
+    """
+
+    query = queryset.query
+    ordering = query.order_by or (query.default_ordering and queryset.model._meta.ordering) or []
+
+    result = []
+    for term in list(ordering) + ['pk']:
+        if isinstance(term, expressions.OrderBy):
+            result.append((term.expression, term.descending))
+        elif hasattr(term, 'resolve_expression'):
+            result.append((term, False))
+        elif term == '?':
+            raise exceptions.ParseError("Random ordering cannot be paginated using a cursor.")
+        elif term.startswith('-'):
+            result.append((F(term[1:]), True))
+        else:
+            result.append((F(term), False))
+
+    return result
+
+
+def get_position_filter(ordering, position):
+    """
+    Returns a filter, which matches all objects after the given position.
+    Comparisons follow PostgreSQL, which orders null values as larger than
+    any other value.
+
+    :param ordering: A list of (annotation name, descending) tuples
+    :param position: A list of values for each annotation
+    """
+
+    alternatives = []
+    prefix = Q()
+    for (name, descending), value in zip(ordering, position):
+        if value is None:
+            after = Q(**{'%s__isnull' % name: False}) if descending else None
+            equal = Q(**{'%s__isnull' % name: True})
+        else:
+            if descending:
+                after = Q(**{'%s__lt' % name: value})
+            else:
+                after = Q(**{'%s__gt' % name: value}) | Q(**{'%s__isnull' % name: True})
+            equal = Q(**{name: value})
+
+        if after is not None:
+            alternatives.append(prefix & after)
+        prefix &= equal
+
+    if not alternatives:
+        return None
+
+    return reduce(operator.or_, alternatives)
+
+
+def annotate_ordering(queryset):
+    """
+    Annotates values of all ordering expressions, so that they can be stored
+    in cursors and compared against, and orders the queryset by them.
+
+    :param queryset: Queryset to annotate
+    :return: A tuple (queryset, ordering), where ordering is a list of
+      (annotation name, descending) tuples
+    """
+
+    ordering = []
+    annotations = collections.OrderedDict()
+    for index, (expression, descending) in enumerate(get_ordering(queryset)):
+        name = '_cursor_%d' % index
+        annotations[name] = expression
+        ordering.append((name, descending))
+
+    queryset = queryset.annotate(**annotations)
+    order_by = [('-%s' if descending else '%s') % name for name, descending in ordering]
+    if hasattr(queryset, 'raw_order_by'):
+        queryset = queryset.raw_order_by(*order_by)
+    else:
+        queryset = queryset.order_by(*order_by)
+
+    return queryset, ordering
+
+
+def iterate_in_chunks(queryset, chunk_size):
+    """
+    Iterates over a queryset in chunks using keyset pagination, so that memory
+    use does not depend on the size of the queryset. Prefetches are performed
+    for each chunk.
+
+    :param queryset: Queryset to iterate over
+    :param chunk_size: Maximum number of objects fetched at once
+    :return: A generator of object lists
+    """
+
+    queryset, ordering = annotate_ordering(queryset)
+    chunk_queryset = queryset
+    while True:
+        chunk = list(chunk_queryset[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+
+        position_filter = get_position_filter(ordering, [getattr(chunk[-1], name) for name, descending in ordering])
+        if position_filter is None:
+            return
+        chunk_queryset = queryset.filter(position_filter)
+
+
+class CursorPagination(pagination.BasePagination):
+    """
+    Keyset pagination, which works with arbitrary orderings, including registry
+    orderings by registered choices. Instead of an offset, the cursor contains
+    values of all ordering expressions for the last object on the page, so
+    each request only scans the rows it returns. The total count is only
+    computed when requested.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 5000
+    invalid_cursor_message = "Invalid cursor."
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size <= 0:
+                raise ValueError
+        except (KeyError, ValueError):
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """
+        Returns the position encoded in the cursor query parameter or None when
+        the first page is requested.
+        """
+
+        cursor = request.query_params.get(self.cursor_query_param, None)
+        if not cursor:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if not isinstance(position, list):
+                raise ValueError
+        except (TypeError, ValueError, UnicodeError):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+
+        return position
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position, default=encode_cursor_value))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count = None
+        self.next_position = None
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset, ordering = annotate_ordering(queryset)
+
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+
+        if position is not None:
+            if len(position) != len(ordering):
+                raise exceptions.NotFound(self.invalid_cursor_message)
+
+            position_filter = get_position_filter(ordering, position)
+            if position_filter is None:
+                return []
+            queryset = queryset.filter(position_filter)
+
+        # Fetch one additional object to determine whether there is a next page.
+        page = list(queryset[:page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = [getattr(page[-1], name) for name, descending in ordering]
+
+        return page
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return urls.replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        result = collections.OrderedDict()
+        if self.count is not None:
+            result['count'] = self.count
+        result['next'] = self.get_next_link()
+        result['results'] = data
+        return response.Response(result)
 
 
 class LimitOffsetPagination(pagination.LimitOffsetPagination):
+    """
+    Limit/offset pagination, which switches to cursor pagination when the
+    cursor query parameter is present (it may be empty to request the first
+    page).
+    """
+
     max_limit = 5000
+    cursor_pagination_class = CursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        return super(LimitOffsetPagination, self).paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+
+        return super(LimitOffsetPagination, self).get_paginated_response(data)
@@ -0,0 +1,54 @@
+from django import http
+from django.conf import settings
+
+from . import pagination
+
+
+class StreamingListMixin(object):
+    """
+    Viewset mixin, which streams list responses when the stream query parameter
+    is set. Objects are fetched and serialized in chunks and rendered JSON is
+    written incrementally, so memory use does not depend on the number of
+    returned objects. Streamed responses are not paginated.
+    """
+
+    stream_query_param = 'stream'
+    stream_chunk_size = None
+
+    def get_stream_chunk_size(self):
+        return self.stream_chunk_size or getattr(settings, 'API_STREAM_CHUNK_SIZE', 500)
+
+    def is_streaming(self, request):
+        """
+        Returns true if the list response should be streamed. Only JSON responses
+        can be streamed.
+        """
+
+        if request.query_params.get(self.stream_query_param, '').lower() not in ('1', 'true'):
+            return False
+
+        return request.accepted_renderer.format == 'json'
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_streaming(request):
+            return super(StreamingListMixin, self).list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        renderer_context = self.get_renderer_context()
+        # The same serializer instance is used for all objects.
+        serializer = self.get_serializer()
+
+        def stream():
+            yield '{"results":['
+
+            separator = ''
+            for chunk in pagination.iterate_in_chunks(queryset, self.get_stream_chunk_size()):
+                for instance in chunk:
+                    data = serializer.to_representation(instance)
+                    yield separator + renderer.render(data, request.accepted_media_type, renderer_context)
+                    separator = ','
+
+            yield ']}'
+
+        return http.StreamingHttpResponse(stream(), content_type=renderer.media_type)
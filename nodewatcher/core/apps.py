@@ -0,0 +1,12 @@
+from django import apps
+
+
+class CoreConfig(apps.AppConfig):
+    name = 'nodewatcher.core'
+    label = 'core'
+
+    def ready(self):
+        super(CoreConfig, self).ready()
+
+        # Connect node permission index maintenance.
+        from . import permissions
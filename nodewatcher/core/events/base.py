@@ -2,7 +2,7 @@ import copy
 
 from django.utils import timezone
 
-from . import exceptions
+from . import delivery, exceptions
 from .pool import pool
 
 # Exports
@@ -57,8 +57,21 @@ class EventRecord(object):
         Posts an event to subscribed sinks.
         """
 
-        for sink in pool.get_all_sinks():
-            sink.post(self)
+        self._dispatch(self)
+
+    def _dispatch(self, event):
+        """
+        Delivers an event to all sinks using compiled routes.
+
+        :param event: Event record to deliver
+        """
+
+        for sink, filters in pool.get_routes(event.__class__):
+            for event_filter in filters:
+                if not event_filter.filter(event):
+                    break
+            else:
+                sink.submit(event)
 
     def absent(self):
         """
@@ -66,10 +79,7 @@ class EventRecord(object):
         """
 
         # Generate the complementary event.
-        complement = ~self
-
-        for sink in pool.get_all_sinks():
-            sink.post(complement)
+        self._dispatch(~self)
 
     def post_or_absent(self, condition):
         """
@@ -125,6 +135,19 @@ class EventFilter(object):
         """
 
         self._enabled = enabled
+        pool.invalidate_routes()
+
+    def applies_to(self, event_class):
+        """
+        Should decide whether this filter applies to events of the given class.
+        The result is cached in compiled event routes. The default implementation
+        applies the filter to all events.
+
+        :param event_class: Event record class
+        :return: True if the filter applies, False otherwise
+        """
+
+        return True
 
     def filter(self, event):
         """
@@ -144,16 +167,19 @@ class EventSink(object):
 
     name = None
 
-    def __init__(self, disable=False, filters=None, **kwargs):
+    def __init__(self, disable=False, filters=None, asynchronous=False, **kwargs):
         """
         Class constructor.
 
         :param disable: Should the sink be disabled by default
+        :param filters: Optional filter configuration
+        :param asynchronous: Should events be delivered from a background thread
         """
 
         self._enabled = not disable
         self._filters = {}
         self._filter_cfg = filters or {}
+        self._delivery = delivery.AsynchronousDelivery(self) if asynchronous else None
 
     @classmethod
     def get_name(cls):
@@ -171,6 +197,34 @@ class EventSink(object):
         """
 
         self._enabled = enabled
+        pool.invalidate_routes()
+
+    @property
+    def enabled(self):
+        """
+        Returns true if this sink is enabled.
+        """
+
+        return self._enabled
+
+    def accepts(self, event_class):
+        """
+        Should decide whether this sink accepts events of the given class. The
+        result is cached in compiled event routes. The default implementation
+        accepts all events.
+
+        :param event_class: Event record class
+        :return: True if the sink accepts the events, False otherwise
+        """
+
+        return True
+
+    def get_filters(self):
+        """
+        Returns all filters attached to this sink.
+        """
+
+        return self._filters.values()
 
     def add_filter(self, filter, **kwargs):
         """
@@ -201,6 +255,7 @@ class EventSink(object):
         filter_cfg = self._filter_cfg.get(filter_name, {})
         filter_cfg.update(kwargs)
         self._filters[filter_name] = filter(**filter_cfg)
+        pool.invalidate_routes()
 
     def remove_filter(self, filter_name):
         """
@@ -215,6 +270,7 @@ class EventSink(object):
             )
 
         del self._filters[filter_name]
+        pool.invalidate_routes()
 
     def post(self, event):
         """
@@ -231,7 +287,46 @@ class EventSink(object):
             if filter.enabled and not filter.filter(event):
                 return
 
-        self.deliver(event)
+        self.submit(event)
+
+    @property
+    def asynchronous(self):
+        """
+        Returns true if this sink delivers events from a background thread.
+        """
+
+        return self._delivery is not None
+
+    def submit(self, event):
+        """
+        Hands over an already filtered event for delivery. Asynchronous sinks
+        queue the event, other sinks deliver it immediately.
+
+        :param event: Event record
+        """
+
+        if self._delivery is not None:
+            self._delivery.submit(event)
+        else:
+            self.deliver(event)
+
+    def drain(self):
+        """
+        Blocks until all queued events have been delivered.
+        """
+
+        if self._delivery is not None:
+            self._delivery.drain()
+
+    def get_delivery_metrics(self):
+        """
+        Returns asynchronous delivery metrics or None for synchronous sinks.
+        """
+
+        if self._delivery is None:
+            return None
+
+        return self._delivery.get_metrics()
 
     def deliver(self, event):
         """
@@ -241,3 +336,19 @@ class EventSink(object):
         """
 
         raise NotImplementedError
+
+    def flush(self):
+        """
+        Delivers any buffered events. Sinks that support buffered delivery should
+        override this method.
+        """
+
+        pass
+
+    def discard(self):
+        """
+        Discards any buffered events. Sinks that support buffered delivery should
+        override this method.
+        """
+
+        pass
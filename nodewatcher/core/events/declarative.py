@@ -132,6 +132,11 @@ class NodeEventRecordMeta(type):
             value.name = name
             new_class._attributes[name] = value
 
+        # Resolve primary key attributes once.
+        new_class._primary_key_attributes = [
+            name for name, value in new_class._attributes.items() if value.primary_key
+        ]
+
         return new_class
 
 
@@ -145,6 +150,7 @@ class NodeEventRecord(events_base.EventRecord):
     source_name = None
     source_type = None
     description = None
+    _primary_key_attributes = []
 
     SEVERITY_INFO = 1
     SEVERITY_WARNING = 2
@@ -220,9 +226,15 @@ class NodeEventRecord(events_base.EventRecord):
 
     def get_primary_key(self):
         """
-        Returns an UUID value uniquely identifying this specific event.
+        Returns an UUID value uniquely identifying this specific event. The value
+        is computed once per event record.
         """
 
+        try:
+            return self.__dict__['_primary_key']
+        except KeyError:
+            pass
+
         primary_key = [
             self.source_type,
             self.source_name,
@@ -231,13 +243,11 @@ class NodeEventRecord(events_base.EventRecord):
         for node in self.related_nodes:
             primary_key.append(str(node.uuid))
 
-        for attribute in self.get_attributes():
-            if not attribute.primary_key:
-                continue
-
-            primary_key.append(str(getattr(self, attribute.name, None)))
+        for name in self._primary_key_attributes:
+            primary_key.append(str(getattr(self, name, None)))
 
-        return uuid.uuid5(EVENT_UUID_NAMESPACE, ','.join(primary_key))
+        self._primary_key = uuid.uuid5(EVENT_UUID_NAMESPACE, ','.join(primary_key))
+        return self._primary_key
 
 
 class NodeWarningRecord(NodeEventRecord):
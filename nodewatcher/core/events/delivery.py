@@ -0,0 +1,151 @@
+import logging
+import os
+import Queue
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+# Logger instance
+logger = logging.getLogger('events.delivery')
+
+
+class AsynchronousDelivery(object):
+    """
+    Delivers events to a sink from a background thread. Events are placed into a
+    bounded queue and delivered in batches. When the queue is full, events are
+    delivered synchronously instead.
+
+    Events are delivered outside of the transaction in which they were posted,
+    so asynchronous delivery is best suited for sinks that do not depend on
+    data written in the same transaction (for example mail or webhook sinks).
+    """
+
+    def __init__(self, sink, queue_size=None, batch_size=None):
+        """
+        Class constructor.
+
+        :param sink: Event sink instance
+        :param queue_size: Maximum number of queued events
+        :param batch_size: Maximum number of events delivered in a batch
+        """
+
+        self.sink = sink
+        self.queue_size = queue_size or getattr(settings, 'EVENTS_ASYNC_QUEUE_SIZE', 1000)
+        self.batch_size = batch_size or getattr(settings, 'EVENTS_ASYNC_BATCH_SIZE', 100)
+        self.queue = None
+        self.lock = threading.Lock()
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            'queued': 0,
+            'delivered': 0,
+            'failed': 0,
+            'fallback': 0,
+            'batches': 0,
+            'queue_peak': 0,
+            'delivery_time': 0.0,
+        }
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        """
+        Starts the delivery thread if it is not running. Threads do not survive
+        forking, so a new thread (and queue) is created in each process.
+        """
+
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+
+        self._pid = os.getpid()
+        self.queue = Queue.Queue(self.queue_size)
+        self.lock = threading.Lock()
+        self.metrics_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='events-delivery-%s' % self.sink.get_name(),
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, event):
+        """
+        Queues an event for delivery.
+
+        :param event: Event record
+        """
+
+        self._ensure_thread()
+
+        try:
+            self.queue.put_nowait(event)
+        except Queue.Full:
+            # Apply backpressure by delivering synchronously.
+            with self.metrics_lock:
+                self.metrics['fallback'] += 1
+            self._deliver([event])
+            return
+
+        with self.metrics_lock:
+            self.metrics['queued'] += 1
+            self.metrics['queue_peak'] = max(self.metrics['queue_peak'], self.queue.qsize())
+
+    def get_metrics(self):
+        """
+        Returns a copy of delivery metrics.
+        """
+
+        with self.metrics_lock:
+            return dict(self.metrics)
+
+    def drain(self):
+        """
+        Blocks until all queued events have been delivered.
+        """
+
+        if self._thread is None or self._pid != os.getpid():
+            return
+
+        self.queue.join()
+
+    def _run(self):
+        queue = self.queue
+        while True:
+            batch = [queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                except Queue.Empty:
+                    break
+
+            try:
+                self._deliver(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _deliver(self, events):
+        """
+        Delivers a batch of events to the sink.
+
+        :param events: A list of event records
+        """
+
+        with self.lock:
+            start = time.time()
+            try:
+                for event in events:
+                    self.sink.deliver(event)
+                self.sink.flush()
+                result = 'delivered'
+            except:
+                self.sink.discard()
+                result = 'failed'
+                logger.error("Event sink '%s' has failed to deliver events:" % self.sink.get_name())
+                logger.error(traceback.format_exc())
+
+            with self.metrics_lock:
+                self.metrics[result] += len(events)
+                self.metrics['batches'] += 1
+                self.metrics['delivery_time'] += time.time() - start
@@ -1,3 +1,4 @@
+import contextlib
 import copy
 import re
 
@@ -20,6 +21,8 @@ class EventSinkPool(object):
         self._records = {}
         self._discovered = False
         self._states = []
+        self._buffering = 0
+        self._routes = {}
 
     def __enter__(self):
         self._states.append((copy.copy(self._sinks), copy.copy(self._records), self._discovered))
@@ -32,6 +35,7 @@ class EventSinkPool(object):
             # calls do not raise EventSinkNotRegistered or
             # EventSinkAlreadyRegistered exceptions
             self._sinks, self._records, self._discovered = state
+            self.invalidate_routes()
 
         # Re-raise any exception
         return False
@@ -75,6 +79,7 @@ class EventSinkPool(object):
             # Pass sink configuration to the sink
             sink_cfg = getattr(settings, 'EVENT_SINKS', {}).get(sink_name, {})
             self._sinks[sink_name] = sink(**sink_cfg)
+            self.invalidate_routes()
 
     def register_record(self, record_or_iterable):
         """
@@ -114,6 +119,7 @@ class EventSinkPool(object):
                 raise exceptions.EventSinkNotRegistered("No event sink with name '%s' is registered" % sink_name)
 
             del self._sinks[sink_name]
+            self.invalidate_routes()
 
     def get_all_sinks(self):
         """
@@ -158,4 +164,109 @@ class EventSinkPool(object):
     def has_sink(self, sink_name):
         return sink_name in self._sinks
 
+    def invalidate_routes(self):
+        """
+        Invalidates compiled event routes. Must be called whenever sinks or their
+        filters change.
+        """
+
+        self._routes = {}
+
+    def get_routes(self, event_class):
+        """
+        Returns compiled routes for the given event class. Routes are compiled
+        on first use and contain all enabled sinks which accept events of the
+        given class together with their enabled filters applicable to it.
+
+        :param event_class: Event record class
+        :return: A list of (sink, filters) tuples
+        """
+
+        try:
+            return self._routes[event_class]
+        except KeyError:
+            pass
+
+        routes = []
+        for sink in self.get_all_sinks():
+            if not sink.enabled or not sink.accepts(event_class):
+                continue
+
+            filters = [
+                event_filter for event_filter in sink.get_filters()
+                if event_filter.enabled and event_filter.applies_to(event_class)
+            ]
+            routes.append((sink, filters))
+
+        self._routes[event_class] = routes
+        return routes
+
+    def is_buffering(self):
+        """
+        Returns true if sinks that support buffering should buffer events.
+        """
+
+        return self._buffering > 0
+
+    @contextlib.contextmanager
+    def buffered(self):
+        """
+        Context manager which enables buffered delivery in sinks that support it.
+        Buffered events are flushed when the outermost block completes and are
+        discarded when it raises an exception.
+        """
+
+        self._buffering += 1
+        try:
+            yield
+        except:
+            self._buffering -= 1
+            if not self._buffering:
+                self.discard()
+            raise
+        else:
+            self._buffering -= 1
+            if not self._buffering:
+                self.flush()
+
+    def flush(self):
+        """
+        Flushes buffered events in all sinks. Asynchronous sinks flush after each
+        delivered batch on their own.
+        """
+
+        for sink in self.get_all_sinks():
+            if not sink.asynchronous:
+                sink.flush()
+
+    def discard(self):
+        """
+        Discards buffered events in all sinks.
+        """
+
+        for sink in self.get_all_sinks():
+            if not sink.asynchronous:
+                sink.discard()
+
+    def drain(self):
+        """
+        Blocks until all events queued for asynchronous sinks have been delivered.
+        """
+
+        for sink in self.get_all_sinks():
+            sink.drain()
+
+    def get_delivery_metrics(self):
+        """
+        Returns delivery metrics of all asynchronous sinks.
+
+        :return: A dictionary mapping sink names to their metrics
+        """
+
+        return {
+            sink.get_name(): sink.get_delivery_metrics()
+            for sink in self.get_all_sinks()
+            if sink.asynchronous
+        }
+
 pool = EventSinkPool()
@@ -1,4 +1,6 @@
+import collections
 import unittest
+import uuid
 
 from django import test as django_test
 
@@ -15,6 +17,25 @@ class TestEventSink(base.EventSink):
         self.events.append(event)
 
 
+class BufferedTestEventSink(TestEventSink):
+    def __init__(self, **kwargs):
+        super(BufferedTestEventSink, self).__init__(**kwargs)
+        self.buffer = []
+
+    def deliver(self, event):
+        if pool.is_buffering():
+            self.buffer.append(event)
+        else:
+            self.events.append(event)
+
+    def flush(self):
+        self.events.extend(self.buffer)
+        self.buffer = []
+
+    def discard(self):
+        self.buffer = []
+
+
 class TestEventFilter(base.EventFilter):
     def __init__(self, pass_everything=False, **kwargs):
         super(TestEventFilter, self).__init__(**kwargs)
@@ -46,6 +67,22 @@ class TestNodeEvent(declarative.NodeEventRecord):
         )
 
 
+class TestKeyedNodeEvent(declarative.NodeEventRecord):
+    interface = declarative.CharAttribute(primary_key=True)
+    details = declarative.CharAttribute()
+
+    def __init__(self, node, interface, details=None):
+        super(TestKeyedNodeEvent, self).__init__(
+            [node],
+            declarative.NodeEventRecord.SEVERITY_INFO,
+            interface=interface,
+            details=details,
+        )
+
+# Primary keys only depend on node UUIDs, so nodes need not be stored.
+TestNode = collections.namedtuple('TestNode', ['uuid'])
+
+
 class TestInvalidSubclass(object):
     pass
 
@@ -108,6 +145,55 @@ class EventsTestCase(unittest.TestCase):
         base.EventRecord(a=1, b=2, c=True, message="Hello event world!").post()
         self.assertEqual(len(sink.events), 6)
 
+    def test_buffered_delivery(self):
+        pool.register_sink(BufferedTestEventSink)
+        try:
+            sink = pool.get_sink('BufferedTestEventSink')
+
+            with pool.buffered():
+                base.EventRecord(a=1, b=2, message="Hello event world!").post()
+                with pool.buffered():
+                    base.EventRecord(a=3, b=4, message="Hello event world!").post()
+                # Events are only flushed when the outermost block completes.
+                self.assertEqual(len(sink.events), 0)
+            self.assertEqual(len(sink.events), 2)
+
+            # Events are discarded on errors.
+            with self.assertRaises(ValueError):
+                with pool.buffered():
+                    base.EventRecord(a=5, b=6, message="Hello event world!").post()
+                    raise ValueError
+            self.assertEqual(len(sink.events), 2)
+            self.assertFalse(pool.is_buffering())
+
+            # Events are delivered immediately outside buffered blocks.
+            base.EventRecord(a=7, b=8, message="Hello event world!").post()
+            self.assertEqual(len(sink.events), 3)
+        finally:
+            pool.unregister_sink(BufferedTestEventSink)
+
+    def test_compiled_routes(self):
+        sink = pool.get_sink('TestEventSink')
+        routes = pool.get_routes(base.EventRecord)
+        self.assertEqual([route_sink for route_sink, _ in routes], [sink])
+        self.assertEqual(len(routes[0][1]), 1)
+        # Routes are compiled once.
+        self.assertIs(pool.get_routes(base.EventRecord), routes)
+
+        # Routes are recompiled when the configuration changes.
+        sink.set_enabled(False)
+        self.assertEqual(pool.get_routes(base.EventRecord), [])
+        sink.set_enabled(True)
+
+        sink.accepts = lambda event_class: not issubclass(event_class, TestNodeEvent)
+        pool.invalidate_routes()
+        try:
+            self.assertEqual(pool.get_routes(TestNodeEvent), [])
+            self.assertEqual(len(pool.get_routes(base.EventRecord)), 1)
+        finally:
+            del sink.accepts
+            pool.invalidate_routes()
+
     def test_exceptions(self):
         with self.assertRaises(exceptions.InvalidEventSink):
             pool.register_sink(TestInvalidSubclass)
@@ -137,6 +223,38 @@ class EventsTestCase(unittest.TestCase):
         with self.assertRaises(KeyError):
             TestNodeEvent.get_attribute('does_not_exist')
 
+    def test_primary_key(self):
+        node = TestNode(uuid.uuid4())
+        event = TestKeyedNodeEvent(node, 'wlan0', 'details')
+        primary_key = event.get_primary_key()
+        self.assertIs(event.get_primary_key(), primary_key)
+
+        # Memoised key must equal a fresh computation.
+        self.assertEqual(primary_key, uuid.uuid5(
+            declarative.EVENT_UUID_NAMESPACE,
+            ','.join([TestKeyedNodeEvent.source_type, TestKeyedNodeEvent.source_name, str(node.uuid), 'wlan0']),
+        ))
+        self.assertEqual(TestKeyedNodeEvent(node, 'wlan0', 'other details').get_primary_key(), primary_key)
+        self.assertNotEqual(TestKeyedNodeEvent(node, 'wlan1', 'details').get_primary_key(), primary_key)
+        self.assertNotEqual(TestKeyedNodeEvent(TestNode(uuid.uuid4()), 'wlan0').get_primary_key(), primary_key)
+
+        # Complements have the same key as their source, whether or not it was computed before.
+        complement = ~event
+        self.assertTrue(complement.is_absent())
+        self.assertFalse(event.is_absent())
+        self.assertEqual(complement.get_primary_key(), primary_key)
+
+        source = TestKeyedNodeEvent(node, 'wlan0')
+        complement = ~source
+        self.assertEqual(complement.get_primary_key(), primary_key)
+        self.assertEqual(source.get_primary_key(), primary_key)
+
+        TestKeyedNodeEvent(node, 'wlan0').absent()
+        sink = pool.get_sink('TestEventSink')
+        self.assertEqual(len(sink.events), 1)
+        self.assertTrue(sink.events[0].is_absent())
+        self.assertEqual(sink.events[0].get_primary_key(), primary_key)
+
 
 class EventsSettingsTestCase(django_test.TestCase):
     def setUp(self):
@@ -203,3 +321,23 @@ class EventsSettingsTestCase(django_test.TestCase):
                 self.assertEqual(len(sink.events), 1)
             finally:
                 pool.unregister_sink(TestEventSink)
+
+        # Test asynchronous delivery via settings
+        with self.settings(EVENT_SINKS={
+            'TestEventSink': {
+                'asynchronous': True
+            }
+        }):
+            pool.register_sink(TestEventSink)
+            try:
+                for index in xrange(10):
+                    base.EventRecord(a=index, message="Hello event world!").post()
+                pool.drain()
+
+                sink = pool.get_sink('TestEventSink')
+                self.assertEqual([event.a for event in sink.events], range(10))
+                metrics = pool.get_delivery_metrics()['TestEventSink']
+                self.assertEqual(metrics['delivered'], 10)
+                self.assertEqual(metrics['failed'], 0)
+            finally:
+                pool.unregister_sink(TestEventSink)
@@ -0,0 +1,18 @@
+from django import apps
+from django.db.models import signals as models_signals
+
+
+class CgmConfig(apps.AppConfig):
+    name = 'nodewatcher.core.generator.cgm'
+    label = 'cgm'
+
+    def ready(self):
+        super(CgmConfig, self).ready()
+
+        from nodewatcher.core.registry import signals as registry_signals
+
+        from . import models, statistics
+
+        # Adjust device statistics when the router of a node changes.
+        registry_signals.connect_subclasses(models_signals.pre_save, statistics.device_pre_save, models.CgmGeneralConfig)
+        registry_signals.connect_subclasses(models_signals.post_save, statistics.device_post_save, models.CgmGeneralConfig)
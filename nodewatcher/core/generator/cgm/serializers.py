@@ -31,5 +31,5 @@ class DeviceStatisticsSerializer(serializers.Serializer):
     Serializer for global per-device statistics.
     """
 
-    device = DeviceChoiceSerializer()
+    device = DeviceChoiceSerializer(source='key')
     nodes = serializers.IntegerField()
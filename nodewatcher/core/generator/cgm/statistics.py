@@ -0,0 +1,39 @@
+from django.db import models as django_models
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.monitor import statistics
+
+
+def device():
+    """
+    Computes global per-device statistics.
+    """
+
+    return core_models.Node.objects.regpoint('config').registry_fields(
+        device='core.general__router'
+    ).values(
+        'device'
+    ).annotate(
+        nodes=django_models.Count('uuid')
+    )
+
+statistics.pool.register('device', device)
+
+
+def device_pre_save(sender, instance, **kwargs):
+    """
+    Remembers the previous device, so that statistics can be adjusted.
+    """
+
+    instance._statistics_previous_router = None
+    if instance.pk is not None:
+        instance._statistics_previous_router = sender.objects.filter(pk=instance.pk).values_list('router', flat=True).first()
+
+
+def device_post_save(sender, instance, created, **kwargs):
+    # New nodes are counted when statistics are reconciled.
+    if created:
+        return
+
+    # Device statistics include all nodes, regardless of when they were last seen.
+    statistics.pool.adjust('device', getattr(instance, '_statistics_previous_router', None), instance.router)
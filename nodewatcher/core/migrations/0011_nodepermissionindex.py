@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_index(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Node = apps.get_model('core', 'Node')
+    NodePermissionIndex = apps.get_model('core', 'NodePermissionIndex')
+    UserObjectPermission = apps.get_model('guardian', 'UserObjectPermission')
+    GroupObjectPermission = apps.get_model('guardian', 'GroupObjectPermission')
+
+    try:
+        content_type = ContentType.objects.get(app_label='core', model='node')
+    except ContentType.DoesNotExist:
+        return
+
+    entries = set(UserObjectPermission.objects.filter(content_type=content_type).values_list('user_id', 'object_pk'))
+    entries.update(
+        GroupObjectPermission.objects.filter(
+            content_type=content_type,
+            group__user__isnull=False,
+        ).values_list('group__user', 'object_pk')
+    )
+    nodes = set(Node.objects.values_list('pk', flat=True))
+
+    NodePermissionIndex.objects.bulk_create([
+        NodePermissionIndex(user_id=user_id, node_id=node_id)
+        for user_id, node_id in entries
+        if node_id in nodes
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('guardian', '0001_initial'),
+        ('core', '0010_json_field'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodePermissionIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='permission_index', to='core.Node')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='nodepermissionindex',
+            unique_together=set([('user', 'node')]),
+        ),
+        migrations.RunPython(populate_index, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 
+from django.conf import settings
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
 
@@ -44,6 +45,20 @@ class Node(models.Model):
 registration.create_point(Node, 'config')
 
 
+class NodePermissionIndex(models.Model):
+    """
+    Denormalised index of nodes on which users have any object permission,
+    either directly or through their groups. It is maintained when object
+    permissions or group memberships change.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    node = models.ForeignKey(Node, on_delete=models.CASCADE, related_name='permission_index')
+
+    class Meta:
+        unique_together = (('user', 'node'),)
+
+
 class GeneralConfig(registration.bases.NodeConfigRegistryItem):
     """
     General node configuration containing basic parameters about the
@@ -0,0 +1,24 @@
+from django import apps
+from django.db.models import signals as models_signals
+
+
+def populate_statistics(sender, **kwargs):
+    from . import statistics
+
+    statistics.pool.populate()
+
+
+class MonitorConfig(apps.AppConfig):
+    name = 'nodewatcher.core.monitor'
+    label = 'monitor'
+
+    def ready(self):
+        super(MonitorConfig, self).ready()
+
+        from . import statistics
+
+        # Connect signals of statistics dimensions, which track configuration changes.
+        statistics.pool.discover_dimensions()
+
+        # Populate statistics counters, which do not exist yet, after migrations.
+        models_signals.post_migrate.connect(populate_statistics, sender=self)
@@ -10,3 +10,11 @@ class NodeProcessorAbort(Exception):
     """
 
     pass
+
+
+class StatisticsDimensionAlreadyRegistered(Exception):
+    pass
+
+
+class StatisticsDimensionNotRegistered(Exception):
+    pass
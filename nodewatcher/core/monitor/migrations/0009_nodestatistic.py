@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitor', '0008_json_field'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeStatistic',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=50)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('nodes', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='nodestatistic',
+            unique_together=set([('dimension', 'value')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitor', '0009_nodestatistic'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generalmonitor',
+            name='last_seen',
+            field=models.DateTimeField(db_index=True, null=True),
+        ),
+    ]
@@ -17,7 +17,7 @@ class GeneralMonitor(registration.bases.NodeMonitoringRegistryItem):
     """
 
     first_seen = models.DateTimeField(null=True)
-    last_seen = models.DateTimeField(null=True)
+    last_seen = models.DateTimeField(null=True, db_index=True)
     uuid = models.CharField(max_length=40, null=True)
     firmware = models.CharField(max_length=100, null=True)
 
@@ -268,3 +268,26 @@ class AdjancencyHistory(models.Model):
 
     class Meta:
         unique_together = ('node_a', 'node_b', 'protocol')
+
+
+class NodeStatistic(models.Model):
+    """
+    Materialised number of nodes with a specific value in some statistics
+    dimension (for example the number of nodes that are up).
+    """
+
+    dimension = models.CharField(max_length=50)
+    # Unknown values are stored as empty strings.
+    value = models.CharField(max_length=255, blank=True)
+    nodes = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('dimension', 'value')
+
+    @property
+    def key(self):
+        """
+        Returns the dimension value, where None represents an unknown value.
+        """
+
+        return self.value or None
@@ -0,0 +1,208 @@
+import collections
+import datetime
+
+from django.db import IntegrityError, models as django_models, transaction
+from django.utils import timezone
+
+from nodewatcher.utils import loader
+
+from . import exceptions, models
+
+# Nodes, which haven't been seen for longer than this, are not counted
+WINDOW = datetime.timedelta(days=180)
+
+
+def get_window_start():
+    """
+    Returns the time after which nodes must have been last seen to be counted.
+    """
+
+    return timezone.now() - WINDOW
+
+
+def is_counted(node):
+    """
+    Returns True if the given node is counted in statistics, that is when it
+    has been seen inside the statistics window.
+
+    :param node: Node instance
+    """
+
+    last_seen = getattr(node.monitoring.core.general(), 'last_seen', None)
+    return last_seen is not None and last_seen > get_window_start()
+
+
+def encode_value(value):
+    """
+    Encodes a dimension value for storage.
+
+    :param value: Dimension value or None when unknown
+    """
+
+    if value is None:
+        return ''
+
+    return unicode(value)
+
+
+class StatisticsPool(object):
+    """
+    Pool of materialised node statistics dimensions. Each dimension is registered
+    together with a function that computes the statistics from scratch. Counters
+    are populated after migrations, moved incrementally when values of counted
+    nodes change and periodically reconciled with the computed statistics.
+
+    Incremental updates only move nodes between counters of a dimension. Nodes
+    being added or removed and nodes entering or leaving the statistics window
+    are only accounted for by reconciliation.
+    """
+
+    def __init__(self):
+        self._dimensions = collections.OrderedDict()
+        self._discovered = False
+
+    def discover_dimensions(self):
+        """
+        Loads statistics dimensions from all installed applications.
+        """
+
+        if self._discovered:
+            return
+        self._discovered = True
+
+        loader.load_modules('statistics')
+
+    def register(self, dimension, compute):
+        """
+        Registers a new statistics dimension.
+
+        :param dimension: Dimension name
+        :param compute: A callable returning an iterable of dictionaries with
+          the dimension value under the dimension name and the number of nodes
+          under the 'nodes' key
+        """
+
+        if dimension in self._dimensions:
+            raise exceptions.StatisticsDimensionAlreadyRegistered("Statistics dimension '%s' is already registered!" % dimension)
+
+        self._dimensions[dimension] = compute
+
+    def get_dimensions(self):
+        """
+        Returns names of all registered dimensions.
+        """
+
+        self.discover_dimensions()
+
+        return self._dimensions.keys()
+
+    def get_queryset(self, dimension):
+        """
+        Returns a queryset of materialised statistics for the given dimension.
+
+        :param dimension: Dimension name
+        """
+
+        return models.NodeStatistic.objects.filter(dimension=dimension, nodes__gt=0).order_by('value')
+
+    def _increment(self, dimension, value, delta):
+        """
+        Increments a single counter, creating it if needed.
+
+        :param dimension: Dimension name
+        :param value: Encoded dimension value
+        :param delta: Positive counter delta
+        """
+
+        counter = models.NodeStatistic.objects.filter(dimension=dimension, value=value)
+        if counter.update(nodes=django_models.F('nodes') + delta):
+            return
+
+        try:
+            with transaction.atomic():
+                models.NodeStatistic.objects.create(dimension=dimension, value=value, nodes=delta)
+        except IntegrityError:
+            # The counter has been created concurrently.
+            counter.update(nodes=django_models.F('nodes') + delta)
+
+    def adjust(self, dimension, old_value, new_value, count=1):
+        """
+        Moves nodes between counters of a dimension. Counters are updated after
+        the current transaction commits, so that rolled back changes are not
+        counted and counter rows are only locked briefly. Nodes are only moved
+        when the previous counter holds them, so that totals never change.
+
+        :param dimension: Dimension name
+        :param old_value: Previous value
+        :param new_value: New value
+        :param count: Number of moved nodes
+        """
+
+        old_value = encode_value(old_value)
+        new_value = encode_value(new_value)
+        if old_value == new_value or not count:
+            return
+
+        def apply():
+            with transaction.atomic():
+                moved = models.NodeStatistic.objects.filter(
+                    dimension=dimension,
+                    value=old_value,
+                    nodes__gte=count,
+                ).update(nodes=django_models.F('nodes') - count)
+
+                if moved:
+                    self._increment(dimension, new_value, count)
+
+        transaction.on_commit(apply)
+
+    def populate(self):
+        """
+        Reconciles all dimensions, which do not have any counters yet (for
+        example after installation or after a new dimension is added).
+        """
+
+        self.discover_dimensions()
+
+        populated = set(models.NodeStatistic.objects.values_list('dimension', flat=True).distinct())
+        for dimension in self._dimensions.keys():
+            if dimension not in populated:
+                self.reconcile(dimension)
+
+    def reconcile(self, dimension=None):
+        """
+        Recomputes materialised statistics. Any counter drift (for example due
+        to nodes being removed or not being seen for a long time) is corrected.
+
+        :param dimension: Optional dimension name, by default all dimensions
+          are reconciled
+        """
+
+        self.discover_dimensions()
+
+        if dimension is None:
+            dimensions = self._dimensions.keys()
+        elif dimension not in self._dimensions:
+            raise exceptions.StatisticsDimensionNotRegistered("Statistics dimension '%s' is not registered!" % dimension)
+        else:
+            dimensions = [dimension]
+
+        for dimension in dimensions:
+            with transaction.atomic():
+                counts = collections.defaultdict(int)
+                for row in self._dimensions[dimension]():
+                    counts[encode_value(row[dimension])] += row['nodes']
+
+                counters = models.NodeStatistic.objects.select_for_update().filter(dimension=dimension)
+                for value, nodes in counters.values_list('value', 'nodes'):
+                    current = counts.pop(value, 0)
+                    if current != nodes:
+                        counters.filter(value=value).update(nodes=current)
+
+                models.NodeStatistic.objects.bulk_create([
+                    models.NodeStatistic(dimension=dimension, value=value, nodes=nodes)
+                    for value, nodes in counts.items()
+                ])
+                counters.filter(nodes=0).delete()
+
+pool = StatisticsPool()
@@ -1,10 +1,21 @@
+import datetime
+
 from django.db import transaction
 
 from celery.task import task as celery_task
 
-from . import processors as monitor_processors, worker as monitor_worker
+from nodewatcher import celery
+from nodewatcher.core.events import pool as events_pool
+
+from . import processors as monitor_processors, statistics, worker as monitor_worker
 from .config import config as monitor_config
 
+# Register the periodic schedule.
+celery.app.conf.CELERYBEAT_SCHEDULE['nodewatcher.core.monitor.tasks.reconcile_statistics'] = {
+    'task': 'nodewatcher.core.monitor.tasks.reconcile_statistics',
+    'schedule': datetime.timedelta(minutes=15),
+}
+
 
 @celery_task(bind=True)
 def run_pipeline(self, run_id, base_context=None):
@@ -59,3 +70,15 @@ def run_pipeline(self, run_id, base_context=None):
 
                 # Restore per-node context for further network processors.
                 context.for_node = node_local_context
+
+    # Deliver any events queued for asynchronous sinks.
+    events_pool.drain()
+
+
+@celery.app.task(queue='monitor', bind=True)
+def reconcile_statistics(self):
+    """
+    Recomputes materialised node statistics.
+    """
+
+    statistics.pool.reconcile()
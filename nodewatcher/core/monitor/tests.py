@@ -0,0 +1,111 @@
+import datetime
+import json
+
+from django import test as django_test
+from django.core import urlresolvers
+from django.db import transaction
+from django.utils import timezone
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.generator.cgm import models as cgm_models
+
+from . import exceptions, models, statistics
+
+
+class StatisticsTestCase(django_test.TransactionTestCase):
+    def setUp(self):
+        self.nodes = []
+        for index, router in enumerate(['wl500gpv1', 'wl500gpv1', 'fon-2100']):
+            node = core_models.Node()
+            node.save()
+            node.config.core.general(
+                create=cgm_models.CgmGeneralConfig,
+                name='Node %s' % index,
+                platform='openwrt',
+                router=router,
+            ).save()
+            node.monitoring.core.general(
+                create=models.GeneralMonitor,
+                first_seen=timezone.now(),
+                last_seen=timezone.now(),
+            ).save()
+            self.nodes.append(node)
+
+    def get_counters(self, dimension):
+        return dict(models.NodeStatistic.objects.filter(dimension=dimension).values_list('value', 'nodes'))
+
+    def set_router(self, node, router):
+        general = node.config.core.general()
+        general.router = router
+        general.save()
+
+    def test_reconcile(self):
+        # New nodes are only counted by reconciliation.
+        self.assertEqual(self.get_counters('device'), {})
+        statistics.pool.reconcile('device')
+        self.assertEqual(self.get_counters('device'), {'wl500gpv1': 2, 'fon-2100': 1})
+
+        # Counter drift is corrected and empty counters are removed.
+        models.NodeStatistic.objects.filter(dimension='device', value='wl500gpv1').update(nodes=5)
+        models.NodeStatistic.objects.create(dimension='device', value='whr-hp-g54', nodes=1)
+        self.nodes[2].delete()
+        statistics.pool.reconcile()
+        self.assertEqual(self.get_counters('device'), {'wl500gpv1': 2})
+
+        with self.assertRaises(exceptions.StatisticsDimensionNotRegistered):
+            statistics.pool.reconcile('invalid')
+
+    def test_populate(self):
+        statistics.pool.populate()
+        self.assertEqual(self.get_counters('device'), {'wl500gpv1': 2, 'fon-2100': 1})
+
+        # Dimensions with existing counters are not populated again.
+        models.NodeStatistic.objects.filter(dimension='device', value='fon-2100').delete()
+        statistics.pool.populate()
+        self.assertEqual(self.get_counters('device'), {'wl500gpv1': 2})
+
+    def test_adjust(self):
+        statistics.pool.reconcile('device')
+
+        # Changing the router of a node moves it between counters.
+        self.set_router(self.nodes[0], 'fon-2100')
+        self.assertEqual(self.get_counters('device'), {'wl500gpv1': 1, 'fon-2100': 2})
+        self.set_router(self.nodes[1], 'whr-hp-g54')
+        self.assertEqual(self.get_counters('device'), {'wl500gpv1': 0, 'fon-2100': 2, 'whr-hp-g54': 1})
+
+        # Counters are not changed when the transaction is rolled back.
+        try:
+            with transaction.atomic():
+                self.set_router(self.nodes[2], 'wl500gpv1')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(self.get_counters('device'), {'wl500gpv1': 0, 'fon-2100': 2, 'whr-hp-g54': 1})
+
+        # Nodes are not moved from counters, which do not hold them, so totals never change.
+        statistics.pool.adjust('device', 'wl500gpv1', 'fon-2100')
+        statistics.pool.adjust('device', 'fon-2100', 'whr-hp-g54', count=3)
+        self.assertEqual(self.get_counters('device'), {'wl500gpv1': 0, 'fon-2100': 2, 'whr-hp-g54': 1})
+
+        # Unknown values are counted separately.
+        statistics.pool.adjust('device', 'fon-2100', None)
+        self.assertEqual(self.get_counters('device'), {'wl500gpv1': 0, 'fon-2100': 1, 'whr-hp-g54': 1, '': 1})
+
+    def test_not_counted(self):
+        self.assertTrue(statistics.is_counted(self.nodes[0]))
+
+        general = self.nodes[0].monitoring.core.general()
+        general.last_seen = timezone.now() - statistics.WINDOW - datetime.timedelta(days=1)
+        general.save()
+        self.assertFalse(statistics.is_counted(self.nodes[0]))
+
+    def test_api(self):
+        statistics.pool.reconcile('device')
+        self.set_router(self.nodes[2], 'wl500gpv1')
+
+        # Empty counters are not returned.
+        response = self.client.get(urlresolvers.reverse('apiv2:statistics-device-list'), {'format': 'json'})
+        results = json.loads(response.content)['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['device']['name'], 'wl500gpv1')
+        self.assertEqual(results[0]['nodes'], 3)
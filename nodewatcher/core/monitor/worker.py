@@ -1,12 +1,15 @@
 import copy
 import logging
 import multiprocessing
+from multiprocessing import util as multiprocessing_util
 import time
 import traceback
 
 from django import db
 from django.db import connection, transaction
 
+from nodewatcher.core.events import pool as events_pool
+
 from . import processors as monitor_processors, exceptions
 from .config import config as monitor_config
 from .. import models as core_models
@@ -15,6 +18,15 @@ from .. import models as core_models
 logger = logging.getLogger('monitor.worker')
 
 
+def initialize_worker():
+    """
+    Prepares a worker process. Processors do not wait for asynchronous sinks,
+    so events queued by the worker are delivered when the worker exits.
+    """
+
+    multiprocessing_util.Finalize(None, events_pool.drain, exitpriority=10)
+
+
 def stage_worker(args):
     """
     Runs a list of (node) processors on a given node.
@@ -29,7 +41,8 @@ def stage_worker(args):
         for p in processors:
             try:
                 abort_requested = False
-                with transaction.atomic():
+                # Events are buffered until the processor completes and are stored in the same transaction.
+                with transaction.atomic(), events_pool.buffered():
                     processor = p()
                     try:
                         context = processor.process(context, node)
@@ -98,11 +111,12 @@ class MonitorRun(object):
         try:
             self.workers = multiprocessing.Pool(
                 self.config['workers'],
+                initializer=initialize_worker,
                 maxtasksperchild=self.config['max_tasks_per_child'],
             )
         except TypeError:
             # Compatibility with Python 2.6 that doesn't have the maxtasksperchild argument
-            self.workers = multiprocessing.Pool(self.config['workers'])
+            self.workers = multiprocessing.Pool(self.config['workers'], initializer=initialize_worker)
 
         logger.info("Ready with %d workers for run '%s'." % (self.config['workers'], self.name))
 
@@ -126,10 +140,11 @@ class MonitorRun(object):
 
                     try:
                         if lead_proc.requires_transaction:
-                            with transaction.atomic():
+                            with transaction.atomic(), events_pool.buffered():
                                 context, nodes = lead_proc(worker_pool=self.workers).process(context, nodes)
                         else:
-                            context, nodes = lead_proc(worker_pool=self.workers).process(context, nodes)
+                            with events_pool.buffered():
+                                context, nodes = lead_proc(worker_pool=self.workers).process(context, nodes)
                     except KeyboardInterrupt:
                         raise
                     except:
@@ -165,7 +180,9 @@ class MonitorRun(object):
                 else:
                     logger.warning("Ignoring unkown type of processor '%s'!" % lead_proc.__name__)
 
-            self.workers.terminate()
+            # Let the workers exit on their own, so that they deliver their queued events.
+            self.workers.close()
+            self.workers.join()
             self.workers = None
         finally:
             # Ensure that the worker pool gets cleaned up after processing is completed
@@ -173,6 +190,9 @@ class MonitorRun(object):
                 logger.info("Stopping worker processes...")
                 self.workers.terminate()
 
+            # Deliver any events queued by network processors.
+            events_pool.drain()
+
         logger.info("All done.")
 
     def start(self):
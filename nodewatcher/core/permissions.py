@@ -0,0 +1,142 @@
+from django import dispatch
+from django.contrib.auth import models as auth_models
+from django.contrib.contenttypes import models as contenttypes_models
+from django.db import transaction
+from django.db.models import signals as models_signals
+
+from guardian import models as guardian_models, shortcuts
+
+from . import models
+
+
+def get_node_content_type():
+    return contenttypes_models.ContentType.objects.get_for_model(models.Node)
+
+
+def refresh_node_permissions(user_ids, node_ids=None, additions=True):
+    """
+    Recomputes node permission index entries from object permissions.
+
+    :param user_ids: A list of user primary keys
+    :param node_ids: Optional list of node primary keys, by default entries
+      for all nodes are recomputed
+    :param additions: Set to False when permissions have only been removed, so
+      that no entries are added (for example while a user is being deleted)
+    """
+
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    content_type = get_node_content_type()
+    user_permissions = guardian_models.UserObjectPermission.objects.filter(
+        content_type=content_type,
+        user__in=user_ids,
+    )
+    group_permissions = guardian_models.GroupObjectPermission.objects.filter(
+        content_type=content_type,
+        group__user__in=user_ids,
+    )
+    index = models.NodePermissionIndex.objects.filter(user__in=user_ids)
+    if node_ids is not None:
+        node_ids = list(node_ids)
+        user_permissions = user_permissions.filter(object_pk__in=node_ids)
+        group_permissions = group_permissions.filter(object_pk__in=node_ids)
+        index = index.filter(node__in=node_ids)
+
+    expected = set(user_permissions.values_list('user_id', 'object_pk'))
+    expected.update(group_permissions.values_list('group__user', 'object_pk'))
+    expected = set((user_id, node_id) for user_id, node_id in expected if user_id in user_ids)
+
+    # Object permissions are not removed together with nodes.
+    nodes = set(models.Node.objects.filter(pk__in=set(node_id for _, node_id in expected)).values_list('pk', flat=True))
+    expected = set((user_id, node_id) for user_id, node_id in expected if node_id in nodes)
+
+    with transaction.atomic():
+        current = set(index.select_for_update().values_list('user_id', 'node_id'))
+
+        removed = {}
+        for user_id, node_id in current - expected:
+            removed.setdefault(user_id, []).append(node_id)
+        for user_id, removed_node_ids in removed.items():
+            models.NodePermissionIndex.objects.filter(user=user_id, node__in=removed_node_ids).delete()
+
+        if additions:
+            models.NodePermissionIndex.objects.bulk_create([
+                models.NodePermissionIndex(user_id=user_id, node_id=node_id)
+                for user_id, node_id in expected - current
+            ])
+
+
+def get_nodes_for_user(user, queryset=None, use_index=True):
+    """
+    Returns nodes on which the given user has any object permission. Global
+    permissions and superuser status are not taken into account.
+
+    :param user: User instance
+    :param queryset: Optional node queryset to filter
+    :param use_index: Set to False to query object permissions directly
+    """
+
+    if queryset is None:
+        queryset = models.Node.objects.all()
+
+    if not use_index:
+        return shortcuts.get_objects_for_user(user, [], queryset, with_superuser=False, accept_global_perms=False)
+
+    return queryset.filter(permission_index__user=user)
+
+
+@dispatch.receiver(models_signals.post_save, sender=guardian_models.UserObjectPermission)
+@dispatch.receiver(models_signals.post_delete, sender=guardian_models.UserObjectPermission)
+def user_permission_changed(sender, instance, signal, **kwargs):
+    if instance.content_type_id != get_node_content_type().pk:
+        return
+
+    refresh_node_permissions(
+        [instance.user_id],
+        [instance.object_pk],
+        additions=signal is models_signals.post_save,
+    )
+
+
+@dispatch.receiver(models_signals.post_save, sender=guardian_models.GroupObjectPermission)
+@dispatch.receiver(models_signals.post_delete, sender=guardian_models.GroupObjectPermission)
+def group_permission_changed(sender, instance, signal, **kwargs):
+    if instance.content_type_id != get_node_content_type().pk:
+        return
+
+    refresh_node_permissions(
+        auth_models.User.objects.filter(groups=instance.group_id).values_list('pk', flat=True),
+        [instance.object_pk],
+        additions=signal is models_signals.post_save,
+    )
+
+
+@dispatch.receiver(models_signals.m2m_changed, sender=auth_models.User.groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # Remember group members, as they are not known after the group is cleared.
+        instance._permission_index_user_ids = list(instance.user_set.values_list('pk', flat=True))
+        return
+    elif action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == 'post_clear':
+        user_ids = getattr(instance, '_permission_index_user_ids', [])
+    else:
+        user_ids = pk_set
+
+    refresh_node_permissions(user_ids, additions=action == 'post_add')
+
+
+@dispatch.receiver(models_signals.pre_delete, sender=auth_models.Group)
+def group_pre_delete(sender, instance, **kwargs):
+    instance._permission_index_user_ids = list(instance.user_set.values_list('pk', flat=True))
+
+
+@dispatch.receiver(models_signals.post_delete, sender=auth_models.Group)
+def group_post_delete(sender, instance, **kwargs):
+    refresh_node_permissions(getattr(instance, '_permission_index_user_ids', []), additions=False)
@@ -1,2 +1,3 @@
+from .caching import *
 from .serializers import *
 from .views import *
@@ -0,0 +1,125 @@
+from django import dispatch
+from django.contrib.auth import models as auth_models
+from django.db import transaction
+from django.db.models import signals as models_signals
+
+from guardian import models as guardian_models
+
+from nodewatcher.core.api import caching as api_caching
+
+from .. import registration, signals
+
+# Exports.
+__all__ = [
+    'RegistryCachedResponseMixin',
+]
+
+
+def get_model_generation(model):
+    """
+    Returns the name of the cache generation for a registry root model.
+
+    :param model: Registry root model class
+    """
+
+    return model._meta.concrete_model._meta.label_lower
+
+
+class RegistryCachedResponseMixin(api_caching.CachedResponseMixin):
+    """
+    Caches responses of registry root viewsets. Responses depend on the root
+    model and on registration points referenced by query parameters, so for
+    example monitoring updates do not invalidate responses, which only contain
+    configuration.
+    """
+
+    def get_cache_generations(self, request):
+        model = self.queryset.model
+        generations = [get_model_generation(model)]
+
+        values = [value for key, values in request.query_params.lists() for value in values]
+        for point in registration.all_points():
+            if point.model is not model:
+                continue
+
+            prefix = '%s:' % point.namespace
+            if any(prefix in value for value in values):
+                generations.append(point.name)
+
+        return generations
+
+
+def invalidate_on_commit(name):
+    """
+    Invalidates cached API responses depending on the given generation after
+    the current transaction commits. Responses rendered from uncommitted data
+    could otherwise be cached under the new generation.
+
+    :param name: Generation name
+    """
+
+    transaction.on_commit(lambda: api_caching.invalidate(name))
+
+
+def registry_item_changed(sender, instance, **kwargs):
+    """
+    Invalidates cached API responses when registry items change.
+    """
+
+    invalidate_on_commit(sender._registry.registration_point.name)
+
+
+def root_changed(sender, instance, **kwargs):
+    """
+    Invalidates cached API responses when registry roots change.
+    """
+
+    invalidate_on_commit(get_model_generation(sender))
+
+
+def object_permission_changed(sender, instance, **kwargs):
+    """
+    Invalidates cached API responses when object permissions on registry roots
+    change.
+    """
+
+    model = instance.content_type.model_class()
+    if model is not None and model._meta.concrete_model in set(point.model for point in registration.all_points()):
+        invalidate_on_commit(get_model_generation(model))
+
+
+def group_membership_changed(sender, action=None, **kwargs):
+    """
+    Invalidates cached API responses of all registry roots when group
+    membership changes, as object permissions may be granted through groups.
+    """
+
+    if action not in (None, 'post_add', 'post_remove', 'post_clear'):
+        return
+
+    for model in set(point.model for point in registration.all_points()):
+        invalidate_on_commit(get_model_generation(model))
+
+
+@dispatch.receiver(signals.point_changed)
+def registration_point_changed(sender, **kwargs):
+    api_caching.invalidate(sender.name)
+
+
+def connect_signals():
+    """
+    Connects invalidation of cached API responses to signals of all registry
+    roots, registry items, object permissions and group membership.
+    """
+
+    for point in registration.all_points():
+        for signal in (models_signals.post_save, models_signals.post_delete):
+            signals.connect_subclasses(signal, registry_item_changed, point.item_base)
+            signals.connect_subclasses(signal, root_changed, point.model)
+
+    for model in (guardian_models.UserObjectPermission, guardian_models.GroupObjectPermission):
+        models_signals.post_save.connect(object_permission_changed, sender=model)
+        models_signals.post_delete.connect(object_permission_changed, sender=model)
+
+    models_signals.m2m_changed.connect(group_membership_changed, sender=auth_models.User.groups.through)
+    models_signals.post_delete.connect(group_membership_changed, sender=auth_models.Group)
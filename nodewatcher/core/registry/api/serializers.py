@@ -1,3 +1,5 @@
+import collections
+
 from django.db import models
 from django.db.models import constants
 
@@ -53,11 +55,56 @@ class RegisteredChoiceSerializer(serializers.Serializer):
             return None
 
 
+# Default serializers for models without a registered serializer.
+default_serializers = {}
+
+
+def get_model_serializer(model):
+    """
+    Returns a serializer class for the given model. When no serializer is
+    registered, a default model serializer is constructed and cached.
+
+    :param model: Model class
+    """
+
+    try:
+        return api_serializers.pool.get_serializer(model)
+    except api_exceptions.SerializerNotRegistered:
+        pass
+
+    try:
+        return default_serializers[model]
+    except KeyError:
+        # Don't know how to serialize the model, construct a default serializer.
+        class meta_cls:
+            pass
+
+        meta_cls.model = model
+        serializer = type('DefaultModelSerializer', (serializers.ModelSerializer,), {'Meta': meta_cls})
+        default_serializers[model] = serializer
+        return serializer
+
+
+RepresentationStep = collections.namedtuple('RepresentationStep', [
+    'field',
+    'meta',
+    'namespace',
+    'atoms',
+    'annotations',
+])
+
+
 class RegistryRootSerializerMixin(object):
     """
     Mixin for serializing registry roots.
     """
 
+    def __init__(self, *args, **kwargs):
+        super(RegistryRootSerializerMixin, self).__init__(*args, **kwargs)
+
+        self._representation_plans = {}
+        self._serializer_instances = {}
+
     def get_field_names(self, *args, **kwargs):
         fields = super(RegistryRootSerializerMixin, self).get_field_names(*args, **kwargs)
 
@@ -66,10 +113,22 @@ class RegistryRootSerializerMixin(object):
 
         return fields
 
-    def to_representation(self, instance):
-        data = super(RegistryRootSerializerMixin, self).to_representation(instance)
+    def get_representation_plan(self, model):
+        """
+        Returns a list of steps for serializing registry fields of the given
+        model. As list serializers reuse the same child serializer for all
+        instances, the plan is only computed once per response.
+
+        :param model: Registry root model class
+        """
 
-        for field in instance._meta.virtual_fields:
+        try:
+            return self._representation_plans[model]
+        except KeyError:
+            pass
+
+        plan = []
+        for field in model._meta.virtual_fields:
             if not hasattr(field, 'src_model'):
                 continue
 
@@ -77,21 +136,53 @@ class RegistryRootSerializerMixin(object):
             if field.name.startswith('_order_field_'):
                 continue
 
-            def serialize_instance(item):
-                if hasattr(field, '_registry_annotations'):
-                    for target_attribute, source_attribute in field._registry_annotations.items():
-                        setattr(item, target_attribute, getattr(instance, source_attribute))
-
-                return item._registry.serializer_class(item).data
-
             meta = field.src_model._registry
-            value = getattr(instance, field.name)
-            namespace = data.setdefault(meta.registration_point.namespace, {})
+            atoms = None
             if field.src_field:
                 atoms = field.src_field.split(constants.LOOKUP_SEP)
                 if atoms[0] in meta.sensitive_fields:
                     continue
 
+            plan.append(RepresentationStep(
+                field=field.name,
+                meta=meta,
+                namespace=meta.registration_point.namespace,
+                atoms=atoms,
+                annotations=getattr(field, '_registry_annotations', {}).items(),
+            ))
+
+        self._representation_plans[model] = plan
+        return plan
+
+    def get_serializer_instance(self, serializer_class):
+        """
+        Returns an instance of the given serializer class, which is reused for
+        serializing all values of the same class.
+
+        :param serializer_class: Serializer class
+        """
+
+        try:
+            return self._serializer_instances[serializer_class]
+        except KeyError:
+            serializer = self._serializer_instances[serializer_class] = serializer_class()
+            return serializer
+
+    def to_representation(self, instance):
+        data = super(RegistryRootSerializerMixin, self).to_representation(instance)
+
+        for step in self.get_representation_plan(instance.__class__):
+            def serialize_instance(item):
+                for target_attribute, source_attribute in step.annotations:
+                    setattr(item, target_attribute, getattr(instance, source_attribute))
+
+                return self.get_serializer_instance(item._registry.serializer_class).to_representation(item)
+
+            meta = step.meta
+            atoms = step.atoms
+            value = getattr(instance, step.field)
+            namespace = data.setdefault(step.namespace, {})
+            if atoms is not None:
                 if isinstance(value, models.Manager):
                     base_container = namespace.setdefault(meta.registry_id, [])
                     for index, item in enumerate(value.all()):
@@ -109,16 +200,7 @@ class RegistryRootSerializerMixin(object):
                     container = reduce(lambda a, b: a.setdefault(b, {}), atoms[:-1], base_container)
 
                     if isinstance(value, models.Model):
-                        try:
-                            serializer = api_serializers.pool.get_serializer(value.__class__)
-                        except api_exceptions.SerializerNotRegistered:
-                            # Don't know how to serialize the model, construct a default serializer.
-                            class meta_cls:
-                                model = value.__class__
-
-                            serializer = type('DefaultModelSerializer', (serializers.ModelSerializer,), {'Meta': meta_cls})
-
-                        value = serializer(value).data
+                        value = self.get_serializer_instance(get_model_serializer(value.__class__)).to_representation(value)
 
                     container[atoms[-1]] = value
                     annotate_instance(meta, base_container)
@@ -10,9 +10,9 @@ from rest_framework import test
 from nodewatcher.core import models as core_models
 
 
-class RegistryAPITestCase(test.APITestCase):
+class RegistryAPITestMixin(object):
     def setUp(self):
-        super(RegistryAPITestCase, self).setUp()
+        super(RegistryAPITestMixin, self).setUp()
 
         # Create some users.
         self.users = []
@@ -65,3 +65,16 @@ class RegistryAPITestCase(test.APITestCase):
         # Manually deserialize content instead of using response.data as the latter is sometimes not raw JSON.
         response.data = json.loads(response.content)
         return response
+
+
+class RegistryAPITestCase(RegistryAPITestMixin, test.APITestCase):
+    pass
+
+
+class RegistryAPITransactionTestCase(RegistryAPITestMixin, test.APITransactionTestCase):
+    """
+    Registry API test case for tests, which depend on transactions being
+    committed (for example invalidation of cached responses).
+    """
+
+    pass
@@ -9,6 +9,8 @@ from django.core import exceptions as django_exceptions
 
 from guardian import shortcuts
 
+from nodewatcher.core.api import streaming as api_streaming
+
 from .. import expression, exceptions, lookup
 
 # Exports.
@@ -17,7 +19,7 @@ __all__ = [
 ]
 
 
-class RegistryRootViewSetMixin(object):
+class RegistryRootViewSetMixin(api_streaming.StreamingListMixin):
     def get_queryset(self):
         queryset = super(RegistryRootViewSetMixin, self).get_queryset()
 
@@ -116,9 +118,17 @@ class RegistryRootViewSetMixin(object):
         if has_permissions:
             try:
                 has_permissions_user = auth_models.User.objects.get(username=has_permissions)
-                queryset = shortcuts.get_objects_for_user(has_permissions_user, [], queryset, with_superuser=False, accept_global_perms=False)
             except auth_models.User.DoesNotExist:
-                queryset = queryset.none()
+                return queryset.none()
+
+            # Imported here as core models are not yet loaded when this module is imported.
+            from nodewatcher.core import models as core_models, permissions as core_permissions
+
+            if field is None and issubclass(queryset.model, core_models.Node):
+                # Use the precomputed node permission index.
+                queryset = core_permissions.get_nodes_for_user(has_permissions_user, queryset)
+            else:
+                queryset = shortcuts.get_objects_for_user(has_permissions_user, [], queryset, with_superuser=False, accept_global_perms=False)
 
         return queryset
 
@@ -11,3 +11,13 @@ class RegistryConfig(apps.AppConfig):
         super(RegistryConfig, self).ready()
 
         models_signals.post_migrate.connect(permissions.create_permissions)
+
+        # Connect cached API response invalidation.
+        from .api import caching
+        caching.connect_signals()
+
+        # All registry items have been registered at this point, so field resolution
+        # indices can be built before serving any registry queries.
+        from . import registration
+        for point in registration.all_points():
+            point.build_field_index()
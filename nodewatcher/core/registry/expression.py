@@ -1,10 +1,27 @@
+import re
+
 from grako import exceptions
 
+from django.conf import settings
 from django.db.models import constants, query
 from django.contrib.gis import measure
 
+from nodewatcher.utils import datastructures
+
 from . import expression_parser
 
+# Caches of parsed expressions, keyed by expression strings.
+lookup_cache = datastructures.LRUCache(lambda: getattr(settings, 'REGISTRY_EXPRESSION_CACHE_SIZE', 1024))
+filter_cache = datastructures.LRUCache(lambda: getattr(settings, 'REGISTRY_EXPRESSION_CACHE_SIZE', 1024))
+
+# Simple lookup expressions without constraints (for example 'config:core.general__name'),
+# which can be parsed without invoking the full expression parser.
+SIMPLE_LOOKUP_EXPRESSION = re.compile(
+    r'^(?:(?P<registration_point>[a-zA-Z0-9]+(?:_[a-zA-Z0-9]+)*):)?'
+    r'(?P<registry_id>[a-zA-Z0-9]+(?:\.[a-zA-Z0-9]+)*)'
+    r'(?P<field>(?:__[a-zA-Z0-9]+(?:_[a-zA-Z0-9]+)*)*)$'
+)
+
 
 class LookupExpression(object):
     """
@@ -57,6 +74,36 @@ class LookupExpression(object):
             constraints=ast.constraints,
         )
 
+    @classmethod
+    def from_parts(cls, parts):
+        """
+        Constructs a new lookup expression from cached parts.
+
+        :param parts: A tuple as returned by get_parts
+        """
+
+        registration_point, registry_id, field, constraints = parts
+
+        return LookupExpression(
+            registration_point=registration_point,
+            registry_id=registry_id,
+            field=list(field) if field is not None else None,
+            constraints=list(constraints) if constraints is not None else None,
+        )
+
+    def get_parts(self):
+        """
+        Returns an immutable representation of this lookup expression, which
+        is suitable for caching.
+        """
+
+        return (
+            self.registration_point,
+            self.registry_id,
+            tuple(self.field) if self.field is not None else None,
+            tuple(self.constraints) if self.constraints is not None else None,
+        )
+
     def __repr__(self):
         return '<LookupExpression registration_point=\'%s\' registry_id=\'%s\' constraints=\'%s\' field=\'%s\'>' % (
             self.registration_point,
@@ -104,20 +151,50 @@ class LookupExpressionSemantics(expression_parser.ExpressionSemantics):
 
 class LookupExpressionParser(object):
     """
-    A parser for registry lookup expressions.
+    A parser for registry lookup expressions. Parsed expressions are cached.
     """
 
     def __init__(self):
-        self._parser = expression_parser.ExpressionParser()
+        self._parser = None
         self._semantics = LookupExpressionSemantics()
 
-    def parse(self, expression):
+    def _parse(self, expression):
+        """
+        Parses a lookup expression.
+
+        :param expression: Lookup expression string
+        :return: Lookup expression parts
+        """
+
+        match = SIMPLE_LOOKUP_EXPRESSION.match(expression)
+        if match is not None:
+            field = match.group('field')
+
+            return (
+                match.group('registration_point'),
+                match.group('registry_id'),
+                tuple(field.split(constants.LOOKUP_SEP)[1:]) if field else None,
+                None,
+            )
+
+        if self._parser is None:
+            self._parser = expression_parser.ExpressionParser()
+
         try:
             ast = self._parser.parse(expression, rule_name='lookup', semantics=self._semantics)
         except exceptions.FailedParse:
             raise ValueError('Invalid registry lookup expression: %s' % expression)
 
-        return LookupExpression.from_ast(ast)
+        return LookupExpression.from_ast(ast).get_parts()
+
+    def parse(self, expression):
+        parts = lookup_cache.get(expression)
+        if parts is None:
+            parts = self._parse(expression)
+            lookup_cache.put(expression, parts)
+
+        # Lookup expressions may be modified by callers, so a new instance is returned each time.
+        return LookupExpression.from_parts(parts)
 
 
 class FilterExpression(object):
@@ -154,11 +231,12 @@ class FilterExpression(object):
         return '<FilterExpression: %s>' % self.filter_q
 
 
-class FilterExpressionSemantics(LookupExpressionSemantics):
-    def __init__(self, root, field=None, disallow_sensitive=False):
-        self.root = root
-        self.field = field
-        self.disallow_sensitive = disallow_sensitive
+class FilterExpressionStructureSemantics(LookupExpressionSemantics):
+    """
+    Semantics which transform a filter expression into a tree that does not
+    depend on the root model, so that it can be cached. Nodes of the tree are
+    tuples with the node type as the first element.
+    """
 
     def filter_expression_prec1(self, ast):
         lhs, rhs, op = ast['lhs'], ast['rhs'], ast['op']
@@ -170,9 +248,47 @@ class FilterExpressionSemantics(LookupExpressionSemantics):
         if not isinstance(op, list):
             op = [op]
 
-        expressions = lhs + [rhs]
+        return ('combine', tuple(lhs + [rhs]), tuple(op))
+
+    def filter_expression_prec2(self, ast):
+        expression, op = ast['expression'], ast['op']
+
+        if op is None:
+            return expression
+        elif op == '!':
+            return ('negate', expression)
+        else:
+            raise ValueError('Unsupported operator: %s' % op)
+
+    def equality_lookup(self, ast):
+        return ('lookup', LookupExpression.from_ast(ast['field']).get_parts(), ast['value'])
+
+
+class FilterExpressionSemantics(object):
+    """
+    Transforms a filter expression tree into a filter expression for a
+    specific root model.
+    """
+
+    def __init__(self, root, field=None, disallow_sensitive=False):
+        self.root = root
+        self.field = field
+        self.disallow_sensitive = disallow_sensitive
+
+    def evaluate(self, node):
+        """
+        Evaluates a filter expression tree node.
+
+        :param node: Filter expression tree node
+        :return: Filter expression
+        """
+
+        return getattr(self, node[0])(*node[1:])
+
+    def combine(self, expressions, operators):
+        expressions = [self.evaluate(expression) for expression in expressions]
         active = expressions[0]
-        for expression, operator in zip(expressions[1:], op):
+        for expression, operator in zip(expressions[1:], operators):
             q = active.filter_q
             ensure_distinct = active.ensure_distinct or expression.ensure_distinct
 
@@ -181,7 +297,7 @@ class FilterExpressionSemantics(LookupExpressionSemantics):
             elif operator == '|':
                 q = q | expression.filter_q
             else:
-                raise ValueError('Unsupported operator: %s' % op)
+                raise ValueError('Unsupported operator: %s' % operator)
 
             active = FilterExpression(
                 q,
@@ -190,20 +306,14 @@ class FilterExpressionSemantics(LookupExpressionSemantics):
 
         return active
 
-    def filter_expression_prec2(self, ast):
-        expression, op = ast['expression'], ast['op']
+    def negate(self, expression):
+        expression = self.evaluate(expression)
+        return FilterExpression(~expression.filter_q, ensure_distinct=expression.ensure_distinct)
 
-        if op is None:
-            return expression
-        elif op == '!':
-            return FilterExpression(~expression.filter_q, ensure_distinct=expression.ensure_distinct)
-        else:
-            raise ValueError('Unsupported operator: %s' % op)
-
-    def equality_lookup(self, ast):
+    def lookup(self, parts, value):
         from . import lookup
 
-        lookup_expression = LookupExpression.from_ast(ast['field'])
+        lookup_expression = LookupExpression.from_parts(parts)
         try:
             selector, _, ensure_distinct = lookup.selector_for_lookup(
                 self.root,
@@ -217,16 +327,18 @@ class FilterExpressionSemantics(LookupExpressionSemantics):
             # Disallowed field.
             return FilterExpression(query.Q())
 
-        return FilterExpression(query.Q(**{selector: ast['value']}), ensure_distinct=ensure_distinct)
+        return FilterExpression(query.Q(**{selector: value}), ensure_distinct=ensure_distinct)
 
 
 class FilterExpressionParser(object):
     """
-    A parser for registry filter expressions.
+    A parser for registry filter expressions. Parsed expressions are cached
+    independently of the root model.
     """
 
     def __init__(self, root, field=None, disallow_sensitive=False):
-        self._parser = expression_parser.ExpressionParser()
+        self._parser = None
+        self._structure = FilterExpressionStructureSemantics()
         self._semantics = FilterExpressionSemantics(
             root,
             field=field,
@@ -234,7 +346,16 @@ class FilterExpressionParser(object):
         )
 
     def parse(self, expression):
-        try:
-            return self._parser.parse(expression, rule_name='filter', semantics=self._semantics)
-        except exceptions.FailedParse:
-            raise ValueError('Invalid registry filter expression: %s' % expression)
+        tree = filter_cache.get(expression)
+        if tree is None:
+            if self._parser is None:
+                self._parser = expression_parser.ExpressionParser()
+
+            try:
+                tree = self._parser.parse(expression, rule_name='filter', semantics=self._structure)
+            except exceptions.FailedParse:
+                raise ValueError('Invalid registry filter expression: %s' % expression)
+
+            filter_cache.put(expression, tree)
+
+        return self._semantics.evaluate(tree)
@@ -3,7 +3,7 @@ from rest_framework import serializers as drf_serializers, viewsets as drf_views
 from nodewatcher.core.api import urls as api_urls, serializers as api_serializers
 
 from . import registration
-from .api import views, serializers
+from .api import caching, views, serializers
 
 # Determine all the top-level models, which contain registration points. All these need
 # to be exposed as top-level resources in the API.
@@ -35,7 +35,7 @@ for model in top_level_models:
 
     viewset = type(
         '%sViewSet' % (model.__name__),
-        (views.RegistryRootViewSetMixin, drf_viewsets.ReadOnlyModelViewSet),
+        (caching.RegistryCachedResponseMixin, views.RegistryRootViewSetMixin, drf_viewsets.ReadOnlyModelViewSet),
         {
             'queryset': model.objects.all(),
             'serializer_class': serializer,
@@ -1,16 +1,191 @@
 import copy
+import functools
 import inspect
 
 from django import db as django_db
 from django.apps import apps
+from django.conf import settings
 from django.core import exceptions as django_exceptions
 from django.db import models as django_models
 from django.db.models import constants
 from django.utils import tree
 
+from nodewatcher.utils import datastructures
+
 from . import expression, exceptions
 
 
+class ProxyModelCache(datastructures.LRUCache):
+    """
+    A bounded cache of proxy models generated by registry_fields. Proxy models
+    are keyed by their base model and all projected fields, so that each proxy
+    model is only constructed once per process.
+    """
+
+    def __init__(self):
+        super(ProxyModelCache, self).__init__(lambda: getattr(settings, 'REGISTRY_PROXY_MODEL_CACHE_SIZE', 256))
+
+    def get(self, key):
+        """
+        Returns a cached proxy model or None when no model is cached.
+
+        :param key: Cache key
+        """
+
+        if key is None:
+            return None
+
+        return super(ProxyModelCache, self).get(key)
+
+    def put(self, key, model):
+        """
+        Stores a proxy model into the cache, evicting the least recently used
+        models when the cache is full.
+
+        :param key: Cache key
+        :param model: Proxy model class
+        """
+
+        if key is None:
+            return
+
+        super(ProxyModelCache, self).put(key, model)
+
+proxy_models = ProxyModelCache()
+
+
+def constraints_key(constraints):
+    """
+    Returns a hashable key describing lookup expression constraints or None if
+    the constraints cannot be used as a key.
+
+    :param constraints: A list of lookup constraints
+    """
+
+    key = tuple([(constraint.field, constraint.operator, constraint.value) for constraint in constraints])
+
+    try:
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
+def proxy_select_name(field, name):
+    """
+    Returns the name under which a proxy field value is selected.
+
+    :param field: Destination field
+    :param name: Proxy field name
+    """
+
+    if field.is_relation:
+        return '%s_att' % name
+
+    return name
+
+
+def install_proxy_field(model, field, name, src_model=None, src_field=None):
+    """
+    Installs a virtual field, which copies some registry item field, into a
+    proxy model.
+    """
+
+    field = copy.deepcopy(field)
+    field.name = None
+    # Include src_model and src_field to enable destination field resolution.
+    field.src_model = src_model
+    field.src_field = src_field
+    select_name = proxy_select_name(field, name)
+    # Since the field is populated by a join, it can always be null when the model doesn't exist
+    field.null = True
+    field.contribute_to_class(model, name, virtual_only=True)
+    field.concrete = False
+
+    if field.is_relation:
+        # Handle foreign key relations properly.
+        field.attname = select_name
+
+        # Clear field cache to ensure the correct field is used to determine attname.
+        if hasattr(field, '_related_fields'):
+            del field._related_fields
+
+    model._registry_attrs.append(select_name)
+
+
+def install_relation_field(model, name, dst_model, dst_field_name=None, queryset=None, multiple=False):
+    """
+    Installs a virtual field, which provides access to registry items, into a
+    proxy model.
+    """
+
+    from . import fields
+
+    if multiple:
+        field = fields.RegistryMultipleRelationField(dst_model, related_field=dst_field_name, queryset=queryset)
+    else:
+        field = fields.RegistryRelationField(dst_model)
+
+    # Add proxy attributes so that the field can be used in filter.
+    field.src_model = dst_model
+    field.src_field = dst_field_name
+    field.contribute_to_class(model, name, virtual_only=True)
+    field.concrete = False
+
+
+def create_proxy_model(base_model, installers, key):
+    """
+    Constructs a new proxy model with virtual registry fields.
+
+    :param base_model: Model that is being proxied
+    :param installers: A list of callables that install virtual fields
+    :param key: Proxy model cache key
+    """
+
+    # Clear any existing proxy models to prevent duplicate class warnings.
+    try:
+        del apps.all_models['_registry_proxy_models_']
+    except KeyError:
+        pass
+
+    class Meta:
+        proxy = True
+        app_label = '_registry_proxy_models_'
+
+    # Use a dictionary to transfer data to closure by reference.
+    this_class = {'parent': base_model}
+
+    def pickle_reduce(self):
+        t = super(this_class['class'], self).__reduce__()
+        attrs = t[2]
+        for name in self._registry_attrs:
+            if name in attrs:
+                del attrs[name]
+        return (t[0], (this_class['parent'], t[1][1], t[1][2]), attrs)
+
+    model = type(
+        '%sRegistryProxy' % base_model.__name__,
+        (base_model,),
+        {
+            '__module__': 'nodewatcher.core.registry.lookup',
+            '_registry_proxy': True,
+            '_registry_proxy_base': base_model,
+            '_registry_proxy_key': key[1] if key is not None else None,
+            '_registry_proxy_installers': tuple(installers),
+            '_registry_attrs': [],
+            'Meta': Meta,
+            '__reduce__': pickle_reduce,
+        },
+    )
+    this_class['class'] = model
+
+    for installer in installers:
+        installer(model)
+
+    return model
+
+
 class RegistryQuerySet(django_models.QuerySet):
     """
     An augmented query set that enables lookups of values from the registry.
@@ -84,17 +259,24 @@ class RegistryQuerySet(django_models.QuerySet):
                         dst_field = selector
                         selector = None
 
-                    dst_model, dst_field = self._regpoint.get_model_with_field(registry_id, dst_field)
-                    dst_field = dst_field.name
+                    resolution = self._regpoint.resolve_field(registry_id, dst_field)
+                    dst_field = resolution.field.name
+                    lookup_chain = resolution.lookup_chain
+                    sensitive = resolution.sensitive
+                    multiple = resolution.multiple
+            else:
+                lookup_chain = dst_model._registry.get_lookup_chain()
+                sensitive = dst_field in dst_model._registry.sensitive_fields
+                multiple = dst_model._registry.multiple
 
             # Disallow filter by sensitive fields if requested.
-            if dst_field in dst_model._registry.sensitive_fields and disallow_sensitive:
+            if sensitive and disallow_sensitive:
                 continue
 
-            if dst_model._registry.multiple:
+            if multiple:
                 ensure_distinct = True
 
-            new_selector = dst_model._registry.get_lookup_chain() + constants.LOOKUP_SEP + dst_field
+            new_selector = lookup_chain + constants.LOOKUP_SEP + dst_field
             if selector is not None:
                 new_selector += constants.LOOKUP_SEP + selector
 
@@ -135,11 +317,13 @@ class RegistryQuerySet(django_models.QuerySet):
             if field.src_field is None and len(alias) > 1:
                 # We need to perform model resolution again as the destination model
                 # is not known as a field name is required to resolve the proper model subclass.
-                src_model = src_model._registry.registration_point.get_model_with_field(
+                lookup_chain = src_model._registry.registration_point.resolve_field(
                     src_model._registry.registry_id, alias[1]
-                )[0]
+                ).lookup_chain
+            else:
+                lookup_chain = src_model._registry.get_lookup_chain()
 
-            selector = [src_model._registry.get_lookup_chain()]
+            selector = [lookup_chain]
             if field.src_field is not None:
                 selector.append(field.src_field)
             if alias[1:]:
@@ -210,73 +394,20 @@ class RegistryQuerySet(django_models.QuerySet):
 
         clone = self._clone()
 
-        # Construct a temporary fake model for this query.
-        if not hasattr(clone.model, '_registry_proxy'):
-            # Clear any existing proxy models to prevent duplicate class warnings.
-            try:
-                del apps.all_models['_registry_proxy_models_']
-            except KeyError:
-                pass
-
-            class Meta:
-                proxy = True
-                app_label = '_registry_proxy_models_'
-
-            # Use a dictionary to transfer data to closure by reference.
-            this_class = {'parent': clone.model}
-
-            def pickle_reduce(self):
-                t = super(this_class['class'], self).__reduce__()
-                attrs = t[2]
-                for name in self._registry_attrs:
-                    if name in attrs:
-                        del attrs[name]
-                return (t[0], (this_class['parent'], t[1][1], t[1][2]), attrs)
-
-            clone.model = type(
-                '%sRegistryProxy' % clone.model.__name__,
-                (clone.model,),
-                {
-                    '__module__': 'nodewatcher.core.registry.lookup',
-                    '_registry_proxy': True,
-                    '_registry_attrs': [],
-                    'Meta': Meta,
-                    '__reduce__': pickle_reduce,
-                },
-            )
-            clone.query.model = clone.model
-            this_class['class'] = clone.model
-
-        def install_proxy_field(model, field, name, src_model=None, src_field=None):
-            field = copy.deepcopy(field)
-            field.name = None
-            # Include src_model and src_field to enable destination field resolution.
-            field.src_model = src_model
-            field.src_field = src_field
-            select_name = name
-            # Since the field is populated by a join, it can always be null when the model doesn't exist
-            field.null = True
-            field.contribute_to_class(clone.model, name, virtual_only=True)
-            field.concrete = False
-
-            if field.is_relation:
-                # Handle foreign key relations properly.
-                select_name = '%s_att' % name
-                field.attname = select_name
-
-                # Clear field cache to ensure the correct field is used to determine attname.
-                if hasattr(field, '_related_fields'):
-                    del field._related_fields
-
-            model._registry_attrs.append(select_name)
-            return select_name
+        # Projected fields are installed on a proxy model. Proxy models are cached, keyed by
+        # the base model and all projections, so chained calls need to start from the base.
+        base_model = getattr(clone.model, '_registry_proxy_base', clone.model)
+        installers = list(getattr(clone.model, '_registry_proxy_installers', []))
+        cache_key = getattr(clone.model, '_registry_proxy_key', ())
+        projections = []
 
         parser = expression.LookupExpressionParser()
-        for field_name, dst in kwargs.iteritems():
+        for field_name, dst in sorted(kwargs.iteritems()):
             info = None
             dst_queryset = None
             dst_field = None
             dst_related = None
+            queryset_key = None
             m2m = False
 
             if inspect.isclass(dst) and issubclass(dst, django_models.Model):
@@ -315,6 +446,7 @@ class RegistryQuerySet(django_models.QuerySet):
                 # If there are constraints, we need to specify a queryset and apply the constraints.
                 if info.constraints:
                     dst_queryset = info.apply_constraints(dst_model.objects.all())
+                    queryset_key = constraints_key(info.constraints)
 
             if not hasattr(dst_model, '_registry'):
                 raise TypeError("Specified model must be a registry item.")
@@ -323,6 +455,8 @@ class RegistryQuerySet(django_models.QuerySet):
             if m2m:
                 raise ValueError("Many-to-many fields not supported in registry_fields query!")
 
+            dst_field_name = dst_field.name if dst_field else None
+
             if dst_model._registry.multiple:
                 # The destination model can contain multiple items; in this case we need to
                 # provide the proxy model with a descriptor that returns a queryset to the models.
@@ -331,40 +465,35 @@ class RegistryQuerySet(django_models.QuerySet):
                 if dst_field is not None and not dst_field.concrete:
                     raise ValueError("Cannot project non-concrete field on registry items with multiple models.")
 
-                from . import fields
-
-                dst_field_name = dst_field.name if dst_field else None
-                field = fields.RegistryMultipleRelationField(dst_model, related_field=dst_field_name, queryset=dst_queryset)
-                field.src_model = dst_model
-                field.src_field = dst_field_name
-                field.contribute_to_class(clone.model, field_name, virtual_only=True)
-                field.concrete = False
-                clone = clone.prefetch_related(django_models.Prefetch(field_name, queryset=dst_queryset))
-                continue
+                # The descriptor keeps the queryset, so arbitrary querysets cannot be cached.
+                if dst_queryset is not None and queryset_key is None:
+                    cache_key = None
+
+                installers.append(functools.partial(
+                    install_relation_field,
+                    name=field_name,
+                    dst_model=dst_model,
+                    dst_field_name=dst_field_name,
+                    queryset=dst_queryset,
+                    multiple=True,
+                ))
+                projections.append((field_name, None, django_models.Prefetch(field_name, queryset=dst_queryset)))
             elif dst_field is None:
                 # If there can only be one item and no field is requested, create a descriptor.
-                from . import fields
-
-                field = fields.RegistryRelationField(dst_model)
-                # Add proxy attributes so that the field can be used in filter.
-                field.src_model = dst_model
-                field.src_field = None
-                field.contribute_to_class(clone.model, field_name, virtual_only=True)
-                field.concrete = False
-                clone = clone.prefetch_related(django_models.Prefetch(field_name, queryset=dst_queryset))
-                continue
+                installers.append(functools.partial(install_relation_field, name=field_name, dst_model=dst_model))
+                projections.append((field_name, None, django_models.Prefetch(field_name, queryset=dst_queryset)))
             elif dst_related is None:
                 # Select destination field and install proxy field descriptor.
                 # TODO: Support prefetching if dst_field.is_relation is True.
                 src_column = '%s.%s' % (self._quote_name(dst_model._meta.db_table), self._quote_name(dst_field.column))
-                select_name = install_proxy_field(
-                    clone.model,
-                    dst_field,
-                    field_name,
+                installers.append(functools.partial(
+                    install_proxy_field,
+                    field=dst_field,
+                    name=field_name,
                     src_model=dst_model,
                     src_field=dst_field.name,
-                )
-                clone = clone.extra(select={select_name: src_column})
+                ))
+                projections.append((field_name, {proxy_select_name(dst_field, field_name): src_column}, None))
             else:
                 # Traverse the relation and copy the destination field descriptor.
                 dst_field_model = dst_field.rel.to
@@ -376,14 +505,35 @@ class RegistryQuerySet(django_models.QuerySet):
                     raise ValueError("Many-to-many fields not supported in registry_fields query!")
 
                 src_column = '%s.%s' % (self._quote_name(dst_field_model._meta.db_table), self._quote_name(dst_related_field.column))
-                select_name = install_proxy_field(
-                    clone.model,
-                    dst_related_field,
-                    field_name,
+                installers.append(functools.partial(
+                    install_proxy_field,
+                    field=dst_related_field,
+                    name=field_name,
                     src_model=dst_model,
-                    src_field=constants.LOOKUP_SEP.join((dst_field.name, dst_related))
-                )
-                clone = clone.extra(select={select_name: src_column})
+                    src_field=constants.LOOKUP_SEP.join((dst_field.name, dst_related)),
+                ))
+                projections.append((field_name, {proxy_select_name(dst_related_field, field_name): src_column}, None))
+
+            if cache_key is not None:
+                cache_key += ((field_name, dst_model, dst_field_name, dst_related, queryset_key),)
+
+        # Construct a proxy model for this query or reuse a previously constructed one.
+        if cache_key is not None:
+            cache_key = (base_model, cache_key)
+        proxy_model = proxy_models.get(cache_key)
+        if proxy_model is None:
+            proxy_model = create_proxy_model(base_model, installers, cache_key)
+            proxy_models.put(cache_key, proxy_model)
+
+        clone.model = proxy_model
+        clone.query.model = proxy_model
+
+        for field_name, select, prefetch in projections:
+            if prefetch is not None:
+                clone = clone.prefetch_related(prefetch)
+                continue
+
+            clone = clone.extra(select=select)
 
             # Setup required joins.
             field_names = clone.registry_expand_proxy_field(field_name).split(constants.LOOKUP_SEP)
@@ -451,21 +601,17 @@ def selector_for_lookup(root_cls, lookup, disallow_sensitive=False):
         root_cls._meta.concrete_model._meta.model_name,
         lookup.registration_point
     ))
-    dst_model, dst_field = registration_point.get_model_with_field(
-        lookup.registry_id,
-        lookup.field[0]
-    )
+    resolution = registration_point.resolve_field(lookup.registry_id, lookup.field[0])
 
     # Disallow filter by sensitive fields if requested.
-    if dst_field.name in dst_model._registry.sensitive_fields and disallow_sensitive:
+    if resolution.sensitive and disallow_sensitive:
         return None
 
-    selector = dst_model._registry.get_lookup_chain() + constants.LOOKUP_SEP + dst_field.name
+    selector = resolution.lookup_chain + constants.LOOKUP_SEP + resolution.field.name
     if len(lookup.field) > 1:
         selector += constants.LOOKUP_SEP + constants.LOOKUP_SEP.join(lookup.field[1:])
 
-    ensure_distinct = dst_model._registry.multiple
-    return (selector, dst_field, ensure_distinct)
+    return (selector, resolution.field, resolution.multiple)
 
 
 def order_by(queryset, ordering, root_cls, field=None, disallow_sensitive=False):
@@ -528,9 +674,9 @@ def order_by(queryset, ordering, root_cls, field=None, disallow_sensitive=False)
         # order that the choices were registered, instead of by their value.
         if isinstance(dst_field, (registry_fields.RegistryChoiceField, registry_fields.NullBooleanChoiceField)):
             cases = []
-            for order, choice in enumerate(dst_field.get_registered_choices()):
+            for position, choice in enumerate(dst_field.get_registered_choices()):
                 cases.append(django_models.When(
-                    then=django_models.Value(order),
+                    then=django_models.Value(position),
                     **{selector: choice.name}
                 ))
 
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management import base
+from django.test import utils
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.registry.api import views as registry_views
+
+from ... import lookup
+
+# Fields requested by the node list and the map.
+DEFAULT_FIELDS = [
+    'config:core.general',
+    'config:core.type',
+    'config:core.location',
+    'config:core.project__project__name',
+    'config:core.routerid',
+    'monitoring:core.general__last_seen',
+    'monitoring:core.status',
+    'monitoring:network.routing.topology',
+]
+
+
+class Command(base.BaseCommand):
+    help = "Benchmarks node queryset construction with registry field projections."
+
+    def add_arguments(self, parser):
+        """Command arguments."""
+        parser.add_argument('--field', action='append', dest='fields', help="Projected registry field (may be repeated)")
+        parser.add_argument('--requests', type=int, default=500, help="Number of simulated requests")
+
+    def run(self, fields, requests):
+        """
+        Builds and compiles the node queryset for the given number of requests.
+
+        :return: Duration in seconds
+        """
+
+        start_time = time.time()
+        for _ in xrange(requests):
+            queryset = core_models.Node.objects.all()
+            for field_specifier in fields:
+                _, queryset = registry_views.apply_registry_field(field_specifier, queryset)
+            str(queryset.query)
+
+        return time.time() - start_time
+
+    def handle(self, *args, **options):
+        fields = options['fields'] or DEFAULT_FIELDS
+        requests = options['requests']
+
+        lookup.proxy_models.clear()
+        with utils.override_settings(REGISTRY_PROXY_MODEL_CACHE_SIZE=0):
+            uncached = self.run(fields, requests)
+        cached = self.run(fields, requests)
+
+        self.stdout.write("Fields: %s\n" % ', '.join(fields))
+        self.stdout.write("Without proxy model cache: %.2f ms/request\n" % (uncached * 1000.0 / requests))
+        self.stdout.write("With proxy model cache: %.2f ms/request\n" % (cached * 1000.0 / requests))
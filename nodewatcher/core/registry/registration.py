@@ -3,12 +3,15 @@ import collections
 from django import apps as django_apps
 from django.contrib.postgres.fields import JSONField
 from django.core import exceptions as django_exceptions
-from django.db import models as django_models
+from django.db import models as django_models, transaction
 
 from . import access as registry_access, lookup as registry_lookup, state as registry_state
-from . import exceptions
+from . import exceptions, signals
 from ...utils import datastructures as nw_datastructures
 
+# Resolved registry item field
+FieldResolution = collections.namedtuple('FieldResolution', ['model', 'field', 'lookup_chain', 'sensitive', 'multiple'])
+
 bases = registry_state.bases
 
 
@@ -142,6 +145,7 @@ class RegistrationPoint(object):
         self.item_object_toplevel = collections.OrderedDict()
         self.choices_registry = {}
         self.flat_lookup_proxies = {}
+        self.field_index = {}
 
         self._form_defaults = []
         self._form_processors = []
@@ -201,6 +205,7 @@ class RegistrationPoint(object):
 
         # Include registration point in item class.
         item._registry.registration_point = self
+        self.field_index.clear()
 
         return True
 
@@ -271,6 +276,7 @@ class RegistrationPoint(object):
             parent._registry.hide_requests -= 1
 
         self.item_classes.remove(item_cls)
+        self.field_index.clear()
 
     def unregister_item_by_name(self, cls_name):
         """
@@ -448,6 +454,63 @@ class RegistrationPoint(object):
 
         return self.flat_lookup_proxies.get(field_name, (None, None))
 
+    def build_field_index(self, registry_id=None):
+        """
+        Builds the field resolution index, which maps field names to registry
+        items that provide them. The index is discarded whenever items are
+        registered or unregistered.
+
+        :param registry_id: Optional registry identifier, by default the index
+          is built for all registry identifiers
+        :return: Field index for the given registry identifier (if specified)
+        """
+
+        if registry_id is None:
+            for registry_id in self.item_registry.keys():
+                self.build_field_index(registry_id)
+            return
+
+        index = {}
+        for model in self.get_classes(registry_id):
+            lookup_chain = model._registry.get_lookup_chain()
+
+            for field in model._meta.get_fields(include_hidden=True):
+                resolution = FieldResolution(
+                    model=model,
+                    field=field,
+                    lookup_chain=lookup_chain,
+                    sensitive=field.name in model._registry.sensitive_fields,
+                    multiple=model._registry.multiple,
+                )
+
+                # The first class that provides a field takes precedence.
+                index.setdefault(field.name, resolution)
+                attname = getattr(field, 'attname', None)
+                if attname is not None:
+                    index.setdefault(attname, resolution)
+
+        self.field_index[registry_id] = index
+        return index
+
+    def resolve_field(self, registry_id, field):
+        """
+        Resolves a field provided by some registry item under the specified
+        registry identifier.
+
+        :param registry_id: Registry identifier
+        :param field: Field name
+        :return: A FieldResolution instance
+        """
+
+        index = self.field_index.get(registry_id)
+        if index is None:
+            index = self.build_field_index(registry_id)
+
+        try:
+            return index[field]
+        except KeyError:
+            raise ValueError("No registry item under '%s' provides field '%s'!" % (registry_id, field))
+
     def get_model_with_field(self, registry_id, field):
         """
         Searches the class hierarchy under a specified registry identifier for a
@@ -458,17 +521,8 @@ class RegistrationPoint(object):
         :return: A tuple (model, field)
         """
 
-        # Discover which model provides the destination field.
-        for model in self.get_classes(registry_id):
-            # Attempt to fetch the field from this model.
-            try:
-                dst_field = model._meta.get_field(field)
-                # If the field exists we have found our model.
-                return (model, dst_field)
-            except django_models.FieldDoesNotExist:
-                continue
-        else:
-            raise ValueError("No registry item under '%s' provides field '%s'!" % (registry_id, field))
+        resolution = self.resolve_field(registry_id, field)
+        return (resolution.model, resolution.field)
 
     def register_choice(self, choices_id, choice):
         """
@@ -567,6 +621,16 @@ class RegistrationPoint(object):
 
         root.registry_metadata[self.namespace] = metadata
 
+    def changed(self):
+        """
+        Notifies receivers of the `point_changed` signal that registry items of
+        this registration point have been modified without sending model signals
+        (for example by bulk updates). Receivers are notified after the current
+        transaction commits.
+        """
+
+        transaction.on_commit(lambda: signals.point_changed.send(sender=self))
+
     def __repr__(self):
         return "<RegistrationPoint '%s'>" % self.name
 
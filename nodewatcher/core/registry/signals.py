@@ -0,0 +1,23 @@
+from django import apps, dispatch
+
+# Sent after a transaction, which modified registry items of a registration
+# point without sending model signals, commits. Sender is the registration point.
+point_changed = dispatch.Signal()
+
+
+def connect_subclasses(signal, receiver, model):
+    """
+    Connects a receiver to a model signal for the given model and all of its
+    subclasses. Model signals are sent with the concrete class as the sender,
+    so receivers for (abstract) registry item bases must be connected to each
+    subclass. Must be called after all models have been loaded, for example
+    from `AppConfig.ready`.
+
+    :param signal: Model signal
+    :param receiver: Receiver function
+    :param model: Model class
+    """
+
+    for candidate in apps.apps.get_models():
+        if issubclass(candidate, model):
+            signal.connect(receiver, sender=candidate)
@@ -311,6 +311,104 @@ class RegistryTestCase(django_test.TransactionTestCase):
             self.assertEqual(thing.f1.level, None)
             self.assertEqual(thing.f1.test, None)
 
+    def test_proxy_model_cache(self):
+        from .registry_tests import models
+
+        thing = models.Thing(foo='hello', bar=1)
+        thing.save()
+
+        simple = thing.first.foo.simple(create=models.SimpleRegistryItem)
+        simple.interesting = 'foo'
+        simple.save()
+
+        # Identical projections should reuse the same proxy model.
+        qs1 = models.Thing.objects.regpoint('first').registry_fields(f1='foo.simple__interesting')
+        qs2 = models.Thing.objects.regpoint('first').registry_fields(f1='foo.simple__interesting')
+        self.assertIs(qs1.model, qs2.model)
+        self.assertEqual(qs2[0].f1, 'foo')
+
+        # Chained projections must not modify the cached proxy model.
+        qs3 = qs1.registry_fields(f2='foo.simple__level')
+        self.assertIsNot(qs3.model, qs1.model)
+        self.assertEqual(qs3.model._registry_proxy_base, models.Thing)
+        self.assertEqual([field.name for field in qs1.model._meta.virtual_fields], ['f1'])
+        self.assertEqual(sorted([field.name for field in qs3.model._meta.virtual_fields]), ['f1', 'f2'])
+        self.assertEqual(qs3[0].f1, 'foo')
+
+        qs4 = models.Thing.objects.regpoint('first').registry_fields(f1='foo.simple__interesting').registry_fields(
+            f2='foo.simple__level'
+        )
+        self.assertIs(qs4.model, qs3.model)
+
+        # Arbitrary querysets cannot be cached for registry items with multiple models.
+        qs5 = models.Thing.objects.regpoint('second').registry_fields(f1=models.FirstSubRegistryItem.objects.all())
+        qs6 = models.Thing.objects.regpoint('second').registry_fields(f1=models.FirstSubRegistryItem.objects.all())
+        self.assertIsNot(qs5.model, qs6.model)
+
+        # Cache size follows settings.
+        with self.settings(REGISTRY_PROXY_MODEL_CACHE_SIZE=0):
+            qs7 = models.Thing.objects.regpoint('first').registry_fields(f1='foo.simple__level')
+            qs8 = models.Thing.objects.regpoint('first').registry_fields(f1='foo.simple__level')
+            self.assertIsNot(qs7.model, qs8.model)
+
+    def test_field_resolution(self):
+        from .registry_tests import models
+
+        point = registration.point('thing.first')
+        resolution = point.resolve_field('foo.simple', 'interesting')
+        self.assertEqual(resolution.model, models.SimpleRegistryItem)
+        self.assertEqual(resolution.field.name, 'interesting')
+        self.assertEqual(resolution.lookup_chain, models.SimpleRegistryItem._registry.get_lookup_chain())
+        self.assertTrue(resolution.sensitive)
+        self.assertFalse(resolution.multiple)
+
+        # Fields of subclasses resolve to the subclass providing them.
+        resolution = point.resolve_field('foo.simple', 'another')
+        self.assertEqual(resolution.model, models.DoubleChildRegistryItem)
+        self.assertEqual(resolution.lookup_chain, models.DoubleChildRegistryItem._registry.get_lookup_chain())
+        self.assertFalse(resolution.sensitive)
+        self.assertEqual(point.get_model_with_field('foo.simple', 'related_id')[1].name, 'related')
+
+        resolution = registration.point('thing.second').resolve_field('foo.multiple', 'bar')
+        self.assertEqual(resolution.model, models.FirstSubRegistryItem)
+        self.assertTrue(resolution.multiple)
+
+        with self.assertRaises(ValueError):
+            point.resolve_field('foo.simple', 'doesnotexist')
+        with self.assertRaises(exceptions.RegistryItemNotRegistered):
+            point.resolve_field('foo.doesnotexist', 'interesting')
+
+    def test_lookup_expression_parser(self):
+        parser = expression.LookupExpressionParser()
+
+        for specifier in ('first:foo.simple__related__name', 'foo.multiple[foo=4]__bar'):
+            info = parser.parse(specifier)
+            cached = parser.parse(specifier)
+            self.assertIsNot(info, cached)
+            self.assertEqual(info.registration_point, cached.registration_point)
+            self.assertEqual(info.registry_id, cached.registry_id)
+            self.assertEqual(info.field, cached.field)
+
+        info = parser.parse('first:foo.simple__related__name')
+        self.assertEqual(info.registration_point, 'first')
+        self.assertEqual(info.registry_id, 'foo.simple')
+        self.assertEqual(info.field, ['related', 'name'])
+        self.assertEqual(info.constraints, None)
+
+        # Modifications of parsed expressions must not affect the cache.
+        info = parser.parse('foo.simple__related')
+        info.registration_point = 'first'
+        self.assertEqual(parser.parse('foo.simple__related').registration_point, None)
+
+        with self.assertRaises(ValueError):
+            parser.parse('foo.simple[')
+
+        # Cache size follows settings.
+        with self.settings(REGISTRY_EXPRESSION_CACHE_SIZE=0):
+            expression.lookup_cache.clear()
+            parser.parse('foo.simple__interesting')
+            self.assertEqual(len(expression.lookup_cache), 0)
+
     def test_filter_expression_parser(self):
         from .registry_tests import models
 
@@ -1,30 +1,30 @@
 import datetime
 import itertools
+import json
 import operator
+import shutil
+import tempfile
 import uuid
 
 from django.contrib.auth import models as auth_models
 from django.core import urlresolvers
+from django.db import transaction
 from django.utils import timezone
 
 from guardian import shortcuts
 
-from nodewatcher.core import models as core_models
+from nodewatcher.core import models as core_models, permissions as core_permissions
+from nodewatcher.core.registry import registration
 from nodewatcher.core.registry.api import test
 from nodewatcher.core.generator.cgm import models as cgm_models
 from nodewatcher.core.monitor import models as monitor_models
 
 
-class CoreAPITest(test.RegistryAPITestCase):
-    """
-    Tests API functionality of all core models. The test assumes that all core
-    applications are included.
-    """
-
+class CoreAPITestMixin(object):
     def setUp(self):
         self.initial_time = datetime.datetime(2014, 11, 5, 1, 5, 0, tzinfo=timezone.utc)
 
-        super(CoreAPITest, self).setUp()
+        super(CoreAPITestMixin, self).setUp()
 
     def setUpNode(self, index, node):
         # General node information.
@@ -53,6 +53,13 @@ class CoreAPITest(test.RegistryAPITestCase):
             last_seen=self.initial_time + datetime.timedelta(seconds=index),
         )
 
+
+class CoreAPITest(CoreAPITestMixin, test.RegistryAPITestCase):
+    """
+    Tests API functionality of all core models. The test assumes that all core
+    applications are included.
+    """
+
     def test_api_urls(self):
         self.assertEquals(urlresolvers.reverse('apiv2:node-list'), '/api/v2/node/')
 
@@ -91,6 +98,85 @@ class CoreAPITest(test.RegistryAPITestCase):
         self.assertEquals(response.data['next'], 'http://testserver/api/v2/node/?limit=10&offset=20')
         self.assertEquals(response.data['previous'], 'http://testserver/api/v2/node/?limit=10')
 
+    def test_cursor(self):
+        response = self.get_node_list({'cursor': '', 'limit': 10})
+        self.assertEquals(len(response.data['results']), 10)
+        self.assertNotIn('count', response.data)
+
+        response = self.get_node_list({'cursor': '', 'limit': 10, 'count': 'true'})
+        self.assertEquals(response.data['count'], len(self.nodes))
+
+        # Page through all nodes using registry ordering.
+        nodes = sorted(self.nodes.values(), key=lambda node: node.monitoring.core.general().last_seen, reverse=True)
+        seen = []
+        response = self.get_node_list({'cursor': '', 'limit': 10, 'ordering': '-monitoring:core.general__last_seen'})
+        while True:
+            self.assertLessEqual(len(response.data['results']), 10)
+            seen += [item['@id'] for item in response.data['results']]
+            if response.data['next'] is None:
+                break
+
+            response = self.client.get(response.data['next'])
+            response.data = json.loads(response.content)
+
+        self.assertEquals(seen, [str(node.uuid) for node in nodes])
+
+        response = self.get_node_list({'cursor': 'invalid'})
+        self.assertEquals(response.status_code, 404)
+
+    def test_stream(self):
+        with self.settings(API_STREAM_CHUNK_SIZE=7):
+            response = self.client.get(urlresolvers.reverse('apiv2:node-list'), {
+                'format': 'json',
+                'stream': 'true',
+                'fields': 'config:core.general',
+                'ordering': 'config:core.general__name',
+            })
+            data = json.loads(''.join(response.streaming_content))
+
+        nodes = sorted(self.nodes.values(), key=lambda node: node.config.core.general().name)
+        self.assertEquals([item['@id'] for item in data['results']], [str(node.uuid) for node in nodes])
+        for item in data['results']:
+            self.assertEquals(item['config']['core.general']['name'], self.nodes[item['@id']].config.core.general().name)
+
+    def test_permission_index(self):
+        def assertIndexConsistent():
+            for user in self.users:
+                indexed = set(core_permissions.get_nodes_for_user(user).values_list('pk', flat=True))
+                direct = set(core_permissions.get_nodes_for_user(user, use_index=False).values_list('pk', flat=True))
+                self.assertEquals(indexed, direct)
+
+        assertIndexConsistent()
+        user, other_user = self.users[0], self.users[1]
+        self.assertEquals(core_permissions.get_nodes_for_user(user).count(), len(self.nodes) / len(self.users))
+
+        response = self.get_node_list({'limit': 0, 'has_permissions': user.username})
+        self.assertEquals(response.data['count'], len(self.nodes) / len(self.users))
+
+        # Removing one of the permissions keeps the node in the index.
+        node = core_permissions.get_nodes_for_user(user).first()
+        shortcuts.remove_perm('change_node', user, node)
+        self.assertIn(node, core_permissions.get_nodes_for_user(user))
+        for permission in ('delete_node', 'reset_node', 'generate_firmware'):
+            shortcuts.remove_perm(permission, user, node)
+        self.assertNotIn(node, core_permissions.get_nodes_for_user(user))
+        assertIndexConsistent()
+
+        # Group permissions apply to all group members.
+        group = auth_models.Group.objects.create(name='maintainers')
+        shortcuts.assign_perm('change_node', group, node)
+        other_user.groups.add(group)
+        self.assertIn(node, core_permissions.get_nodes_for_user(other_user))
+        group.user_set.add(user)
+        self.assertIn(node, core_permissions.get_nodes_for_user(user))
+        assertIndexConsistent()
+
+        other_user.groups.remove(group)
+        self.assertNotIn(node, core_permissions.get_nodes_for_user(other_user))
+        group.delete()
+        self.assertNotIn(node, core_permissions.get_nodes_for_user(user))
+        assertIndexConsistent()
+
     def test_projection(self):
         # Request without any projections should just return node uuids.
         self.assertResponseWithoutProjections(self.get_node_list({'limit': 0}))
@@ -356,3 +442,92 @@ class CoreAPITest(test.RegistryAPITestCase):
 
     def test_json_ld(self):
         pass
+
+
+class CoreAPICacheTest(CoreAPITestMixin, test.RegistryAPITransactionTestCase):
+    """
+    Tests caching of API responses. Cached responses are invalidated after
+    transactions commit, so these tests are run without a wrapping transaction.
+    """
+
+    def shared_cache_settings(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        return self.settings(
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'api': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir},
+            },
+            API_RESPONSE_CACHE='api',
+        )
+
+    def test_cache(self):
+        # Responses are not cached in process-local caches.
+        query = {'fields': 'config:core.general', 'format': 'json'}
+        self.assertNotIn('ETag', self.get_node_list(query))
+
+        with self.shared_cache_settings():
+            response = self.get_node_list(query)
+            etag = response['ETag']
+
+            # Repeated requests are served from cache.
+            with self.assertNumQueries(0):
+                response = self.get_node_list(query)
+            self.assertEquals(response['ETag'], etag)
+
+            response = self.client.get(urlresolvers.reverse('apiv2:node-list'), query, HTTP_IF_NONE_MATCH=etag)
+            self.assertEquals(response.status_code, 304)
+
+            # Monitoring changes do not affect the response.
+            node = self.nodes.values()[0]
+            general = node.monitoring.core.general()
+            general.last_seen = self.initial_time
+            general.save()
+            self.assertEquals(self.get_node_list(query)['ETag'], etag)
+
+            # Configuration changes invalidate the response once they are committed.
+            with transaction.atomic():
+                general = node.config.core.general()
+                general.name = 'Renamed node'
+                general.save()
+                self.assertEquals(self.get_node_list(query)['ETag'], etag)
+
+            response = self.get_node_list(query)
+            self.assertNotEquals(response['ETag'], etag)
+            names = [item['config']['core.general']['name'] for item in response.data['results']]
+            self.assertIn('Renamed node', names)
+
+            # Registry items changed without model signals invalidate the response
+            # after they are committed.
+            query = {'fields': 'monitoring:core.general', 'format': 'json'}
+            etag = self.get_node_list(query)['ETag']
+            with transaction.atomic():
+                monitor_models.GeneralMonitor.objects.filter(root=node).update(last_seen=self.initial_time - datetime.timedelta(days=1))
+                registration.point('node.monitoring').changed()
+                self.assertEquals(self.get_node_list(query)['ETag'], etag)
+
+            self.assertNotEquals(self.get_node_list(query)['ETag'], etag)
+
+    def test_cache_group_membership(self):
+        user, other_user = self.users[0], self.users[1]
+        node = core_permissions.get_nodes_for_user(user).first()
+        group = auth_models.Group.objects.create(name='maintainers')
+        shortcuts.assign_perm('change_node', group, node)
+        query = {'limit': 0, 'has_permissions': other_user.username, 'format': 'json'}
+
+        with self.shared_cache_settings():
+            count = self.get_node_list(query).data['count']
+
+            # Joining a group with object permissions invalidates the response.
+            other_user.groups.add(group)
+            self.assertEquals(self.get_node_list(query).data['count'], count + 1)
+
+            # Leaving the group invalidates the response.
+            group.user_set.remove(other_user)
+            self.assertEquals(self.get_node_list(query).data['count'], count)
+
+            # Group removal invalidates the response.
+            other_user.groups.add(group)
+            self.assertEquals(self.get_node_list(query).data['count'], count + 1)
+            group.delete()
+            self.assertEquals(self.get_node_list(query).data['count'], count)
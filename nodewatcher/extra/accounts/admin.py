@@ -9,7 +9,7 @@ from django.utils.translation import ugettext_lazy as _
 
 from guardian import shortcuts
 
-from nodewatcher.core import models as core_models
+from nodewatcher.core import models as core_models, permissions as core_permissions
 
 from . import forms, models
 
@@ -75,7 +75,7 @@ class UserAdmin(auth_admin.UserAdmin):
 
     def get_nodes(self, object_id):
         user = auth_models.User.objects.get(pk=object_id)
-        return (self.get_nodes_entry(user, node) for node in shortcuts.get_objects_for_user(user, [], core_models.Node, with_superuser=False, accept_global_perms=False))
+        return (self.get_nodes_entry(user, node) for node in core_permissions.get_nodes_for_user(user))
 
     def change_view(self, request, object_id, form_url='', extra_context=None):
         extra_context = extra_context or {}
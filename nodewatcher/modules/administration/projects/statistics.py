@@ -0,0 +1,48 @@
+from django import dispatch
+from django.db import models as django_models
+from django.db.models import signals as models_signals
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.monitor import statistics
+
+from . import models
+
+
+def project():
+    """
+    Computes global per-project statistics.
+    """
+
+    return core_models.Node.objects.regpoint('config').registry_fields(
+        project='core.project__project__name'
+    ).regpoint('monitoring').registry_filter(
+        # Ignore nodes, which haven't been seen for a long time.
+        core_general__last_seen__gt=statistics.get_window_start(),
+    ).values(
+        'project'
+    ).annotate(
+        nodes=django_models.Count('uuid')
+    )
+
+statistics.pool.register('project', project)
+
+
+@dispatch.receiver(models_signals.pre_save, sender=models.ProjectConfig)
+def project_pre_save(sender, instance, **kwargs):
+    """
+    Remembers the previous project, so that statistics can be adjusted.
+    """
+
+    instance._statistics_previous_project = None
+    if instance.pk is not None:
+        instance._statistics_previous_project = sender.objects.filter(pk=instance.pk).values_list('project__name', flat=True).first()
+
+
+@dispatch.receiver(models_signals.post_save, sender=models.ProjectConfig)
+def project_post_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_statistics_previous_project', None)
+    current = instance.project.name if instance.project_id is not None else None
+    if previous == current or not statistics.is_counted(instance.root):
+        return
+
+    statistics.pool.adjust('project', previous, current)
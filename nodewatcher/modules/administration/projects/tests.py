@@ -1,3 +1,9 @@
+import datetime
+
+from django.core import urlresolvers
+from django.utils import timezone
+
+from nodewatcher.core.monitor import models as monitor_models, statistics
 from nodewatcher.core.registry.api import test
 
 from . import models
@@ -64,3 +70,23 @@ class ProjectAPITest(test.RegistryAPITestCase):
 
             node = self.nodes[item['@id']]
             self.assertEquals(item['config']['core.project']['project']['name'], node.config.core.project().project.name)
+
+    def test_statistics(self):
+        # Nodes of the last project have not been seen inside the statistics window.
+        for node in self.nodes.values():
+            last_seen = timezone.now()
+            if node.config.core.project().project == self.projects[-1]:
+                last_seen -= statistics.WINDOW + datetime.timedelta(days=1)
+
+            node.monitoring.core.general(
+                create=monitor_models.GeneralMonitor,
+                first_seen=last_seen,
+                last_seen=last_seen,
+            ).save()
+
+        statistics.pool.reconcile('project')
+        response = self.client.get(urlresolvers.reverse('apiv2:statistics-project-list'), {'format': 'json'})
+        self.assertEquals(response.data['results'], [
+            {'project': self.projects[0].name, 'nodes': len(self.nodes) / len(self.projects)},
+            {'project': self.projects[1].name, 'nodes': len(self.nodes) / len(self.projects)},
+        ])
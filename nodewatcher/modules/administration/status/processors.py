@@ -1,12 +1,17 @@
 import datetime
 
+from django.db import connection
 from django.utils import timezone
 
 from nodewatcher.core import models as core_models
-from nodewatcher.core.monitor import processors as monitor_processors
+from nodewatcher.core.monitor import processors as monitor_processors, statistics
+from nodewatcher.core.registry import registration
 
 from . import models, events
 
+# Number of nodes fetched at once when emitting status change events
+EVENT_BATCH_SIZE = 1000
+
 
 class NodeStatus(monitor_processors.NodeProcessor):
     """
@@ -54,13 +59,66 @@ class NodeStatus(monitor_processors.NodeProcessor):
         sm.health = None
         sm.save()
 
-        # Emit event on node state transitions.
+        # Emit event and update statistics on node state transitions.
         if prev_network != sm.network:
             events.NodeStatusChange(node, prev_network, sm.network).post()
+            if statistics.is_counted(node):
+                statistics.pool.adjust('status', prev_network, sm.network)
 
         return context
 
 
+def transition_stale_push_nodes(last_seen_before):
+    """
+    Marks push nodes, which are up but haven't been seen since the given time,
+    as down. Status is updated using a single statement.
+
+    :param last_seen_before: Nodes last seen before this time are stale
+    :return: A list of (primary key, last seen) tuples of nodes that have gone down
+    """
+
+    point = registration.point('node.monitoring')
+    status_field = point.get_model_with_field('core.status', 'network')[1]
+    last_seen_field = point.get_model_with_field('core.general', 'last_seen')[1]
+    source_field = registration.point('node.config').get_model_with_field('core.telemetry.http', 'source')[1]
+
+    def table(field):
+        return connection.ops.quote_name(field.model._meta.db_table)
+
+    def root(field):
+        return connection.ops.quote_name(field.model._meta.get_field('root').column)
+
+    def column(field):
+        return connection.ops.quote_name(field.column)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE {status_table} AS s SET {network} = %s
+            FROM {general_table} AS g, {source_table} AS t
+            WHERE g.{general_root} = s.{status_root}
+              AND t.{source_root} = s.{status_root}
+              AND g.{last_seen} < %s
+              AND t.{source} = %s
+              AND s.{network} = %s
+            RETURNING s.{status_root}, g.{last_seen}
+            """.format(
+                status_table=table(status_field),
+                status_root=root(status_field),
+                network=column(status_field),
+                general_table=table(last_seen_field),
+                general_root=root(last_seen_field),
+                last_seen=column(last_seen_field),
+                source_table=table(source_field),
+                source_root=root(source_field),
+                source=column(source_field),
+            ),
+            ['down', last_seen_before, 'push', 'up']
+        )
+
+        return cursor.fetchall()
+
+
 class PushNodeStatus(monitor_processors.NetworkProcessor):
     """
     A processor which updates status for nodes that push data.
@@ -76,19 +134,17 @@ class PushNodeStatus(monitor_processors.NetworkProcessor):
         :return: A (possibly) modified context and a (possibly) modified set of nodes
         """
 
-        # Get all push nodes which should be down.
-        down_nodes = core_models.Node.objects.regpoint('config').registry_fields(
-            source='core.telemetry.http__source'
-        ).regpoint('monitoring').registry_fields(
-            last_seen='core.general__last_seen',
-            network_status='core.status__network',
-        ).filter(
-            source='push',
-            last_seen__lt=timezone.now() - datetime.timedelta(minutes=30),
-            network_status='up',
-        )
-
-        # Update node status.
-        models.StatusMonitor.objects.filter(root__in=down_nodes).update(network='down')
+        # Mark all push nodes which should be down.
+        down_nodes = transition_stale_push_nodes(timezone.now() - datetime.timedelta(minutes=30))
+        window_start = statistics.get_window_start()
+        statistics.pool.adjust('status', 'up', 'down', len([1 for _, last_seen in down_nodes if last_seen > window_start]))
+        down_nodes = [node_id for node_id, _ in down_nodes]
+        if down_nodes:
+            registration.point('node.monitoring').changed()
+
+        # Emit events for all nodes that have gone down.
+        for offset in xrange(0, len(down_nodes), EVENT_BATCH_SIZE):
+            for node in core_models.Node.objects.filter(pk__in=down_nodes[offset:offset + EVENT_BATCH_SIZE]):
+                events.NodeStatusChange(node, 'up', 'down').post()
 
         return context, nodes
@@ -9,6 +9,7 @@ class StatusStatisticsSerializer(serializers.Serializer):
     """
 
     status = registry_serializers.RegisteredChoiceSerializer(
+        source='key',
         regpoint='node.monitoring',
         choices='core.status#network'
     )
@@ -0,0 +1,23 @@
+from django.db import models as django_models
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.monitor import statistics
+
+
+def network_status():
+    """
+    Computes global per-status statistics.
+    """
+
+    return core_models.Node.objects.regpoint('monitoring').registry_fields(
+        status='core.status__network'
+    ).regpoint('monitoring').registry_filter(
+        # Ignore nodes, which haven't been seen for a long time.
+        core_general__last_seen__gt=statistics.get_window_start(),
+    ).values(
+        'status'
+    ).annotate(
+        nodes=django_models.Count('uuid')
+    )
+
+statistics.pool.register('status', network_status)
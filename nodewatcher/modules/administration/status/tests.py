@@ -0,0 +1,89 @@
+import datetime
+import json
+
+from django import test as django_test
+from django.core import urlresolvers
+from django.utils import timezone
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.events import base as events_base, pool as events_pool
+from nodewatcher.core.monitor import models as monitor_models, processors as monitor_processors, statistics
+from nodewatcher.modules.monitor.sources.http import models as http_models
+
+from . import events, models, processors
+
+
+class StatusChangeSink(events_base.EventSink):
+    def __init__(self, **kwargs):
+        super(StatusChangeSink, self).__init__(**kwargs)
+        self.events = []
+
+    def accepts(self, event_class):
+        return issubclass(event_class, events.NodeStatusChange)
+
+    def deliver(self, event):
+        self.events.append(event)
+
+
+class PushNodeStatusTestCase(django_test.TransactionTestCase):
+    def setUp(self):
+        events_pool.pool.register_sink(StatusChangeSink)
+        self.addCleanup(events_pool.pool.unregister_sink, StatusChangeSink)
+
+        now = timezone.now()
+        stale = now - datetime.timedelta(hours=1)
+        self.stale_push = self.create_node('push', 'up', stale)
+        self.recent_push = self.create_node('push', 'up', now - datetime.timedelta(minutes=5))
+        self.stale_poll = self.create_node('poll', 'up', stale)
+        self.visible_push = self.create_node('push', 'visible', stale)
+        # This node is outside the statistics window.
+        self.old_push = self.create_node('push', 'up', now - statistics.WINDOW - datetime.timedelta(days=1))
+
+    def create_node(self, source, network, last_seen):
+        node = core_models.Node()
+        node.save()
+        node.config.core.telemetry.http(create=http_models.HttpTelemetrySourceConfig, source=source).save()
+        node.monitoring.core.general(create=monitor_models.GeneralMonitor, first_seen=last_seen, last_seen=last_seen).save()
+        node.monitoring.core.status(create=models.StatusMonitor, network=network).save()
+        return node
+
+    def get_network_status(self, node):
+        return models.StatusMonitor.objects.get(root=node).network
+
+    def get_counters(self):
+        return dict(monitor_models.NodeStatistic.objects.filter(dimension='status', nodes__gt=0).values_list('value', 'nodes'))
+
+    def test_transition_stale_push_nodes(self):
+        statistics.pool.reconcile('status')
+        self.assertEqual(self.get_counters(), {'up': 3, 'visible': 1})
+
+        processors.PushNodeStatus().process(monitor_processors.ProcessorContext(), set())
+
+        # Only stale push nodes, which were up, go down.
+        self.assertEqual(self.get_network_status(self.stale_push), 'down')
+        self.assertEqual(self.get_network_status(self.old_push), 'down')
+        self.assertEqual(self.get_network_status(self.recent_push), 'up')
+        self.assertEqual(self.get_network_status(self.stale_poll), 'up')
+        self.assertEqual(self.get_network_status(self.visible_push), 'visible')
+
+        # Events are emitted for all nodes that have gone down.
+        sink = events_pool.pool.get_sink('StatusChangeSink')
+        self.assertItemsEqual([event.related_nodes[0].pk for event in sink.events], [self.stale_push.pk, self.old_push.pk])
+        for event in sink.events:
+            self.assertEqual((event.old_status, event.new_status), ('up', 'down'))
+
+        # Only nodes inside the statistics window are moved between counters.
+        self.assertEqual(self.get_counters(), {'up': 2, 'down': 1, 'visible': 1})
+        statistics.pool.reconcile('status')
+        self.assertEqual(self.get_counters(), {'up': 2, 'down': 1, 'visible': 1})
+
+        # Nodes which have already gone down are not transitioned again.
+        processors.PushNodeStatus().process(monitor_processors.ProcessorContext(), set())
+        self.assertEqual(len(sink.events), 2)
+        self.assertEqual(self.get_counters(), {'up': 2, 'down': 1, 'visible': 1})
+
+        response = self.client.get(urlresolvers.reverse('apiv2:statistics-status-list'), {'format': 'json'})
+        self.assertEqual(
+            [(item['status']['name'], item['nodes']) for item in json.loads(response.content)['results']],
+            [('down', 1), ('up', 2), ('visible', 1)]
+        )
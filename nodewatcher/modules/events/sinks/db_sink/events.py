@@ -1,15 +1,58 @@
-from django.db import transaction
+import collections
+
+from django.contrib.postgres.fields import JSONField
+from django.db import models as models_db, transaction
+from django.utils import timezone
 
 from nodewatcher.core.events import base, pool, declarative
 
 from . import models
 
 
+def _serialize_record(event):
+    """
+    Returns the event record without fields that are stored in separate
+    database columns.
+
+    :param event: Event record
+    """
+
+    record = event.record.copy()
+    del record['timestamp']
+    del record['severity']
+    del record['source_name']
+    del record['source_type']
+    del record['related_nodes']
+    del record['related_users']
+    return record
+
+
 class DatabaseEventSink(base.EventSink):
     """
-    An event sink that stores events into the database.
+    An event sink that stores events into the database. While the pool is
+    buffering, events are collected and inserted in bulk.
     """
 
+    def __init__(self, buffer_size=500, **kwargs):
+        """
+        Class constructor.
+
+        :param buffer_size: Maximum number of buffered events
+        """
+
+        super(DatabaseEventSink, self).__init__(**kwargs)
+
+        self.buffer_size = buffer_size
+        self._buffer = []
+
+    def accepts(self, event_class):
+        """
+        Only node events, which are not warnings, are stored by this sink.
+        """
+
+        return issubclass(event_class, declarative.NodeEventRecord) and \
+            not issubclass(event_class, declarative.NodeWarningRecord)
+
     def deliver(self, event):
         """
         Persists the received event into the database.
@@ -20,38 +63,85 @@ class DatabaseEventSink(base.EventSink):
         elif isinstance(event, declarative.NodeWarningRecord):
             return
 
+        self._buffer.append(event)
+        if not pool.is_buffering() or len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Persists all buffered events into the database.
+        """
+
+        events, self._buffer = self._buffer, []
+        if not events:
+            return
+
         with transaction.atomic():
-            mdl = models.SerializedNodeEvent()
-            mdl.timestamp = event.timestamp
-            mdl.severity = event.severity
-            mdl.source_name = event.source_name
-            mdl.source_type = event.source_type
-
-            # Remove fields that are already in the database
-            record = event.record.copy()
-            del record['timestamp']
-            del record['severity']
-            del record['source_name']
-            del record['source_type']
-            del record['related_nodes']
-            del record['related_users']
-            mdl.record = record
-
-            mdl.save()
-            # Add related nodes
-            mdl.related_nodes.add(*event.related_nodes)
-            # Add related users
-            if event.related_users is not None:
-                mdl.related_users.add(*event.related_users)
+            instances = []
+            for event in events:
+                mdl = models.SerializedNodeEvent()
+                mdl.timestamp = event.timestamp
+                mdl.severity = event.severity
+                mdl.source_name = event.source_name
+                mdl.source_type = event.source_type
+
+                mdl.record = _serialize_record(event)
+
+                instances.append(mdl)
+
+            # PostgreSQL returns primary keys of bulk inserted rows.
+            instances = models.SerializedNodeEvent.objects.bulk_create(instances)
+
+            related_nodes = []
+            related_users = []
+            NodeRelation = models.SerializedNodeEvent.related_nodes.through
+            UserRelation = models.SerializedNodeEvent.related_users.through
+            for mdl, event in zip(instances, events):
+                # Add related nodes
+                for node_id in set([node.pk for node in event.related_nodes if node is not None]):
+                    related_nodes.append(NodeRelation(serializednodeevent_id=mdl.pk, node_id=node_id))
+
+                # Add related users
+                if event.related_users is not None:
+                    for user_id in set([user.pk for user in event.related_users]):
+                        related_users.append(UserRelation(serializednodeevent_id=mdl.pk, user_id=user_id))
+
+            NodeRelation.objects.bulk_create(related_nodes)
+            UserRelation.objects.bulk_create(related_users)
+
+    def discard(self):
+        """
+        Discards all buffered events.
+        """
+
+        self._buffer = []
 
 pool.register_sink(DatabaseEventSink)
 
 
 class DatabaseWarningSink(base.EventSink):
     """
-    An event sink that stores warnings into the database.
+    An event sink that stores warnings into the database. While the pool is
+    buffering, all warnings asserted (or asserted absent) are collected and then
+    reconciled against the stored warnings at once.
     """
 
+    def __init__(self, **kwargs):
+        """
+        Class constructor.
+        """
+
+        super(DatabaseWarningSink, self).__init__(**kwargs)
+
+        self._buffer = collections.OrderedDict()
+
+    def accepts(self, event_class):
+        """
+        Only node warnings are stored by this sink.
+        """
+
+        return issubclass(event_class, declarative.NodeWarningRecord)
+
     def deliver(self, event):
         """
         Persists the received warning into the database.
@@ -60,34 +150,85 @@ class DatabaseWarningSink(base.EventSink):
         if not isinstance(event, declarative.NodeWarningRecord):
             return
 
+        # Only the last assertion of a specific warning matters.
+        primary_key = event.get_primary_key()
+        self._buffer.pop(primary_key, None)
+        self._buffer[primary_key] = event
+
+        if not pool.is_buffering():
+            self.flush()
+
+    def flush(self):
+        """
+        Reconciles buffered warnings with the warnings stored in the database.
+        """
+
+        warnings, self._buffer = self._buffer, collections.OrderedDict()
+        if not warnings:
+            return
+
         with transaction.atomic():
-            if event.is_absent():
-                # This is actually a complementary event, signalling the absence of a warning.
-                models.SerializedNodeWarning.objects.filter(pk=event.get_primary_key()).delete()
-            else:
-                mdl, created = models.SerializedNodeWarning.objects.get_or_create(
-                    pk=event.get_primary_key(),
-                    defaults={
-                        'severity': event.severity,
-                        'source_name': event.source_name,
-                        'source_type': event.source_type,
-                    }
-                )
-
-                if created:
-                    # Add related nodes.
-                    mdl.related_nodes.add(*event.related_nodes)
-
-                # Remove fields that are already in the database.
-                record = event.record.copy()
-                del record['timestamp']
-                del record['severity']
-                del record['source_name']
-                del record['source_type']
-                del record['related_nodes']
-                del record['related_users']
-                mdl.record = record
-
-                mdl.save()
+            stored = dict(models.SerializedNodeWarning.objects.filter(pk__in=warnings.keys()).values_list('pk', 'record'))
+
+            removed = []
+            created = []
+            updated = []
+            changed = {}
+            for primary_key, event in warnings.iteritems():
+                if event.is_absent():
+                    # This is actually a complementary event, signalling the absence of a warning.
+                    if primary_key in stored:
+                        removed.append(primary_key)
+                    continue
+
+                record = _serialize_record(event)
+                if primary_key not in stored:
+                    created.append((event, models.SerializedNodeWarning(
+                        pk=primary_key,
+                        severity=event.severity,
+                        source_name=event.source_name,
+                        source_type=event.source_type,
+                        record=record,
+                    )))
+                    continue
+
+                updated.append(primary_key)
+                if stored[primary_key] != record:
+                    changed[primary_key] = record
+
+            if removed:
+                models.SerializedNodeWarning.objects.filter(pk__in=removed).delete()
+
+            if updated:
+                fields = {'last_seen': timezone.now()}
+                if changed:
+                    fields['record'] = models_db.Case(
+                        *[
+                            models_db.When(pk=primary_key, then=models_db.Value(record, output_field=JSONField()))
+                            for primary_key, record in changed.iteritems()
+                        ],
+                        default=models_db.F('record'),
+                        output_field=JSONField()
+                    )
+
+                models.SerializedNodeWarning.objects.filter(pk__in=updated).update(**fields)
+
+            if created:
+                models.SerializedNodeWarning.objects.bulk_create([mdl for _, mdl in created])
+
+                # Add related nodes.
+                NodeRelation = models.SerializedNodeWarning.related_nodes.through
+                NodeRelation.objects.bulk_create([
+                    NodeRelation(serializednodewarning_id=mdl.pk, node_id=node_id)
+                    for event, mdl in created
+                    for node_id in set([node.pk for node in event.related_nodes if node is not None])
+                ])
+
+    def discard(self):
+        """
+        Discards all buffered warnings.
+        """
+
+        self._buffer = collections.OrderedDict()
 
 pool.register_sink(DatabaseWarningSink)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events_sinks_database', '0003_json_field'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='serializednodeevent',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='serializednodeevent',
+            index_together=set([('severity', 'timestamp')]),
+        ),
+        migrations.AlterField(
+            model_name='serializednodewarning',
+            name='last_seen',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='serializednodewarning',
+            index_together=set([('severity', 'last_seen')]),
+        ),
+    ]
@@ -40,10 +40,15 @@ class SerializedNodeEvent(SerializedEvent):
     A serialized version of node events.
     """
 
-    timestamp = models.DateTimeField()
+    timestamp = models.DateTimeField(db_index=True)
     related_nodes = models.ManyToManyField(core_models.Node, related_name='events')
     related_users = models.ManyToManyField(auth_models.User, related_name='events')
 
+    class Meta:
+        index_together = [
+            ('severity', 'timestamp'),
+        ]
+
 
 class SerializedNodeWarning(SerializedEvent):
     """
@@ -52,5 +57,10 @@ class SerializedNodeWarning(SerializedEvent):
 
     uuid = models.UUIDField(primary_key=True)
     first_seen = models.DateTimeField(auto_now_add=True)
-    last_seen = models.DateTimeField(auto_now=True)
+    last_seen = models.DateTimeField(auto_now=True, db_index=True)
     related_nodes = models.ManyToManyField(core_models.Node, related_name='warnings')
+
+    class Meta:
+        index_together = [
+            ('severity', 'last_seen'),
+        ]
@@ -0,0 +1,63 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from nodewatcher import celery
+
+from . import models
+
+# Register the periodic schedule.
+celery.app.conf.CELERYBEAT_SCHEDULE['nodewatcher.modules.events.sinks.db_sink.tasks.cleanup'] = {
+    'task': 'nodewatcher.modules.events.sinks.db_sink.tasks.cleanup',
+    'schedule': datetime.timedelta(hours=6),
+}
+
+
+def delete_in_chunks(queryset, chunk_size):
+    """
+    Deletes all objects matching a queryset in bounded chunks, so that no single
+    delete holds locks on a large number of rows.
+
+    :param queryset: Queryset of objects to delete
+    :param chunk_size: Maximum number of objects deleted at once
+    :return: Number of deleted objects
+    """
+
+    deleted = 0
+    while True:
+        chunk = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not chunk:
+            break
+
+        queryset.model.objects.filter(pk__in=chunk).delete()
+        deleted += len(chunk)
+
+    return deleted
+
+
+@celery.app.task(queue='monitor', bind=True)
+def cleanup(self):
+    """
+    Cleanup old events and stale warnings.
+    """
+
+    chunk_size = getattr(settings, 'EVENTS_DATABASE_CLEANUP_CHUNK_SIZE', 1000)
+
+    retention = getattr(settings, 'EVENTS_DATABASE_RETENTION', None)
+    if retention is not None:
+        delete_in_chunks(
+            models.SerializedNodeEvent.objects.filter(
+                timestamp__lt=timezone.now() - datetime.timedelta(days=retention)
+            ).order_by('timestamp'),
+            chunk_size,
+        )
+
+    retention = getattr(settings, 'EVENTS_DATABASE_WARNING_RETENTION', None)
+    if retention is not None:
+        delete_in_chunks(
+            models.SerializedNodeWarning.objects.filter(
+                last_seen__lt=timezone.now() - datetime.timedelta(days=retention)
+            ).order_by('last_seen'),
+            chunk_size,
+        )
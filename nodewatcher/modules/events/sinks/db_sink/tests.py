@@ -0,0 +1,157 @@
+import datetime
+import uuid
+
+from django import test as django_test
+from django.utils import timezone
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.events import declarative, pool
+
+from . import events, models, tasks
+
+
+class TestWarning(declarative.NodeWarningRecord):
+    interface = declarative.CharAttribute(primary_key=True)
+    details = declarative.CharAttribute()
+
+    description = "Test warning on %(interface)s."
+
+    def __init__(self, node, interface, details=None):
+        super(TestWarning, self).__init__(
+            [node],
+            declarative.NodeWarningRecord.SEVERITY_WARNING,
+            interface=interface,
+            details=details,
+        )
+
+
+class DatabaseWarningSinkTestCase(django_test.TestCase):
+    def setUp(self):
+        self.sink = events.DatabaseWarningSink()
+        self.node = core_models.Node()
+        self.node.save()
+
+    def deliver(self, *warnings):
+        # Warnings are reconciled at once when delivered in a buffered block.
+        with pool.buffered():
+            for warning in warnings:
+                self.sink.deliver(warning)
+        self.sink.flush()
+
+    def get_warnings(self):
+        return {
+            warning.pk: warning.record
+            for warning in models.SerializedNodeWarning.objects.all()
+        }
+
+    def test_created(self):
+        warning = TestWarning(self.node, 'wlan0', 'details')
+        self.deliver(warning, TestWarning(self.node, 'wlan1'))
+
+        self.assertItemsEqual(self.get_warnings().keys(), [warning.get_primary_key(), TestWarning(self.node, 'wlan1').get_primary_key()])
+        stored = models.SerializedNodeWarning.objects.get(pk=warning.get_primary_key())
+        self.assertEqual(stored.severity, declarative.NodeWarningRecord.SEVERITY_WARNING)
+        self.assertEqual(stored.source_name, TestWarning.source_name)
+        self.assertEqual(stored.source_type, TestWarning.source_type)
+        self.assertEqual(stored.record, {'interface': 'wlan0', 'details': 'details'})
+        self.assertEqual(list(stored.related_nodes.all()), [self.node])
+
+    def test_updated(self):
+        warning = TestWarning(self.node, 'wlan0', 'details')
+        self.deliver(warning)
+        last_seen = timezone.now() - datetime.timedelta(days=1)
+        models.SerializedNodeWarning.objects.update(last_seen=last_seen)
+
+        # Unchanged warnings are only marked as seen.
+        self.deliver(TestWarning(self.node, 'wlan0', 'details'))
+        stored = models.SerializedNodeWarning.objects.get()
+        self.assertGreater(stored.last_seen, last_seen)
+        self.assertEqual(stored.record, {'interface': 'wlan0', 'details': 'details'})
+
+        # Changed records are updated, while other warnings are kept.
+        other = TestWarning(self.node, 'wlan1', 'other details')
+        self.deliver(other)
+        self.deliver(TestWarning(self.node, 'wlan0', 'new details'), TestWarning(self.node, 'wlan1', 'other details'))
+        self.assertEqual(self.get_warnings(), {
+            warning.get_primary_key(): {'interface': 'wlan0', 'details': 'new details'},
+            other.get_primary_key(): {'interface': 'wlan1', 'details': 'other details'},
+        })
+
+    def test_absent(self):
+        warning = TestWarning(self.node, 'wlan0')
+        other = TestWarning(self.node, 'wlan1')
+        self.deliver(warning, other)
+
+        # Absent warnings are removed.
+        self.deliver(~TestWarning(self.node, 'wlan0'))
+        self.assertEqual(self.get_warnings().keys(), [other.get_primary_key()])
+
+        # Absence of warnings that are not stored is ignored.
+        self.deliver(~TestWarning(self.node, 'wlan2'))
+        self.assertEqual(self.get_warnings().keys(), [other.get_primary_key()])
+
+    def test_withdrawn(self):
+        # Only the last assertion inside a buffered block matters.
+        self.deliver(TestWarning(self.node, 'wlan0'), ~TestWarning(self.node, 'wlan0'))
+        self.assertEqual(self.get_warnings(), {})
+
+        warning = TestWarning(self.node, 'wlan0')
+        self.deliver(warning)
+        self.deliver(TestWarning(self.node, 'wlan0', 'new details'), ~TestWarning(self.node, 'wlan0'))
+        self.assertEqual(self.get_warnings(), {})
+
+        self.deliver(~warning, warning)
+        self.assertEqual(self.get_warnings().keys(), [warning.get_primary_key()])
+
+
+class CleanupTestCase(django_test.TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for days in (1, 10, 100, 400, 500):
+            models.SerializedNodeEvent.objects.create(
+                timestamp=now - datetime.timedelta(days=days),
+                severity=0,
+                source_name='test',
+                source_type='event',
+                record={},
+            )
+
+            warning = models.SerializedNodeWarning.objects.create(
+                uuid=uuid.uuid4(),
+                severity=0,
+                source_name='test',
+                source_type='warning',
+                record={},
+            )
+            # Last seen is updated automatically on save.
+            models.SerializedNodeWarning.objects.filter(pk=warning.pk).update(last_seen=now - datetime.timedelta(days=days))
+
+    def get_event_ages(self):
+        now = timezone.now()
+        return sorted((now - timestamp).days for timestamp in models.SerializedNodeEvent.objects.values_list('timestamp', flat=True))
+
+    def get_warning_ages(self):
+        now = timezone.now()
+        return sorted((now - last_seen).days for last_seen in models.SerializedNodeWarning.objects.values_list('last_seen', flat=True))
+
+    def test_delete_in_chunks(self):
+        queryset = models.SerializedNodeEvent.objects.filter(timestamp__lt=timezone.now() - datetime.timedelta(days=5))
+        self.assertEqual(tasks.delete_in_chunks(queryset.order_by('timestamp'), 3), 4)
+
+        self.assertEqual(self.get_event_ages(), [1])
+        self.assertEqual(tasks.delete_in_chunks(queryset, 2), 0)
+
+    def test_cleanup_disabled(self):
+        # Nothing is removed unless retention is configured.
+        with self.settings(EVENTS_DATABASE_RETENTION=None, EVENTS_DATABASE_WARNING_RETENTION=None):
+            tasks.cleanup()
+
+        self.assertEqual(self.get_event_ages(), [1, 10, 100, 400, 500])
+        self.assertEqual(self.get_warning_ages(), [1, 10, 100, 400, 500])
+
+    def test_cleanup(self):
+        with self.settings(EVENTS_DATABASE_RETENTION=365, EVENTS_DATABASE_WARNING_RETENTION=30, EVENTS_DATABASE_CLEANUP_CHUNK_SIZE=1):
+            tasks.cleanup()
+
+        self.assertEqual(self.get_event_ages(), [1, 10, 100])
+        self.assertEqual(self.get_warning_ages(), [1, 10])
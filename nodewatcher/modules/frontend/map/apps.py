@@ -1,6 +1,21 @@
 from django import apps
+from django.db.models import signals as models_signals
 
 
 class MapConfig(apps.AppConfig):
     name = 'nodewatcher.modules.frontend.map'
     label = 'frontend_map'
+
+    def ready(self):
+        super(MapConfig, self).ready()
+
+        from nodewatcher.core import models as core_models
+        from nodewatcher.core.registry import signals as registry_signals
+        from nodewatcher.modules.administration.types import models as types_models
+
+        from . import models
+
+        # Invalidate tiles when marker properties change.
+        for model in (core_models.GeneralConfig, types_models.TypeConfig):
+            registry_signals.connect_subclasses(models_signals.post_save, models.marker_properties_changed, model)
+            registry_signals.connect_subclasses(models_signals.post_delete, models.marker_properties_changed, model)
@@ -0,0 +1,60 @@
+from django.db import transaction
+
+from nodewatcher.core.events import base, pool
+from nodewatcher.modules.administration.status import events as status_events
+
+from . import tiles
+
+
+class MapTileSink(base.EventSink):
+    """
+    An event sink that invalidates cached map tiles of nodes which have changed
+    status. While the pool is buffering, nodes are collected and their tiles are
+    invalidated at once.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Class constructor.
+        """
+
+        super(MapTileSink, self).__init__(**kwargs)
+
+        self._nodes = set()
+
+    def accepts(self, event_class):
+        """
+        Only node status changes affect map tiles.
+        """
+
+        return issubclass(event_class, status_events.NodeStatusChange)
+
+    def deliver(self, event):
+        """
+        Records nodes whose tiles need to be invalidated.
+        """
+
+        self._nodes.update(node.pk for node in event.related_nodes if node is not None)
+        if not pool.is_buffering():
+            self.flush()
+
+    def flush(self):
+        """
+        Invalidates tiles of all recorded nodes once the current transaction
+        commits.
+        """
+
+        nodes, self._nodes = self._nodes, set()
+        if not nodes:
+            return
+
+        transaction.on_commit(lambda: tiles.cache.invalidate_nodes(nodes))
+
+    def discard(self):
+        """
+        Discards all recorded nodes.
+        """
+
+        self._nodes = set()
+
+pool.register_sink(MapTileSink)
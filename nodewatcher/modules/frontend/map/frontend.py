@@ -1,9 +1,13 @@
+from django.conf import urls
 from django.core import urlresolvers
 
+from nodewatcher.core.api import urls as api_urls
 from nodewatcher.core.frontend import components
 
 from . import views
 
+api_urls.v2_api.register('map/node', views.MapNodeViewSet, base_name='map-node')
+
 
 class MapComponent(components.FrontendComponent):
     @classmethod
@@ -14,6 +18,12 @@ class MapComponent(components.FrontendComponent):
             'name': 'map',
         }
 
+    @classmethod
+    def get_urls(cls):
+        return super(MapComponent, cls).get_urls() + [
+            urls.url(r'^map/tiles/(?P<zoom>\d+)/(?P<x>\d+)/(?P<y>\d+)\.json$', views.MapTile.as_view(), name='tile'),
+        ]
+
 components.pool.register(MapComponent)
 
 
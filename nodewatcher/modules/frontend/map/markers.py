@@ -0,0 +1,28 @@
+from nodewatcher.core import models as core_models
+
+
+def get_queryset():
+    """
+    Returns a queryset of nodes with all fields needed for map markers.
+    """
+
+    return core_models.Node.objects.regpoint('config').registry_fields(
+        name='core.general__name',
+        type='core.type__type',
+        location='core.location__geolocation',
+    ).regpoint('monitoring').registry_fields(
+        status='core.status__network',
+        last_seen='core.general__last_seen',
+    )
+
+
+def get_rows(queryset, columns):
+    """
+    Fetches flat rows instead of model instances.
+
+    :param queryset: Queryset returned by `get_queryset`
+    :param columns: A list of column names
+    :return: An iterable of value tuples
+    """
+
+    return queryset.raw_order_by().values_list(*[queryset.registry_expand_proxy_field(column) for column in columns])
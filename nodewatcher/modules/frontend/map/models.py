@@ -0,0 +1,45 @@
+from django import dispatch
+from django.db import transaction
+from django.db.models import signals as django_signals
+
+from nodewatcher.modules.administration.location import models as location_models
+
+from . import tiles
+
+
+@dispatch.receiver(django_signals.pre_save, sender=location_models.LocationConfig)
+def location_pre_save(sender, instance, **kwargs):
+    """
+    Remembers the previous node location, so that tiles at both locations can
+    be invalidated.
+    """
+
+    instance._map_previous_geolocation = None
+    if instance.pk is not None:
+        instance._map_previous_geolocation = sender.objects.filter(pk=instance.pk).values_list('geolocation', flat=True).first()
+
+
+@dispatch.receiver(django_signals.post_save, sender=location_models.LocationConfig)
+def location_post_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_map_previous_geolocation', None)
+    if previous == instance.geolocation:
+        return
+
+    locations = [previous, instance.geolocation]
+    transaction.on_commit(lambda: tiles.cache.invalidate(locations))
+
+
+@dispatch.receiver(django_signals.post_delete, sender=location_models.LocationConfig)
+def location_post_delete(sender, instance, **kwargs):
+    locations = [instance.geolocation]
+    transaction.on_commit(lambda: tiles.cache.invalidate(locations))
+
+
+def marker_properties_changed(sender, instance, **kwargs):
+    """
+    Invalidates tiles containing a node when its name or type changes, as
+    these are included in tiles.
+    """
+
+    node_ids = [instance.root_id]
+    transaction.on_commit(lambda: tiles.cache.invalidate_nodes(node_ids))
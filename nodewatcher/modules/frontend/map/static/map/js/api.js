@@ -16,29 +16,115 @@
         linkExtenders.push(extender);
     };
 
-    $.nodewatcher.map.extend = function(map, nodes, links) {
+    $.nodewatcher.map.createNodeMarker = function(node) {
         $.each(nodeExtenders, function(index, extender) {
-            $.each(nodes, function(nodeIndex, node) {
-                node.marker = extender(node);
-            });
+            node.marker = extender(node);
         });
 
-        var cluster = new L.MarkerClusterGroup({spiderfyDistanceMultiplier: 3, maxClusterRadius: 20,
-            disableClusteringAtZoom: 13});
+        return node.marker;
+    };
+
+    $.nodewatcher.map.createClusterMarker = function(map, latlng, count) {
+        var size = count < 10 ? 'small' : (count < 100 ? 'medium' : 'large');
+        var icon = L.divIcon({
+            'html': '<div><span>' + count + '</span></div>',
+            'className': 'map-cluster map-cluster-' + size,
+            'iconSize': L.point(40, 40),
+        });
 
-        $.each(nodes, function(index, node) {
-            if (node.marker)
-                cluster.addLayer(node.marker);
+        //Zoom in on the cluster when it is selected
+        return L.marker(latlng, {'icon': icon}).on('click', function() {
+            map.setView(latlng, map.getZoom() + 2);
         });
+    };
+
+    //Layer which displays markers from server-side clustered GeoJSON tiles, so that only
+    //markers inside visible tiles are loaded and rendered. The URL template may contain
+    //{zoom}, {x} and {y} placeholders.
+    $.nodewatcher.map.NodeTileLayer = L.GridLayer.extend({
+        initialize: function(url, options) {
+            this._url = url;
+            this._markers = {};
+            L.GridLayer.prototype.initialize.call(this, options);
+        },
+
+        onAdd: function(map) {
+            L.GridLayer.prototype.onAdd.call(this, map);
+            this.on('tileunload', this._unloadMarkers, this);
+        },
+
+        onRemove: function(map) {
+            this.off('tileunload', this._unloadMarkers, this);
+            $.each(this._markers, function(key, markers) {
+                map.removeLayer(markers);
+            });
+            this._markers = {};
+            L.GridLayer.prototype.onRemove.call(this, map);
+        },
+
+        createTile: function(coords, done) {
+            var layer = this;
+            var key = this._markersKey(coords);
+            var tile = document.createElement('div');
+
+            $.ajax({
+                'url': L.Util.template(this._url, {'zoom': coords.z, 'x': coords.x, 'y': coords.y}),
+            }).done(function(data) {
+                var markers = L.layerGroup();
+                $.each(data.features, function(index, feature) {
+                    var latlng = L.latLng(feature.geometry.coordinates[1], feature.geometry.coordinates[0]);
+                    var marker;
+                    if (feature.properties.count) {
+                        marker = $.nodewatcher.map.createClusterMarker(layer._map, latlng, feature.properties.count);
+                    }
+                    else {
+                        marker = $.nodewatcher.map.createNodeMarker({
+                            'data': {
+                                'i': feature.properties.i,      //node id
+                                'n': feature.properties.n,      //node name
+                                't': feature.properties.t,      //node type
+                                's': feature.properties.s,      //node status
+                                'l': feature.geometry.coordinates,
+                            },
+                        });
+                    }
 
-        map.addLayer(cluster);
+                    if (marker)
+                        markers.addLayer(marker);
+                });
+
+                //The tile may have been unloaded while it was being requested
+                if (layer._map && tile.parentNode) {
+                    layer._markers[key] = markers.addTo(layer._map);
+                }
+                done(null, tile);
+            }).fail(function(xhr, status, error) {
+                done(error, tile);
+            });
 
+            return tile;
+        },
+
+        _markersKey: function(coords) {
+            return coords.x + ':' + coords.y + ':' + coords.z;
+        },
+
+        _unloadMarkers: function(e) {
+            var key = this._markersKey(e.coords);
+            if (this._markers[key]) {
+                this._map.removeLayer(this._markers[key]);
+                delete this._markers[key];
+            }
+        },
+    });
+
+    $.nodewatcher.map.extend = function(map, nodes, links) {
         $.each(linkExtenders, function(index, extender) {
             $.each(links, function(index, link) {
                 var source = nodes[link.source];
                 var target = nodes[link.target];
 
-                if (source.marker && target.marker)
+                if (source.data.l && target.data.l)
                     link.line = extender(source, target, link);
             });
         });
@@ -0,0 +1,208 @@
+import calendar
+import datetime
+import json
+import os
+import shutil
+import tempfile
+
+from django import test as django_test
+from django.contrib.gis import geos
+from django.core import urlresolvers
+from django.utils import http, timezone
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.generator.cgm import models as cgm_models
+from nodewatcher.core.monitor import models as monitor_models
+from nodewatcher.modules.administration.location import models as location_models
+from nodewatcher.modules.administration.types import models as types_models
+
+from . import tiles
+
+
+class MapTilesTestCase(django_test.SimpleTestCase):
+    def test_tile_for_point(self):
+        self.assertEqual(tiles.tile_for_point(0, 14.5, 46.05), (0, 0))
+        self.assertEqual(tiles.tile_for_point(1, 14.5, 46.05), (1, 0))
+        self.assertEqual(tiles.tile_for_point(1, -14.5, -46.05), (0, 1))
+        # Points outside the projection limits belong to edge tiles.
+        self.assertEqual(tiles.tile_for_point(2, 180.0, 89.9), (3, 0))
+        self.assertEqual(tiles.tile_for_point(2, -180.0, -89.9), (0, 3))
+
+        for zoom in xrange(10):
+            x, y = tiles.tile_for_point(zoom, 14.5, 46.05)
+            min_lon, min_lat, max_lon, max_lat = tiles.tile_bounds(zoom, x, y)
+            self.assertTrue(min_lon <= 14.5 < max_lon)
+            self.assertTrue(min_lat <= 46.05 < max_lat)
+
+    def test_cluster_markers(self):
+        rows = [
+            ('a', 'A', 'wireless', 'up', geos.Point(14.50, 46.05)),
+            ('b', 'B', 'wireless', 'down', geos.Point(14.51, 46.06)),
+            ('c', 'C', 'server', 'up', geos.Point(-73.98, 40.75)),
+        ]
+
+        x, y = tiles.tile_for_point(3, 14.5, 46.05)
+        collection = tiles.cluster_markers(3, x, y, rows, 4)
+        self.assertEqual(len(collection['features']), 1)
+        properties = collection['features'][0]['properties']
+        self.assertEqual(properties['count'], 2)
+        self.assertEqual(properties['status'], {'up': 1, 'down': 1})
+
+        # Without clustering, each node is a separate feature.
+        collection = tiles.cluster_markers(3, x, y, rows, None)
+        self.assertEqual([feature['properties']['i'] for feature in collection['features']], ['a', 'b'])
+
+
+class MapTileCacheTestCase(django_test.TransactionTestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.addCleanup(setattr, tiles.cache, 'path', tiles.cache.path)
+        tiles.cache.path = cache_dir
+
+        self.node = core_models.Node()
+        self.node.save()
+        self.node.config.core.general(create=cgm_models.CgmGeneralConfig, name='Node').save()
+        self.node.config.core.type(create=types_models.TypeConfig, type='wireless').save()
+        self.node.config.core.location(create=location_models.LocationConfig, geolocation=geos.Point(14.5, 46.05)).save()
+
+    def get_properties(self):
+        x, y = tiles.tile_for_point(tiles.cache.max_zoom, 14.5, 46.05)
+        collection = json.loads(tiles.cache.get(tiles.cache.max_zoom, x, y))
+        self.assertTrue(os.path.exists(tiles.cache.get_tile_path(tiles.cache.max_zoom, x, y)))
+        self.assertEqual(len(collection['features']), 1)
+        return collection['features'][0]['properties']
+
+    def test_invalidation(self):
+        properties = self.get_properties()
+        self.assertEqual(properties['i'], self.node.uuid)
+        self.assertEqual(properties['n'], 'Node')
+        self.assertEqual(properties['t'], 'wireless')
+
+        # Changing marker properties invalidates cached tiles.
+        general = self.node.config.core.general()
+        general.name = 'Renamed node'
+        general.save()
+        self.assertEqual(self.get_properties()['n'], 'Renamed node')
+
+        node_type = self.node.config.core.type()
+        node_type.type = 'server'
+        node_type.save()
+        self.assertEqual(self.get_properties()['t'], 'server')
+
+        # Moving a node invalidates tiles at both locations.
+        location = self.node.config.core.location()
+        location.geolocation = geos.Point(-73.98, 40.75)
+        location.save()
+        x, y = tiles.tile_for_point(tiles.cache.max_zoom, 14.5, 46.05)
+        self.assertEqual(json.loads(tiles.cache.get(tiles.cache.max_zoom, x, y))['features'], [])
+
+    def test_empty_tiles(self):
+        # Tiles without nodes are rendered, but not stored.
+        x, y = tiles.tile_for_point(tiles.cache.max_zoom, -73.98, 40.75)
+        self.assertEqual(json.loads(tiles.cache.get(tiles.cache.max_zoom, x, y))['features'], [])
+        self.assertFalse(os.path.exists(tiles.cache.get_tile_path(tiles.cache.max_zoom, x, y)))
+
+    def test_invalidation_during_render(self):
+        render = tiles.cache.render
+
+        def render_and_rename(zoom, x, y):
+            collection = render(zoom, x, y)
+
+            # The node is renamed after the tile has been rendered, but before it is stored.
+            general = self.node.config.core.general()
+            general.name = 'Renamed node'
+            general.save()
+
+            return collection
+
+        tiles.cache.render = render_and_rename
+        try:
+            x, y = tiles.tile_for_point(tiles.cache.max_zoom, 14.5, 46.05)
+            collection = json.loads(tiles.cache.get(tiles.cache.max_zoom, x, y))
+        finally:
+            del tiles.cache.render
+
+        # The stale tile is returned, but not kept.
+        self.assertEqual(collection['features'][0]['properties']['n'], 'Node')
+        self.assertFalse(os.path.exists(tiles.cache.get_tile_path(tiles.cache.max_zoom, x, y)))
+        self.assertEqual(self.get_properties()['n'], 'Renamed node')
+
+
+class MapNodeAPITestCase(django_test.TestCase):
+    def setUp(self):
+        self.initial_time = datetime.datetime(2014, 11, 5, 1, 5, 0, tzinfo=timezone.utc)
+
+        # Nodes in Ljubljana and New York, last seen an hour apart.
+        self.nodes = []
+        for index, location in enumerate([geos.Point(14.5, 46.05), geos.Point(-73.98, 40.75), None]):
+            node = core_models.Node()
+            node.save()
+            node.config.core.general(create=cgm_models.CgmGeneralConfig, name='Node %s' % index).save()
+            node.config.core.location(create=location_models.LocationConfig, geolocation=location).save()
+            node.monitoring.core.general(
+                create=monitor_models.GeneralMonitor,
+                first_seen=self.initial_time,
+                last_seen=self.initial_time + datetime.timedelta(hours=index),
+            ).save()
+            self.nodes.append(node)
+
+    def get_markers(self, query=None, **kwargs):
+        query = dict(query or {}, format='json')
+        return self.client.get(urlresolvers.reverse('apiv2:map-node-list'), query, **kwargs)
+
+    def get_node_ids(self, query):
+        response = self.get_markers(query)
+        self.assertEqual(response.status_code, 200)
+        return [marker['i'] for marker in json.loads(response.content)['nodes']]
+
+    def timestamp(self, hours):
+        return calendar.timegm((self.initial_time + datetime.timedelta(hours=hours)).utctimetuple())
+
+    def test_markers(self):
+        response = self.get_markers()
+        markers = {marker['i']: marker for marker in json.loads(response.content)['nodes']}
+        self.assertEqual(sorted(markers), sorted(node.uuid for node in self.nodes))
+        self.assertEqual(markers[self.nodes[0].uuid]['n'], 'Node 0')
+        self.assertEqual(markers[self.nodes[0].uuid]['l'], [14.5, 46.05])
+        self.assertEqual(markers[self.nodes[2].uuid]['l'], None)
+        self.assertEqual(markers[self.nodes[1].uuid]['ls'], self.timestamp(1))
+
+    def test_bbox(self):
+        self.assertEqual(self.get_node_ids({'bbox': '13,45,17,47'}), [self.nodes[0].uuid])
+        self.assertEqual(self.get_node_ids({'bbox': '-80,40,-70,41'}), [self.nodes[1].uuid])
+        self.assertEqual(self.get_node_ids({'bbox': '0,0,1,1'}), [])
+        self.assertEqual(self.get_markers({'bbox': '0,0,1'}).status_code, 400)
+        self.assertEqual(self.get_markers({'bbox': 'a,b,c,d'}).status_code, 400)
+
+    def test_last_seen(self):
+        query = {'last_seen_after': self.timestamp(0), 'last_seen_before': self.timestamp(2)}
+        self.assertEqual(self.get_node_ids(query), [self.nodes[1].uuid])
+        self.assertEqual(sorted(self.get_node_ids({'last_seen_after': self.timestamp(0)})), sorted([self.nodes[1].uuid, self.nodes[2].uuid]))
+        self.assertEqual(self.get_node_ids({'last_seen_before': self.timestamp(0)}), [])
+
+        self.assertEqual(self.get_markers({'last_seen_after': 'invalid'}).status_code, 400)
+        self.assertEqual(self.get_markers({'last_seen_before': '9' * 30}).status_code, 400)
+
+    def test_not_modified(self):
+        response = self.get_markers()
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        self.assertEqual(self.get_markers(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get_markers(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+        # Changes to markers produce a new entity tag.
+        general = self.nodes[0].config.core.general()
+        general.name = 'Renamed node'
+        general.save()
+        response = self.get_markers(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Renaming a node does not change when it was last seen, so clients only sending
+        # If-Modified-Since always get current markers.
+        response = self.get_markers(HTTP_IF_MODIFIED_SINCE=http.http_date(self.timestamp(3)))
+        self.assertEqual(response.status_code, 200)
+        markers = {marker['i']: marker for marker in json.loads(response.content)['nodes']}
+        self.assertEqual(markers[self.nodes[0].uuid]['n'], 'Renamed node')
@@ -0,0 +1,344 @@
+import collections
+import errno
+import json
+import math
+import os
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.contrib.gis import geos
+
+from . import markers
+
+# Latitude limit of the Web Mercator projection
+MAX_LATITUDE = 85.0511287798
+# Number of segments used to approximate horizontal tile edges
+EDGE_SEGMENTS = 16
+
+
+def point_to_tile(zoom, lon, lat):
+    """
+    Projects a point to fractional tile coordinates.
+
+    :param zoom: Zoom level
+    :param lon: Longitude
+    :param lat: Latitude
+    :return: A tuple (x, y)
+    """
+
+    n = 2 ** zoom
+    lat = math.radians(max(min(lat, MAX_LATITUDE), -MAX_LATITUDE))
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - math.log(math.tan(lat) + 1.0 / math.cos(lat)) / math.pi) / 2.0 * n
+    return x, y
+
+
+def tile_for_point(zoom, lon, lat):
+    """
+    Returns coordinates of the tile containing a point.
+
+    :param zoom: Zoom level
+    :param lon: Longitude
+    :param lat: Latitude
+    :return: A tuple (x, y)
+    """
+
+    n = 2 ** zoom
+    x, y = point_to_tile(zoom, lon, lat)
+    return min(max(int(x), 0), n - 1), min(max(int(y), 0), n - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """
+    Returns geographic bounds of a tile. Edge tiles extend to the poles so that
+    nodes outside the projection limits are not lost.
+
+    :param zoom: Zoom level
+    :param x: Tile column
+    :param y: Tile row
+    :return: A tuple (min_lon, min_lat, max_lon, max_lat)
+    """
+
+    n = 2 ** zoom
+
+    def latitude(row):
+        if row <= 0:
+            return 90.0
+        elif row >= n:
+            return -90.0
+
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2.0 * row / n))))
+
+    return x * 360.0 / n - 180.0, latitude(y + 1), (x + 1) * 360.0 / n - 180.0, latitude(y)
+
+
+def tile_polygon(zoom, x, y):
+    """
+    Returns a polygon covering a tile, suitable for filtering geography fields.
+    As geography edges follow great circles, horizontal edges are split into
+    multiple segments and the polygon is padded. Returns None when the tile
+    covers half of the world or more.
+
+    :param zoom: Zoom level
+    :param x: Tile column
+    :param y: Tile row
+    """
+
+    if zoom < 2:
+        return None
+
+    min_lon, min_lat, max_lon, max_lat = tile_bounds(zoom, x, y)
+    pad_lon = (max_lon - min_lon) / 8
+    pad_lat = (max_lat - min_lat) / 8
+    min_lon, max_lon = max(min_lon - pad_lon, -180.0), min(max_lon + pad_lon, 180.0)
+    min_lat, max_lat = max(min_lat - pad_lat, -90.0), min(max_lat + pad_lat, 90.0)
+
+    step = (max_lon - min_lon) / EDGE_SEGMENTS
+    bottom = [(min_lon + i * step, min_lat) for i in xrange(EDGE_SEGMENTS)]
+    top = [(max_lon - i * step, max_lat) for i in xrange(EDGE_SEGMENTS)]
+    polygon = geos.Polygon(bottom + top + bottom[:1])
+    polygon.srid = 4326
+    return polygon
+
+
+def cluster_markers(zoom, x, y, rows, grid):
+    """
+    Clusters markers inside a tile. The tile is divided into a grid of cells
+    and all markers in the same cell are merged into a single cluster.
+
+    :param zoom: Zoom level
+    :param x: Tile column
+    :param y: Tile row
+    :param rows: An iterable of (uuid, name, type, status, location) tuples
+    :param grid: Number of cells along each side of a tile, None disables
+      clustering
+    :return: A GeoJSON feature collection
+    """
+
+    cells = collections.OrderedDict()
+    for row in rows:
+        location = row[4]
+        tile_x, tile_y = point_to_tile(zoom, location.x, location.y)
+        if tile_for_point(zoom, location.x, location.y) != (x, y):
+            # Rows are fetched using a padded polygon.
+            continue
+
+        if grid is None:
+            cell = row[0]
+        else:
+            cell = (min(int((tile_x - x) * grid), grid - 1), min(int((tile_y - y) * grid), grid - 1))
+
+        cells.setdefault(cell, []).append(row)
+
+    features = []
+    for cell in sorted(cells):
+        members = cells[cell]
+        if len(members) == 1:
+            uuid, name, type, status, location = members[0]
+            coordinates = [location.x, location.y]
+            properties = {
+                'i': uuid,
+                'n': name,
+                't': type,
+                's': status,
+            }
+        else:
+            coordinates = [
+                sum(member[4].x for member in members) / len(members),
+                sum(member[4].y for member in members) / len(members),
+            ]
+            properties = {
+                'count': len(members),
+                'status': collections.Counter(member[3] for member in members),
+            }
+
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': coordinates},
+            'properties': properties,
+        })
+
+    return {
+        'type': 'FeatureCollection',
+        'features': features,
+    }
+
+
+class TileCache(object):
+    """
+    On-disk cache of clustered GeoJSON map tiles. Tiles are rendered when first
+    requested and removed when a node inside them changes, so that they are
+    regenerated on the next request. Only tiles containing nodes are stored, so
+    that the number of cached tiles is bounded by the number of nodes.
+
+    Invalidation replaces a per-tile stamp before removing the tile. A tile is
+    discarded after it has been stored when its stamp changed while it was
+    being rendered, so that tiles rendered from stale data are never kept.
+    """
+
+    def __init__(self, path=None, max_zoom=None, cluster_max_zoom=None, cluster_grid=None):
+        """
+        Class constructor.
+
+        :param path: Cache directory
+        :param max_zoom: Maximum zoom level
+        :param cluster_max_zoom: Maximum zoom level at which markers are clustered
+        :param cluster_grid: Number of cluster cells along each side of a tile
+        """
+
+        self.path = path or getattr(settings, 'MAP_TILE_CACHE_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'map_tiles')
+        self.max_zoom = max_zoom or getattr(settings, 'MAP_TILE_MAX_ZOOM', 18)
+        self.cluster_max_zoom = cluster_max_zoom or getattr(settings, 'MAP_TILE_CLUSTER_MAX_ZOOM', 16)
+        self.cluster_grid = cluster_grid or getattr(settings, 'MAP_TILE_CLUSTER_GRID', 4)
+
+    def get_tile_path(self, zoom, x, y):
+        """
+        Returns the path of a cached tile.
+
+        :param zoom: Zoom level
+        :param x: Tile column
+        :param y: Tile row
+        """
+
+        return os.path.join(self.path, str(zoom), str(x), '%d.json' % y)
+
+    def get_stamp_path(self, zoom, x, y):
+        """
+        Returns the path of a tile invalidation stamp.
+
+        :param zoom: Zoom level
+        :param x: Tile column
+        :param y: Tile row
+        """
+
+        return os.path.join(self.path, str(zoom), str(x), '%d.stamp' % y)
+
+    def read_file(self, path):
+        """
+        Returns file contents or None when the file does not exist.
+
+        :param path: File path
+        """
+
+        try:
+            with open(path, 'rb') as cached_file:
+                return cached_file.read()
+        except IOError as error:
+            if error.errno != errno.ENOENT:
+                raise
+
+        return None
+
+    def write_file(self, path, content):
+        """
+        Atomically writes a file, so that concurrent requests never read
+        partial files.
+
+        :param path: File path
+        :param content: File contents
+        """
+
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as cached_file:
+            cached_file.write(content)
+        os.rename(cached_file.name, path)
+
+    def remove_file(self, path):
+        """
+        Removes a file if it exists.
+
+        :param path: File path
+        """
+
+        try:
+            os.remove(path)
+        except OSError as error:
+            if error.errno != errno.ENOENT:
+                raise
+
+    def render(self, zoom, x, y):
+        """
+        Renders a tile.
+
+        :param zoom: Zoom level
+        :param x: Tile column
+        :param y: Tile row
+        :return: GeoJSON feature collection
+        """
+
+        queryset = markers.get_queryset().filter(location__isnull=False)
+        polygon = tile_polygon(zoom, x, y)
+        if polygon is not None:
+            queryset = queryset.filter(location__intersects=polygon)
+
+        rows = markers.get_rows(queryset, ['uuid', 'name', 'type', 'status', 'location'])
+        grid = self.cluster_grid if zoom <= self.cluster_max_zoom else None
+        return cluster_markers(zoom, x, y, rows, grid)
+
+    def get(self, zoom, x, y):
+        """
+        Returns a tile, rendering it when it is not cached.
+
+        :param zoom: Zoom level
+        :param x: Tile column
+        :param y: Tile row
+        :return: Serialized GeoJSON feature collection
+        """
+
+        path = self.get_tile_path(zoom, x, y)
+        content = self.read_file(path)
+        if content is not None:
+            return content
+
+        stamp_path = self.get_stamp_path(zoom, x, y)
+        stamp = self.read_file(stamp_path)
+        collection = self.render(zoom, x, y)
+        content = json.dumps(collection)
+        if not collection['features']:
+            # Empty tiles are cheap to render and are not stored.
+            return content
+
+        self.write_file(path, content)
+        if self.read_file(stamp_path) != stamp:
+            # The tile has been invalidated while it was being rendered.
+            self.remove_file(path)
+
+        return content
+
+    def invalidate(self, locations):
+        """
+        Removes all cached tiles containing any of the given locations.
+
+        :param locations: An iterable of points
+        """
+
+        tiles = set()
+        for location in locations:
+            if location is None:
+                continue
+
+            for zoom in xrange(self.max_zoom + 1):
+                tiles.add((zoom,) + tile_for_point(zoom, location.x, location.y))
+
+        for tile in tiles:
+            self.write_file(self.get_stamp_path(*tile), uuid.uuid4().hex)
+            self.remove_file(self.get_tile_path(*tile))
+
+    def invalidate_nodes(self, node_ids):
+        """
+        Removes all cached tiles containing any of the given nodes.
+
+        :param node_ids: An iterable of node primary keys
+        """
+
+        queryset = markers.get_queryset().filter(pk__in=list(node_ids), location__isnull=False)
+        self.invalidate([location for location, in markers.get_rows(queryset, ['location'])])
+
+cache = TileCache()
@@ -1,5 +1,131 @@
+import calendar
+import datetime
+import hashlib
+import json
+
+from django import http as django_http
+from django.contrib.gis import geos
+from django.utils import timezone
 from django.views import generic
 
+from rest_framework import exceptions, response, viewsets
+
+from nodewatcher.core.api import caching as api_caching
+
+from . import markers, tiles
+
 
 class Map(generic.TemplateView):
     template_name = 'map/map.html'
+
+    def get_context_data(self, **kwargs):
+        context = super(Map, self).get_context_data(**kwargs)
+        context['tile_max_zoom'] = tiles.cache.max_zoom
+        return context
+
+
+class MapTile(generic.View):
+    """
+    Serves pre-computed clustered GeoJSON tiles.
+    """
+
+    def get(self, request, zoom, x, y):
+        zoom, x, y = int(zoom), int(x), int(y)
+        if zoom > tiles.cache.max_zoom or x >= 2 ** zoom or y >= 2 ** zoom:
+            raise django_http.Http404
+
+        return django_http.HttpResponse(tiles.cache.get(zoom, x, y), content_type='application/json')
+
+
+def parse_timestamp(value):
+    """
+    Parses a UNIX timestamp query parameter.
+
+    :param value: Parameter value
+    :return: Timezone-aware datetime instance
+    """
+
+    try:
+        return datetime.datetime.fromtimestamp(int(value), timezone.utc)
+    except (ValueError, OverflowError):
+        raise exceptions.ParseError("Invalid timestamp.")
+
+
+def parse_bbox(value):
+    """
+    Parses a bounding box query parameter of the form 'min_lon,min_lat,max_lon,max_lat'.
+
+    :param value: Parameter value
+    :return: Polygon instance
+    """
+
+    try:
+        bbox = [float(coordinate) for coordinate in value.split(',')]
+        if len(bbox) != 4:
+            raise ValueError
+    except ValueError:
+        raise exceptions.ParseError("Invalid bounding box.")
+
+    polygon = geos.Polygon.from_bbox(bbox)
+    polygon.srid = 4326
+    return polygon
+
+
+class MapNodeViewSet(viewsets.ViewSet):
+    """
+    Endpoint for node markers displayed on the map.
+    """
+
+    def get_queryset(self):
+        return markers.get_queryset()
+
+    def list(self, request):
+        """
+        Returns markers for all nodes. Markers may be limited to nodes inside a
+        bounding box given by the ``bbox`` query parameter and to nodes last seen
+        in a time window given by the ``last_seen_after`` and ``last_seen_before``
+        query parameters (UNIX timestamps).
+        """
+
+        queryset = self.get_queryset()
+
+        bbox = request.query_params.get('bbox', None)
+        if bbox is not None:
+            queryset = queryset.filter(location__intersects=parse_bbox(bbox))
+
+        last_seen_after = request.query_params.get('last_seen_after', None)
+        if last_seen_after is not None:
+            queryset = queryset.filter(last_seen__gt=parse_timestamp(last_seen_after))
+
+        last_seen_before = request.query_params.get('last_seen_before', None)
+        if last_seen_before is not None:
+            queryset = queryset.filter(last_seen__lt=parse_timestamp(last_seen_before))
+
+        rows = markers.get_rows(queryset, ['uuid', 'name', 'type', 'status', 'location', 'last_seen'])
+
+        nodes = []
+        for uuid, name, type, status, location, last_seen in rows:
+            if last_seen is not None:
+                last_seen = calendar.timegm(last_seen.utctimetuple())
+
+            nodes.append({
+                'i': uuid,
+                'n': name,
+                't': type,
+                's': status,
+                'l': [location.x, location.y] if location is not None else None,
+                'ls': last_seen,
+            })
+
+        nodes.sort(key=lambda node: node['i'])
+        data = {'nodes': nodes}
+        # Allow clients to cheaply revalidate their copy. Last-Modified is not sent, as
+        # there is no modification time covering all marker properties.
+        etag = '"%s"' % hashlib.md5(json.dumps(data, sort_keys=True)).hexdigest()
+        if api_caching.is_not_modified(request, etag):
+            result = django_http.HttpResponseNotModified()
+        else:
+            result = response.Response(data)
+
+        result['ETag'] = etag
+        return result
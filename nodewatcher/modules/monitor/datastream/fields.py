@@ -1,11 +1,16 @@
+import calendar
 import collections
 import copy
+import datetime
 
-from django.core import exceptions
+from django.conf import settings
+from django.core import cache as django_cache, exceptions
 
 from datastream import exceptions as ds_exceptions
 
 from nodewatcher.utils import datastructures
+
+from . import graph
 from .pool import pool
 
 
@@ -566,7 +571,39 @@ class DynamicSumField(Field):
         self.ensure_stream(descriptor, stream)
 
 
-class GraphField(Field):
+class GraphReaderMixin(object):
+    """
+    A mixin for fields that store graphs, which enables reading them back.
+    """
+
+    edge_key = graph.DEFAULT_EDGE_KEY
+
+    def get_graph(self, descriptor, stream, timestamp=None):
+        """
+        Reconstructs the graph stored in this field's stream.
+
+        :param descriptor: Streams descriptor
+        :param stream: Stream API instance
+        :param timestamp: Optional timestamp, by default the latest graph is returned
+        :return: Graph or None if nothing has been stored yet
+        """
+
+        # Streams are looked up instead of ensured, so that reading has no side effects.
+        query_tags, _ = self.process_tags(descriptor)
+        streams = stream.find_streams(query_tags)
+        if not streams:
+            return None
+
+        return graph.read(
+            stream,
+            streams[0]['stream_id'],
+            descriptor.get_stream_highest_granularity(),
+            timestamp=timestamp,
+            edge_key=self.edge_key,
+        )[0]
+
+
+class GraphField(GraphReaderMixin, Field):
     """
     A field that can store graph datapoints.
     """
@@ -583,6 +620,123 @@ class GraphField(Field):
         return dict(value)
 
 
+def get_timestamp_seconds(timestamp):
+    """
+    Converts a naive UTC or timezone-aware timestamp to a UNIX timestamp.
+
+    :param timestamp: Datetime instance
+    """
+
+    return calendar.timegm(timestamp.utctimetuple())
+
+
+class DeltaGraphField(GraphReaderMixin, Field):
+    """
+    A field that stores graph datapoints as periodic keyframes containing the
+    whole graph, followed by deltas against the previous graph.
+
+    The last stored graph is kept in a cache between writes, so that it does
+    not need to be reconstructed from the stream on every write. The cached
+    graph is only used when it belongs to the latest datapoint in the stream.
+    """
+
+    def __init__(self, keyframe_interval=60, edge_key=graph.DEFAULT_EDGE_KEY, **kwargs):
+        """
+        Class constructor.
+
+        :param keyframe_interval: Number of datapoints after which a new keyframe
+          is stored
+        :param edge_key: A tuple of edge attributes that uniquely identify an edge
+        """
+
+        self.keyframe_interval = keyframe_interval
+        self.edge_key = tuple(edge_key)
+
+        kwargs['value_type'] = 'nominal'
+        super(DeltaGraphField, self).__init__(**kwargs)
+
+    def prepare_tags(self):
+        tags = super(DeltaGraphField, self).prepare_tags()
+        tags.update({'type': 'delta_graph', 'edge_key': list(self.edge_key)})
+        return tags
+
+    def to_stream(self, descriptor, stream, timestamp=None):
+        """
+        Creates streams and inserts datapoints to the stream via the datastream API.
+
+        :param descriptor: Destination stream descriptor
+        :param stream: Stream API instance
+        :param timestamp: Optional datapoint timestamp
+        """
+
+        attribute = self.name if self.attribute is None else self.attribute
+        if callable(attribute):
+            value = attribute(descriptor.get_model())
+        else:
+            value = getattr(descriptor.get_model(), attribute)
+
+        stream_id = self.ensure_stream(descriptor, stream)
+        if value is None:
+            return
+
+        value = dict(value)
+        if timestamp is None:
+            timestamp = datetime.datetime.utcnow()
+
+        previous, deltas = self.get_previous_graph(descriptor, stream, stream_id)
+
+        delta = None
+        if previous is not None and deltas + 1 < self.keyframe_interval:
+            delta = graph.diff(previous, value, edge_key=self.edge_key)
+
+        if delta is None:
+            stream.append(stream_id, graph.encode_keyframe(value), timestamp=timestamp)
+            deltas = 0
+        else:
+            stream.append(stream_id, graph.encode_delta(delta), timestamp=timestamp)
+            deltas += 1
+
+        self.get_cache().set(self.get_cache_key(stream_id), {
+            'timestamp': get_timestamp_seconds(timestamp),
+            'graph': value,
+            'deltas': deltas,
+        }, None)
+
+    def get_cache(self):
+        return django_cache.caches[getattr(settings, 'DATASTREAM_GRAPH_CACHE', 'default')]
+
+    def get_cache_key(self, stream_id):
+        return 'datastream:graph:%s' % stream_id
+
+    def get_previous_graph(self, descriptor, stream, stream_id):
+        """
+        Returns the last stored graph. The graph is reconstructed from the stream
+        only when the cached graph is missing or does not belong to the latest
+        datapoint (for example when the last write has failed).
+
+        :param descriptor: Streams descriptor
+        :param stream: Stream API instance
+        :param stream_id: Stream identifier
+        :return: A tuple (graph, number of deltas since the last keyframe)
+        """
+
+        state = self.get_cache().get(self.get_cache_key(stream_id))
+        if state is not None:
+            query_tags, _ = self.process_tags(descriptor)
+            streams = stream.find_streams(query_tags)
+            latest = streams[0].get('latest_datapoint') if streams else None
+            if latest is not None and get_timestamp_seconds(latest) == state['timestamp']:
+                return state['graph'], state['deltas']
+
+        previous, deltas, _ = graph.read(
+            stream,
+            stream_id,
+            descriptor.get_stream_highest_granularity(),
+            edge_key=self.edge_key,
+        )
+        return previous, deltas
+
+
 class NominalField(Field):
     """
     A field that can contain any value but does not support any statistical
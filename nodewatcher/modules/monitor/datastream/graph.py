@@ -0,0 +1,147 @@
+import collections
+
+# Attributes that identify an edge by default.
+DEFAULT_EDGE_KEY = ('f', 't')
+
+
+def _index_vertices(graph):
+    return collections.OrderedDict((vertex['i'], vertex) for vertex in graph.get('v', []))
+
+
+def _index_edges(graph, edge_key):
+    edges = collections.OrderedDict()
+    for edge in graph.get('e', []):
+        key = tuple(edge.get(attribute) for attribute in edge_key)
+        if key in edges:
+            # Edges must be uniquely identified by their key.
+            return None
+        edges[key] = edge
+
+    return edges
+
+
+def diff(previous, current, edge_key=DEFAULT_EDGE_KEY):
+    """
+    Computes the difference between two graphs.
+
+    :param previous: Previous graph
+    :param current: Current graph
+    :param edge_key: A tuple of edge attributes that uniquely identify an edge
+    :return: Delta dictionary or None when the graphs cannot be diffed
+    """
+
+    previous_edges = _index_edges(previous, edge_key)
+    current_edges = _index_edges(current, edge_key)
+    if previous_edges is None or current_edges is None:
+        return None
+
+    previous_vertices = _index_vertices(previous)
+    current_vertices = _index_vertices(current)
+
+    delta = {}
+    # Added or changed vertices are stored with all their attributes.
+    vertices = [vertex for key, vertex in current_vertices.iteritems() if previous_vertices.get(key) != vertex]
+    if vertices:
+        delta['v+'] = vertices
+    vertices = [key for key in previous_vertices if key not in current_vertices]
+    if vertices:
+        delta['v-'] = vertices
+
+    # Added or changed edges are stored with all their attributes.
+    edges = [edge for key, edge in current_edges.iteritems() if previous_edges.get(key) != edge]
+    if edges:
+        delta['e+'] = edges
+    edges = [list(key) for key in previous_edges if key not in current_edges]
+    if edges:
+        delta['e-'] = edges
+
+    return delta
+
+
+def patch(graph, delta, edge_key=DEFAULT_EDGE_KEY):
+    """
+    Applies a delta to a graph.
+
+    :param graph: Graph to apply the delta to
+    :param delta: Delta dictionary as returned by `diff`
+    :param edge_key: A tuple of edge attributes that uniquely identify an edge
+    :return: New graph with the delta applied
+    """
+
+    vertices = _index_vertices(graph)
+    for key in delta.get('v-', []):
+        vertices.pop(key, None)
+    for vertex in delta.get('v+', []):
+        vertices[vertex['i']] = vertex
+
+    edges = _index_edges(graph, edge_key)
+    if edges is None:
+        raise ValueError("Graph edges are not uniquely identified by %s." % (edge_key,))
+    for key in delta.get('e-', []):
+        edges.pop(tuple(key), None)
+    for edge in delta.get('e+', []):
+        edges[tuple(edge.get(attribute) for attribute in edge_key)] = edge
+
+    return {'v': vertices.values(), 'e': edges.values()}
+
+
+def encode_keyframe(graph):
+    """
+    Encodes a graph as a keyframe datapoint value.
+    """
+
+    return {'k': graph}
+
+
+def encode_delta(delta):
+    """
+    Encodes a delta as a datapoint value.
+    """
+
+    return {'d': delta}
+
+
+def read(stream, stream_id, granularity, timestamp=None, edge_key=DEFAULT_EDGE_KEY):
+    """
+    Reconstructs a graph from a stream of keyframes and deltas. Streams with
+    plain graph datapoints are also supported as every datapoint is then treated
+    as a keyframe.
+
+    :param stream: Datastream API instance
+    :param stream_id: Stream identifier
+    :param granularity: Stream granularity to read from
+    :param timestamp: Optional timestamp at which to reconstruct the graph, by
+      default the latest graph is returned
+    :param edge_key: A tuple of edge attributes that uniquely identify an edge
+    :return: A tuple (graph, number of deltas applied, timestamp of the last
+      datapoint); the graph is None when no keyframe exists
+    """
+
+    kwargs = {}
+    if timestamp is not None:
+        kwargs['end'] = timestamp
+
+    deltas = []
+    graph = None
+    last_timestamp = None
+    for datapoint in stream.get_data(stream_id, granularity, reverse=True, **kwargs):
+        value = datapoint['v']
+        if last_timestamp is None:
+            last_timestamp = datapoint['t']
+
+        if 'd' in value:
+            deltas.append(value['d'])
+        elif 'k' in value:
+            graph = value['k']
+            break
+        else:
+            graph = value
+            break
+
+    if graph is None:
+        return None, 0, last_timestamp
+
+    for item in reversed(deltas):
+        graph = patch(graph, item, edge_key=edge_key)
+
+    return graph, len(deltas), last_timestamp
@@ -72,45 +72,60 @@ class DatastreamBase(object):
         else:
             now = datetime.datetime.utcnow()
 
-        processed_items = set()
-        datapoints = []
-
-        class DatastreamBulkProxy(object):
-            def __getattr__(self, key):
-                return getattr(datastream, key)
-
-            def append(self, stream_id, value, timestamp=None):
-                # Change append to cache datapoints for bulk insertion.
-                datapoints.append({
-                    'stream_id': stream_id,
-                    'value': value,
-                    'timestamp': timestamp,
-                })
-
-        datastream_bulk_proxy = DatastreamBulkProxy()
-
-        for items in context.datastream.values():
-            if isinstance(items, dict):
-                items = items.values()
-            elif not isinstance(items, list):
-                items = [items]
-
-            # Only include models that have known stream descriptors registered in
-            # the descriptor pool
-            for item in items:
-                if item in processed_items:
-                    continue
-                processed_items.add(item)
-
-                try:
-                    descriptor = pool.get_descriptor(item)
-                    descriptor.insert_to_stream(datastream_bulk_proxy, timestamp=now)
-                    pool.clear_descriptor(item)
-                except exceptions.StreamDescriptorNotRegistered:
-                    continue
-
-        # Insert datapoints in bulk.
-        datastream.append_multiple(datapoints)
+        items = []
+        for value in context.datastream.values():
+            if isinstance(value, dict):
+                items.extend(value.values())
+            elif isinstance(value, list):
+                items.extend(value)
+            else:
+                items.append(value)
+
+        insert_items(items, now)
+
+
+def insert_items(items, timestamp):
+    """
+    Inserts datapoints of all items that have stream descriptors registered in
+    the descriptor pool. Datapoints are inserted in bulk.
+
+    :param items: A list of items
+    :param timestamp: Timestamp of the datapoints
+    """
+
+    processed_items = set()
+    datapoints = []
+
+    class DatastreamBulkProxy(object):
+        def __getattr__(self, key):
+            return getattr(datastream, key)
+
+        def append(self, stream_id, value, timestamp=None):
+            # Change append to cache datapoints for bulk insertion.
+            datapoints.append({
+                'stream_id': stream_id,
+                'value': value,
+                'timestamp': timestamp,
+            })
+
+    datastream_bulk_proxy = DatastreamBulkProxy()
+
+    # Only include models that have known stream descriptors registered in
+    # the descriptor pool
+    for item in items:
+        if item in processed_items:
+            continue
+        processed_items.add(item)
+
+        try:
+            descriptor = pool.get_descriptor(item)
+            descriptor.insert_to_stream(datastream_bulk_proxy, timestamp=timestamp)
+            pool.clear_descriptor(item)
+        except exceptions.StreamDescriptorNotRegistered:
+            continue
+
+    # Insert datapoints in bulk.
+    datastream.append_multiple(datapoints)
 
 
 class NodeDatastream(DatastreamBase, monitor_processors.NodeProcessor):
@@ -1,9 +1,11 @@
+import datetime
+
 from django import test as django_test
 from django.conf import settings
 
 import django_datastream
 
-from . import base, exceptions, fields
+from . import base, exceptions, fields, graph
 from .pool import pool
 
 
@@ -53,6 +55,37 @@ class TestStreams(TestBaseStreams):
     topology = fields.GraphField()
 
 
+class TestDeltaStreams(TestBaseStreams):
+    topology = fields.DeltaGraphField(keyframe_interval=3)
+
+
+class DummyGraphStream(object):
+    """
+    In-memory stream API supporting a single stream.
+    """
+
+    def __init__(self):
+        self.datapoints = []
+        self.reads = 0
+
+    def ensure_stream(self, query_tags, tags, downsamplers, highest_granularity, value_type=None):
+        return 'graph-stream'
+
+    def find_streams(self, query_tags):
+        if not self.datapoints:
+            return []
+
+        return [{'stream_id': 'graph-stream', 'latest_datapoint': self.datapoints[-1]['t']}]
+
+    def append(self, stream_id, value, timestamp=None):
+        self.datapoints.append({'t': timestamp, 'v': value})
+
+    def get_data(self, stream_id, granularity, reverse=False, end=None):
+        self.reads += 1
+        points = [datapoint for datapoint in self.datapoints if end is None or datapoint['t'] <= end]
+        return reversed(points) if reverse else points
+
+
 class RegistryTestCase(django_test.TestCase):
     def setUp(self):
         DATASTREAM_BACKEND_SETTINGS = settings.DATASTREAM_BACKEND_SETTINGS.copy()
@@ -124,3 +157,105 @@ class RegistryTestCase(django_test.TestCase):
         pool.unregister(DummyModel)
         with self.assertRaises(exceptions.StreamDescriptorNotRegistered):
             pool.unregister(DummyModel)
+
+
+class GraphDeltaTestCase(django_test.SimpleTestCase):
+    def test_diff_and_patch(self):
+        previous = {
+            'v': [
+                {'i': 'nodeA', 'n': 'a'},
+                {'i': 'nodeB', 'n': 'b'},
+                {'i': 'nodeC', 'n': 'c'},
+            ],
+            'e': [
+                {'f': 'nodeA', 't': 'nodeB', 'lq': 1.0},
+                {'f': 'nodeB', 't': 'nodeC', 'lq': 1.0},
+            ]
+        }
+        current = {
+            'v': [
+                {'i': 'nodeA', 'n': 'a'},
+                {'i': 'nodeB', 'n': 'renamed'},
+                {'i': 'nodeD', 'n': 'd'},
+            ],
+            'e': [
+                {'f': 'nodeA', 't': 'nodeB', 'lq': 0.5},
+                {'f': 'nodeB', 't': 'nodeD', 'lq': 1.0},
+            ]
+        }
+
+        delta = graph.diff(previous, current)
+        self.assertEqual(delta['v+'], [{'i': 'nodeB', 'n': 'renamed'}, {'i': 'nodeD', 'n': 'd'}])
+        self.assertEqual(delta['v-'], ['nodeC'])
+        self.assertEqual(delta['e+'], [{'f': 'nodeA', 't': 'nodeB', 'lq': 0.5}, {'f': 'nodeB', 't': 'nodeD', 'lq': 1.0}])
+        self.assertEqual(delta['e-'], [['nodeB', 'nodeC']])
+        self.assertEqual(graph.patch(previous, delta), current)
+
+        # Unchanged graphs produce an empty delta.
+        self.assertEqual(graph.diff(current, current), {})
+
+        # Edges that are not uniquely identified cannot be diffed.
+        duplicate = {'v': current['v'], 'e': current['e'] + [{'f': 'nodeA', 't': 'nodeB', 'proto': 'babel'}]}
+        self.assertIsNone(graph.diff(current, duplicate))
+        self.assertIsNotNone(graph.diff(current, duplicate, edge_key=('f', 't', 'proto')))
+
+    def test_read(self):
+        keyframe = {'v': [{'i': 'nodeA'}, {'i': 'nodeB'}], 'e': [{'f': 'nodeA', 't': 'nodeB'}]}
+        datapoints = [
+            {'t': 1, 'v': graph.encode_keyframe(keyframe)},
+            {'t': 2, 'v': graph.encode_delta({'v+': [{'i': 'nodeC'}], 'e+': [{'f': 'nodeB', 't': 'nodeC'}]})},
+            {'t': 3, 'v': graph.encode_delta({'e-': [['nodeA', 'nodeB']]})},
+        ]
+
+        class DummyStream(object):
+            def get_data(self, stream_id, granularity, reverse=False, end=None):
+                points = [datapoint for datapoint in datapoints if end is None or datapoint['t'] <= end]
+                return reversed(points) if reverse else points
+
+        stream = DummyStream()
+        result, deltas, timestamp = graph.read(stream, 'topology', None)
+        self.assertEqual(deltas, 2)
+        self.assertEqual(timestamp, 3)
+        self.assertEqual(result, {
+            'v': [{'i': 'nodeA'}, {'i': 'nodeB'}, {'i': 'nodeC'}],
+            'e': [{'f': 'nodeB', 't': 'nodeC'}],
+        })
+
+        result, deltas, timestamp = graph.read(stream, 'topology', None, timestamp=1)
+        self.assertEqual(deltas, 0)
+        self.assertEqual(result, keyframe)
+
+        # Plain graph datapoints are treated as keyframes.
+        datapoints = [{'t': 1, 'v': keyframe}]
+        self.assertEqual(graph.read(stream, 'topology', None)[0], keyframe)
+
+    def test_delta_field(self):
+        stream = DummyGraphStream()
+        item = DummyModel()
+        item.uuid = 1
+        descriptor = TestDeltaStreams(item)
+        field = descriptor.topology
+        field.get_cache().delete(field.get_cache_key('graph-stream'))
+
+        # Reading does not create streams.
+        self.assertIsNone(field.get_graph(descriptor, stream))
+
+        start = datetime.datetime(2014, 11, 5, 1, 5, 0)
+        graphs = []
+        for index in xrange(5):
+            item.topology = {'v': [{'i': 'node%d' % vertex} for vertex in xrange(index + 2)], 'e': []}
+            graphs.append(item.topology)
+            field.to_stream(descriptor, stream, timestamp=start + datetime.timedelta(minutes=index))
+
+        self.assertEqual([list(datapoint['v']) for datapoint in stream.datapoints], [['k'], ['d'], ['d'], ['k'], ['d']])
+        # Only the first write reconstructs the previous graph from the stream.
+        self.assertEqual(stream.reads, 1)
+        self.assertEqual(field.get_graph(descriptor, stream), graphs[-1])
+
+        # A cached graph, which does not belong to the latest datapoint, is not used.
+        stream.datapoints.pop()
+        item.topology = graphs[0]
+        field.to_stream(descriptor, stream, timestamp=start + datetime.timedelta(minutes=10))
+        self.assertEqual(stream.reads, 3)
+        self.assertEqual(stream.datapoints[-1]['v'], graph.encode_delta(graph.diff(graphs[3], graphs[0])))
+        self.assertEqual(field.get_graph(descriptor, stream), graphs[0])
@@ -0,0 +1,346 @@
+import array
+import errno
+import math
+import os
+import select
+import socket
+import struct
+import time
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+# Standard UDP echo service port
+UDP_ECHO_PORT = 7
+# Maximum time (in seconds) for which probes missed due to late wakeups are sent in a burst
+BURST_WINDOW = 0.01
+
+
+class ProberError(Exception):
+    pass
+
+
+def summarize(sent, rtts):
+    """
+    Computes RTT statistics.
+
+    :param sent: Number of sent probes
+    :param rtts: A sequence of measured round trip times (in milliseconds)
+    :return: A dictionary with RTT statistics
+    """
+
+    n = len(rtts)
+    if n == 0:
+        return {
+            'sent': sent,
+            'successful': 0,
+            'failed': sent,
+            'rtt_min': None,
+            'rtt_max': None,
+            'rtt_avg': None,
+            'rtt_std': None,
+        }
+
+    s = math.fsum(rtts)
+    if n == 1:
+        std = 0.0
+    else:
+        ss = math.fsum([x * x for x in rtts])
+        std = math.sqrt(max(0.0, (float(n) * ss - s ** 2) / (n * (n - 1))))
+
+    return {
+        'sent': sent,
+        'successful': n,
+        'failed': max(0, sent - n),
+        'rtt_min': min(rtts),
+        'rtt_max': max(rtts),
+        'rtt_avg': s / n,
+        'rtt_std': std,
+    }
+
+
+class ProbeTransport(object):
+    """
+    Transport used by the prober to send probes and receive replies. Transports
+    must provide a file descriptor that becomes readable when replies are
+    available.
+    """
+
+    def fileno(self):
+        """
+        Returns a file descriptor that becomes readable when replies are available.
+        """
+
+        raise NotImplementedError
+
+    def send(self, address, sequence, size):
+        """
+        Sends a single probe.
+
+        :param address: Destination address
+        :param sequence: Probe sequence number
+        :param size: Probe payload size in bytes
+        """
+
+        raise NotImplementedError
+
+    def receive(self):
+        """
+        Receives available replies without blocking.
+
+        :return: A list of (address, sequence) tuples
+        """
+
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases any resources held by the transport.
+        """
+
+        pass
+
+
+class IcmpTransport(ProbeTransport):
+    """
+    Transport which sends ICMP ECHO requests over a raw socket. Opening raw
+    sockets requires the CAP_NET_RAW capability.
+    """
+
+    def __init__(self):
+        """
+        Class constructor.
+        """
+
+        try:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        except socket.error as error:
+            raise ProberError("Unable to open raw ICMP socket: %s" % error)
+
+        self.socket.setblocking(0)
+        self.identifier = os.getpid() & 0xFFFF
+
+    @staticmethod
+    def checksum(data):
+        """
+        Computes the internet checksum of the given data.
+        """
+
+        if len(data) % 2:
+            data += '\x00'
+
+        total = sum(array.array('H', data))
+        total = (total >> 16) + (total & 0xFFFF)
+        total += total >> 16
+        # The checksum is computed in host byte order, so swap it when needed.
+        return socket.htons(~total & 0xFFFF)
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def send(self, address, sequence, size):
+        payload = 'Q' * size
+        header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, self.identifier, sequence)
+        header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, self.checksum(header + payload), self.identifier, sequence)
+
+        try:
+            self.socket.sendto(header + payload, (address, 0))
+        except socket.error:
+            # Unreachable destinations are accounted for as lost probes.
+            pass
+
+    def receive(self):
+        replies = []
+        while True:
+            try:
+                data, (address, _) = self.socket.recvfrom(65535)
+            except socket.error:
+                break
+
+            # Skip the IP header.
+            offset = (ord(data[0]) & 0x0F) * 4
+            try:
+                icmp_type, _, _, identifier, sequence = struct.unpack('!BBHHH', data[offset:offset + 8])
+            except struct.error:
+                continue
+
+            # Raw sockets receive all ICMP traffic, so only take our own replies.
+            if icmp_type != ICMP_ECHO_REPLY or identifier != self.identifier:
+                continue
+
+            replies.append((address, sequence))
+
+        return replies
+
+    def close(self):
+        self.socket.close()
+
+
+class UdpTransport(ProbeTransport):
+    """
+    Transport which sends UDP datagrams to an echo service on the targets and
+    does not require any special privileges. Replies are matched using the
+    identifier and sequence number at the start of the payload.
+    """
+
+    header = struct.Struct('!HH')
+
+    def __init__(self, port=UDP_ECHO_PORT):
+        """
+        Class constructor.
+
+        :param port: Destination port of the echo service
+        """
+
+        try:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        except socket.error as error:
+            raise ProberError("Unable to open UDP socket: %s" % error)
+
+        self.socket.setblocking(0)
+        self.port = port
+        self.identifier = os.getpid() & 0xFFFF
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def send(self, address, sequence, size):
+        payload = self.header.pack(self.identifier, sequence) + 'Q' * max(0, size - self.header.size)
+
+        try:
+            self.socket.sendto(payload, (address, self.port))
+        except socket.error:
+            # Unreachable destinations are accounted for as lost probes.
+            pass
+
+    def receive(self):
+        replies = []
+        while True:
+            try:
+                data, (address, port) = self.socket.recvfrom(65535)
+            except socket.error as error:
+                if error.errno == errno.ECONNREFUSED:
+                    # Reported for an earlier probe to a target without an echo service.
+                    continue
+                break
+
+            if port != self.port:
+                continue
+
+            try:
+                identifier, sequence = self.header.unpack(data[:self.header.size])
+            except struct.error:
+                continue
+
+            if identifier != self.identifier:
+                continue
+
+            replies.append((address, sequence))
+
+        return replies
+
+    def close(self):
+        self.socket.close()
+
+
+class Prober(object):
+    """
+    In-process RTT prober which schedules probes of all sizes to all targets
+    over a single transport.
+    """
+
+    def __init__(self, transport, count=10, interval=0.02, rate=1000, timeout=1.0):
+        """
+        Class constructor.
+
+        :param transport: Probe transport
+        :param count: Number of probes of each size sent to each target
+        :param interval: Minimum interval between probes of the same size to the
+          same target (in seconds)
+        :param rate: Maximum number of probes sent per second
+        :param timeout: Time after which a probe is considered lost (in seconds)
+        """
+
+        self.transport = transport
+        self.count = count
+        self.interval = interval
+        self.rate = rate
+        self.timeout = timeout
+
+    def run(self, targets, sizes):
+        """
+        Performs the measurements.
+
+        :param targets: A list of target addresses
+        :param sizes: A list of probe payload sizes
+        :return: A dictionary mapping target addresses to dictionaries mapping
+          probe sizes to arrays of round trip times (in milliseconds)
+        """
+
+        targets = list(targets)
+        sizes = list(sizes)
+        if self.count * len(sizes) > 0xFFFF:
+            raise ProberError("Too many probes per target.")
+
+        results = {target: {size: array.array('d') for size in sizes} for target in targets}
+        if not targets or not sizes:
+            return results
+
+        gap = 1.0 / self.rate
+        outstanding = {}
+        last_sent = None
+        round_start = None
+        next_send = time.time()
+
+        def schedule():
+            for round_index in xrange(self.count):
+                for size_index, size in enumerate(sizes):
+                    sequence = round_index * len(sizes) + size_index
+                    for target_index, target in enumerate(targets):
+                        yield round_index, target_index, target, sequence, size
+
+        probes = schedule()
+        pending = next(probes, None)
+
+        while True:
+            now = time.time()
+
+            # Send all probes that are due. Probes missed due to a late wakeup are sent in a
+            # burst, which is limited so that the rate limit also holds over short periods.
+            next_send = max(next_send, now - BURST_WINDOW)
+            while pending is not None and now >= next_send:
+                round_index, target_index, target, sequence, size = pending
+                if target_index == 0 and sequence % len(sizes) == 0:
+                    # Each round must respect the minimum per-target interval.
+                    if round_start is not None and now < round_start + self.interval:
+                        next_send = round_start + self.interval
+                        break
+                    round_start = now
+
+                self.transport.send(target, sequence, size)
+                last_sent = outstanding[(target, sequence)] = time.time()
+                next_send += gap
+                pending = next(probes, None)
+
+            if pending is None:
+                if not outstanding:
+                    break
+                deadline = last_sent + self.timeout
+                if now >= deadline:
+                    break
+            else:
+                deadline = next_send
+
+            readable = select.select([self.transport], [], [], max(0.0, deadline - now))[0]
+            if not readable:
+                continue
+
+            received = time.time()
+            for address, sequence in self.transport.receive():
+                sent = outstanding.pop((address, sequence), None)
+                if sent is None or received - sent > self.timeout:
+                    # Unknown, duplicate or late reply.
+                    continue
+
+                results[address][sizes[sequence % len(sizes)]].append((received - sent) * 1000.0)
+
+        return results
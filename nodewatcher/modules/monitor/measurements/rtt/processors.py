@@ -1,15 +1,23 @@
+import datetime
 import subprocess
 import threading
 import collections
-import math
 
 from django.conf import settings
+from django.db import models
 from django.utils import timezone
 
 from nodewatcher.core import models as core_models
 from nodewatcher.core.monitor import models as monitor_models, processors as monitor_processors
+from nodewatcher.core.registry import registration
+from nodewatcher.modules.monitor.datastream import processors as ds_processors
 from nodewatcher.utils import which, ipaddr
 
+from . import prober as rtt_prober
+
+# Maximum number of rows updated by a single query.
+UPDATE_BATCH_SIZE = 500
+
 
 class RttMeasurement(monitor_processors.NetworkProcessor):
     """
@@ -29,12 +37,6 @@ class RttMeasurement(monitor_processors.NetworkProcessor):
         :return: A (possibly) modified context and a (possibly) modified set of nodes
         """
 
-        # Detect the location of fping binary
-        fping = which.which('fping')
-        if not fping:
-            self.logger.error("Unable to find 'fping' binary!")
-            return context, nodes
-
         # Check if source node for measurements is configured and valid
         source_node_id = getattr(settings, 'MEASUREMENT_SOURCE_NODE', None)
         try:
@@ -56,6 +58,83 @@ class RttMeasurement(monitor_processors.NetworkProcessor):
             self.logger.warning("No nodes selected for measurement. Skipping RTT measurement.")
             return context, nodes
 
+        context.rtt.meta = {}
+        context.rtt.results = {}
+        if getattr(settings, 'MEASUREMENT_RTT_PROBER', 'fping') == 'builtin':
+            self.measure_builtin(context, node_ips)
+        else:
+            self.measure_fping(context, node_ips)
+
+        if not context.rtt.results:
+            self.logger.warning("No measurements in results, prober may have failed.")
+
+        return context, nodes
+
+    def measure_builtin(self, context, node_ips):
+        """
+        Performs RTT measurements using the in-process prober.
+
+        :param context: Current context
+        :param node_ips: A list of node IPv4 addresses
+        """
+
+        try:
+            if getattr(settings, 'MEASUREMENT_RTT_PROBE_TRANSPORT', 'icmp') == 'udp':
+                protocol = "UDP echo"
+                transport = rtt_prober.UdpTransport(getattr(settings, 'MEASUREMENT_RTT_PROBE_UDP_PORT', rtt_prober.UDP_ECHO_PORT))
+            else:
+                protocol = "ICMP ECHO"
+                transport = rtt_prober.IcmpTransport()
+        except rtt_prober.ProberError as error:
+            self.logger.error(str(error))
+            return
+
+        self.logger.info("Performing %s RTT measurements with %d packet sizes to %d nodes." % (
+            protocol, len(self.PACKET_SIZES), len(node_ips)
+        ))
+
+        prober = rtt_prober.Prober(
+            transport,
+            count=self.PACKET_COUNT,
+            interval=0.02,
+            rate=getattr(settings, 'MEASUREMENT_RTT_PROBE_RATE', 1000),
+            timeout=getattr(settings, 'MEASUREMENT_RTT_PROBE_TIMEOUT', 1.0),
+        )
+
+        start = timezone.now()
+        try:
+            measurements = prober.run(node_ips, self.PACKET_SIZES)
+        finally:
+            transport.close()
+        end = timezone.now()
+
+        self.logger.info("All %s RTT measurements completed." % protocol)
+
+        # Probes of all sizes are interleaved, so they share the measurement interval.
+        for size in self.PACKET_SIZES:
+            context.rtt.meta[size] = {
+                'start': start,
+                'end': end,
+            }
+
+        for node_ip, sizes in measurements.iteritems():
+            for size, rtt in sizes.iteritems():
+                context.rtt.results.setdefault(node_ip, {})[size] = rtt_prober.summarize(self.PACKET_COUNT, rtt)
+
+    def measure_fping(self, context, node_ips):
+        """
+        Performs RTT measurements by spawning fping.
+
+        :param context: Current context
+        :param node_ips: A list of node IPv4 addresses
+        """
+
+        # Detect the location of fping binary
+        fping = which.which('fping')
+        if not fping:
+            self.logger.error("Unable to find 'fping' binary!")
+            return
+
         # Perform ping tests of different sizes
         processes = []
         threads = []
@@ -100,16 +179,14 @@ class RttMeasurement(monitor_processors.NetworkProcessor):
             except OSError:
                 pass
 
-        self.logger.info("All ICMP ECHO RTT measurements completed.")
+        self.logger.info("All %s RTT measurements completed." % protocol)
 
-        context.rtt.meta = {}
         for size, start, end in metadata:
             context.rtt.meta[size] = {
                 'start': start,
                 'end': end,
             }
 
-        context.rtt.results = {}
         for size, results in outputs:
             for result in results:
                 try:
@@ -124,29 +201,135 @@ class RttMeasurement(monitor_processors.NetworkProcessor):
                     # TODO: Handle output for duplicate packets
                     continue
 
-                n = len(rtt)
-                s = sum(rtt)
-                ss = sum([x ** 2 for x in rtt])
-
-                if n == 0:
-                    std = None
-                elif n == 1:
-                    std = 0.0
-                else:
-                    std = math.sqrt((float(n) * ss - s ** 2) / (n * (n - 1)))
-
-                context.rtt.results.setdefault(str(node_ip), {})[size] = {
-                    'sent': self.PACKET_COUNT,
-                    'successful': n,
-                    'failed': max(0, self.PACKET_COUNT - n),
-                    'rtt_min': min(rtt) if rtt else None,
-                    'rtt_max': max(rtt) if rtt else None,
-                    'rtt_avg': (float(s) / n) if rtt else None,
-                    'rtt_std': std,
-                }
+                context.rtt.results.setdefault(str(node_ip), {})[size] = rtt_prober.summarize(self.PACKET_COUNT, rtt)
 
-        if not context.rtt.results:
-            self.logger.warning("No measurements in results, fping may have failed.")
+
+def _apply_result(rm, result, meta):
+    """
+    Copies RTT measurement results to a monitor instance.
+
+    :param rm: RTT measurement monitor instance
+    :param result: Measurement results for a packet size
+    :param meta: Measurement metadata for a packet size
+    """
+
+    rm.start = meta['start']
+    rm.end = meta['end']
+    rm.all_packets = result['sent']
+    rm.successful_packets = result['successful']
+    rm.failed_packets = result['failed']
+    rm.rtt_minimum = result['rtt_min']
+    rm.rtt_average = result['rtt_avg']
+    rm.rtt_maximum = result['rtt_max']
+    rm.rtt_std = result['rtt_std']
+    rm.packet_loss = 100 * rm.failed_packets / rm.all_packets
+
+
+class StoreNetwork(monitor_processors.NetworkProcessor):
+    """
+    A processor that stores RTT measurement results of all measured nodes at
+    once. Use StoreNode instead in contexts where results are only available
+    per node.
+    """
+
+    UPDATE_FIELDS = (
+        ('start', models.DateTimeField),
+        ('end', models.DateTimeField),
+        ('all_packets', models.PositiveIntegerField),
+        ('successful_packets', models.PositiveIntegerField),
+        ('failed_packets', models.PositiveIntegerField),
+        ('rtt_minimum', models.FloatField),
+        ('rtt_average', models.FloatField),
+        ('rtt_maximum', models.FloatField),
+        ('rtt_std', models.FloatField),
+        ('packet_loss', models.PositiveIntegerField),
+    )
+
+    def process(self, context, nodes):
+        """
+        Performs network-wide processing and selects the nodes that will be processed
+        in any following processors.
+
+        :param context: Current context
+        :param nodes: A set of nodes that are to be processed
+        :return: A (possibly) modified context and a (possibly) modified set of nodes
+        """
+
+        context.rtt.stored = True
+        nodes_by_pk = {node.pk: node for node in nodes}
+        source = context.rtt.source_node or None
+
+        # Resolve router identifiers of all nodes at once.
+        router_ids = {}
+        for node_id, router_id in core_models.RouterIdConfig.objects.filter(
+            root__in=nodes_by_pk.keys(),
+            rid_family='ipv4',
+        ).values_list('root_id', 'router_id'):
+            router_ids.setdefault(node_id, router_id)
+
+        node_results = {}
+        for node_id, router_id in router_ids.iteritems():
+            results = context.rtt.results.get(router_id, None)
+            node_context = context.for_node[node_id]
+            node_context.node_available = bool(results)
+            node_context.node_responds = False
+            if not results:
+                continue
+
+            node_results[node_id] = dict(results)
+            # Mark the node as responding if at least one packet was delivered
+            if any([result['successful'] > 0 for result in results.itervalues()]):
+                node_context.node_responds = True
+
+        if not node_results:
+            return context, nodes
+
+        # Update existing measurement monitors.
+        updated = []
+        for rm in monitor_models.RttMeasurementMonitor.objects.filter(
+            root__in=node_results.keys(),
+            source=source,
+        ):
+            result = node_results[rm.root_id].pop(rm.packet_size, None)
+            if result is None:
+                continue
+
+            rm.root = nodes_by_pk[rm.root_id]
+            _apply_result(rm, result, context.rtt.meta[rm.packet_size])
+            updated.append(rm)
+
+        for offset in xrange(0, len(updated), UPDATE_BATCH_SIZE):
+            batch = updated[offset:offset + UPDATE_BATCH_SIZE]
+
+            def case(name, field_class):
+                return models.Case(
+                    *[models.When(pk=rm.pk, then=models.Value(getattr(rm, name))) for rm in batch],
+                    output_field=field_class(null=True)
+                )
+
+            monitor_models.RttMeasurementMonitor.objects.filter(pk__in=[rm.pk for rm in batch]).update(
+                **{name: case(name, field_class) for name, field_class in self.UPDATE_FIELDS}
+            )
+
+        # Create missing measurement monitors.
+        created = []
+        for node_id, results in node_results.iteritems():
+            for size, result in results.iteritems():
+                rm = monitor_models.RttMeasurementMonitor(root=nodes_by_pk[node_id], packet_size=size, source=source)
+                _apply_result(rm, result, context.rtt.meta[size])
+                # Bulk creation bypasses save, so the polymorphic type must be set explicitly.
+                rm.pre_save_polymorphic()
+                created.append(rm)
+
+        if created:
+            # PostgreSQL returns primary keys of bulk inserted rows.
+            created = monitor_models.RttMeasurementMonitor.objects.bulk_create(created)
+
+        if updated or created:
+            registration.point('node.monitoring').changed()
+
+        # Store all datapoints in a single batch.
+        ds_processors.insert_items(updated + created, datetime.datetime.utcnow())
 
         return context, nodes
 
@@ -165,6 +348,10 @@ class StoreNode(monitor_processors.NodeProcessor):
         :return: A (possibly) modified context
         """
 
+        # Results have already been stored for all nodes.
+        if context.rtt.stored is True:
+            return context
+
         try:
             router_id = node.config.core.routerid(queryset=True).filter(rid_family='ipv4')[0].router_id
         except IndexError:
@@ -186,16 +373,7 @@ class StoreNode(monitor_processors.NodeProcessor):
                 packet_size=size,
                 source=context.rtt.source_node,
             )
-            rm.start = context.rtt.meta[size]['start']
-            rm.end = context.rtt.meta[size]['end']
-            rm.all_packets = result['sent']
-            rm.successful_packets = result['successful']
-            rm.failed_packets = result['failed']
-            rm.rtt_minimum = result['rtt_min']
-            rm.rtt_average = result['rtt_avg']
-            rm.rtt_maximum = result['rtt_max']
-            rm.rtt_std = result['rtt_std']
-            rm.packet_loss = 100 * rm.failed_packets / rm.all_packets
+            _apply_result(rm, result, context.rtt.meta[size])
             rm.save()
 
             # Mark the node as responding if at least one packet was delivered
@@ -0,0 +1,109 @@
+import os
+import socket
+import threading
+
+from django import test as django_test
+
+from . import prober
+
+
+class LoopbackTransport(prober.ProbeTransport):
+    """
+    Transport which immediately replies to all probes, except those sent to
+    unreachable addresses.
+    """
+
+    def __init__(self, unreachable=()):
+        self.unreachable = set(unreachable)
+        self.sent = []
+        self.replies = []
+        self.read_fd, self.write_fd = os.pipe()
+
+    def fileno(self):
+        return self.read_fd
+
+    def send(self, address, sequence, size):
+        self.sent.append((address, sequence, size))
+        if address in self.unreachable:
+            return
+
+        self.replies.append((address, sequence))
+        os.write(self.write_fd, 'x')
+
+    def receive(self):
+        os.read(self.read_fd, len(self.replies))
+        replies, self.replies = self.replies, []
+        return replies
+
+    def close(self):
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+
+class RttProberTestCase(django_test.SimpleTestCase):
+    def test_prober(self):
+        transport = LoopbackTransport(unreachable=['10.0.0.3'])
+        engine = prober.Prober(transport, count=3, interval=0.001, rate=10000, timeout=0.05)
+        try:
+            results = engine.run(['10.0.0.1', '10.0.0.2', '10.0.0.3'], [56, 100])
+        finally:
+            transport.close()
+
+        self.assertEqual(len(transport.sent), 18)
+        self.assertEqual(len(results['10.0.0.1'][56]), 3)
+        self.assertEqual(len(results['10.0.0.2'][100]), 3)
+        self.assertEqual(len(results['10.0.0.3'][56]), 0)
+
+        # Sequence numbers must identify the probe size.
+        for address, sequence, size in transport.sent:
+            self.assertEqual([56, 100][sequence % 2], size)
+
+    def test_udp_transport(self):
+        # Echo service, which does not answer the first probe.
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        self.addCleanup(server.close)
+
+        def echo():
+            dropped = False
+            while True:
+                try:
+                    data, address = server.recvfrom(65535)
+                except socket.error:
+                    return
+                if not data:
+                    return
+                if not dropped:
+                    dropped = True
+                    continue
+                server.sendto(data, address)
+
+        thread = threading.Thread(target=echo)
+        thread.daemon = True
+        thread.start()
+
+        transport = prober.UdpTransport(port=server.getsockname()[1])
+        engine = prober.Prober(transport, count=3, interval=0.001, rate=10000, timeout=0.5)
+        try:
+            results = engine.run(['127.0.0.1'], [56, 100])
+        finally:
+            transport.close()
+            # Stop the echo service.
+            server.sendto('', server.getsockname())
+            thread.join()
+
+        self.assertEqual(len(results['127.0.0.1'][56]), 2)
+        self.assertEqual(len(results['127.0.0.1'][100]), 3)
+
+    def test_summarize(self):
+        result = prober.summarize(4, [1.0, 2.0, 3.0])
+        self.assertEqual(result['successful'], 3)
+        self.assertEqual(result['failed'], 1)
+        self.assertEqual(result['rtt_min'], 1.0)
+        self.assertEqual(result['rtt_max'], 3.0)
+        self.assertAlmostEqual(result['rtt_avg'], 2.0)
+        self.assertAlmostEqual(result['rtt_std'], 1.0)
+
+        result = prober.summarize(2, [])
+        self.assertEqual(result['failed'], 2)
+        self.assertIsNone(result['rtt_avg'])
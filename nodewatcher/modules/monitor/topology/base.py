@@ -45,7 +45,7 @@ class LinkAttribute(TopologyAttribute):
 
         :param link_class: Topology link class
         :param name: Unique name for storage in the topology
-        :param value: Constant value or callable
+        :param value: Constant value or callable, which receives a row with the link's field values
         """
 
         if not issubclass(link_class, monitor_models.TopologyLink):
@@ -0,0 +1,5 @@
+from nodewatcher.core.api import urls as api_urls
+
+from . import views
+
+api_urls.v2_api.register('topology', views.TopologyViewSet, base_name='topology')
@@ -1,18 +1,27 @@
-from django.db import models
+from django.conf import settings
 from django.utils.translation import gettext_noop as _
 
 from django_datastream import datastream
 
-from nodewatcher.core import models as core_models
-from nodewatcher.core.monitor import processors as monitor_processors, models as monitor_models
+from nodewatcher.core.monitor import processors as monitor_processors
 from nodewatcher.modules.monitor.datastream import base as ds_base, fields as ds_fields
 from nodewatcher.modules.monitor.datastream.pool import pool as ds_pool
 
-from . import base as tp_base
-from .pool import pool as tp_pool
+from . import snapshot as tp_snapshot
 
 
-class TopologyStreams(ds_base.StreamsBase):
+class TopologyStreamsBase(ds_base.StreamsBase):
+    def get_stream_query_tags(self):
+        return {'module': 'topology'}
+
+    def get_stream_tags(self):
+        return {'module': 'topology'}
+
+    def get_stream_highest_granularity(self):
+        return datastream.Granularity.Minutes
+
+
+class TopologyStreams(TopologyStreamsBase):
     topology = ds_fields.GraphField(tags={
         'title': _("Network topology"),
         'description': _("Network topology."),
@@ -21,24 +30,28 @@ class TopologyStreams(ds_base.StreamsBase):
         }
     })
 
-    def get_stream_query_tags(self):
-        return {'module': 'topology'}
 
-    def get_stream_tags(self):
-        return {'module': 'topology'}
-
-    def get_stream_highest_granularity(self):
-        return datastream.Granularity.Minutes
+class TopologyDeltaStreams(TopologyStreamsBase):
+    topology_delta = ds_fields.DeltaGraphField(
+        attribute='topology',
+        keyframe_interval=getattr(settings, 'TOPOLOGY_DELTA_KEYFRAME_INTERVAL', 60),
+        # Nodes may be linked by multiple routing protocols at the same time.
+        edge_key=('f', 't', 'proto'),
+        tags={
+            'title': _("Network topology"),
+            'description': _("Network topology stored as keyframes and deltas."),
+        },
+    )
 
 
 class TopologyStreamsData(object):
-    def __init__(self, vertices, edges):
-        self.topology = {
-            'v': [dict(i=uuid, **attrs) for uuid, attrs in vertices.iteritems()],
-            'e': edges,
-        }
+    def __init__(self, snapshot):
+        self.topology = snapshot.as_graph()
 
-ds_pool.register(TopologyStreamsData, TopologyStreams)
+if getattr(settings, 'TOPOLOGY_DELTA_ENCODING', False):
+    ds_pool.register(TopologyStreamsData, TopologyDeltaStreams)
+else:
+    ds_pool.register(TopologyStreamsData, TopologyStreams)
 
 
 class Topology(monitor_processors.NetworkProcessor):
@@ -47,6 +60,14 @@ class Topology(monitor_processors.NetworkProcessor):
     into datastream.
     """
 
+    def __init__(self, **kwargs):
+        """
+        Class constructor.
+        """
+
+        super(Topology, self).__init__(**kwargs)
+        self._builder = tp_snapshot.TopologySnapshotBuilder()
+
     def process(self, context, nodes):
         """
         Performs network-wide processing and selects the nodes that will be processed
@@ -57,54 +78,7 @@ class Topology(monitor_processors.NetworkProcessor):
         :return: A (possibly) modified context and a (possibly) modified set of nodes
         """
 
-        vertices = {}
-        edges = []
-        for link in monitor_models.TopologyLink.objects.select_related('monitor').all():
-            source_id = str(link.monitor.root_id)
-            destination_id = str(link.peer_id)
-
-            # Add vertex UUIDs
-            vertices[source_id] = {}
-            vertices.setdefault(destination_id, {})
-            # Add edges
-            edge = {'f': source_id, 't': destination_id}
-            # Add any extra link attributes
-            for attribute in tp_pool.get_attributes(tp_base.LinkAttribute, link_class=link.__class__):
-                if callable(attribute.value):
-                    value = attribute.value(link)
-                else:
-                    value = attribute.value
-
-                edge[attribute.name] = value
-
-            edges.append(edge)
-
-        # Fetch per-node attributes
-        node_attributes = tp_pool.get_attributes(tp_base.NodeAttribute)
-
-        qs = core_models.Node.objects.all()
-        qs = qs.regpoint('monitoring').registry_fields(status='core.status__network')
-        qs = qs.filter(models.Q(pk__in=vertices.keys()) | models.Q(status='up'))
-        qs = qs.regpoint('config')
-        for attr in node_attributes:
-            try:
-                qs = qs.registry_fields(**{attr.name: attr.field})
-            except (TypeError, ValueError):
-                pass
-
-        for node in qs:
-            data = {}
-            for attr in node_attributes:
-                value = getattr(node, attr.name, None)
-                if value is not None:
-                    # Apply any registered node attribute transformations
-                    if attr.transform is not None:
-                        value = attr.transform(value)
-                    data[attr.name] = value
-
-            vertices[node.pk] = data
-
         # Prepare graph for datastream processor
-        context.datastream.topology = TopologyStreamsData(vertices, edges)
+        context.datastream.topology = TopologyStreamsData(self._builder.build())
 
         return context, nodes
@@ -0,0 +1,279 @@
+import array
+import collections
+
+from django.contrib.contenttypes import models as contenttypes_models
+from django.db import models
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.monitor import models as monitor_models
+from nodewatcher.core.registry import expression, exceptions as registry_exceptions, lookup
+
+from . import base
+from .pool import pool
+
+
+class TopologySnapshot(object):
+    """
+    Columnar representation of the network topology graph. Vertices are stored
+    in a list and addressed by their position, edges are stored as two arrays
+    of vertex positions and attributes are stored as columns aligned with either
+    vertices or edges.
+    """
+
+    def __init__(self):
+        """
+        Class constructor.
+        """
+
+        self.vertices = []
+        self.index = {}
+        self.vertex_attributes = collections.OrderedDict()
+        self.sources = array.array('l')
+        self.targets = array.array('l')
+        self.edge_attributes = collections.OrderedDict()
+
+    def add_vertex(self, vertex_id):
+        """
+        Adds a vertex to the snapshot if it does not yet exist.
+
+        :param vertex_id: Vertex identifier (node UUID)
+        :return: Vertex position
+        """
+
+        try:
+            return self.index[vertex_id]
+        except KeyError:
+            position = self.index[vertex_id] = len(self.vertices)
+            self.vertices.append(vertex_id)
+            for column in self.vertex_attributes.itervalues():
+                column.append(None)
+            return position
+
+    def set_vertex_attribute(self, position, name, value):
+        """
+        Sets a vertex attribute.
+
+        :param position: Vertex position
+        :param name: Attribute name
+        :param value: Attribute value
+        """
+
+        try:
+            column = self.vertex_attributes[name]
+        except KeyError:
+            column = self.vertex_attributes[name] = [None] * len(self.vertices)
+
+        column[position] = value
+
+    def add_edge(self, source_id, target_id):
+        """
+        Adds an edge to the snapshot, adding any missing vertices.
+
+        :param source_id: Source vertex identifier
+        :param target_id: Target vertex identifier
+        :return: Edge position
+        """
+
+        position = len(self.sources)
+        self.sources.append(self.add_vertex(source_id))
+        self.targets.append(self.add_vertex(target_id))
+        for column in self.edge_attributes.itervalues():
+            column.append(None)
+        return position
+
+    def set_edge_attribute(self, position, name, value):
+        """
+        Sets an edge attribute.
+
+        :param position: Edge position
+        :param name: Attribute name
+        :param value: Attribute value
+        """
+
+        try:
+            column = self.edge_attributes[name]
+        except KeyError:
+            column = self.edge_attributes[name] = [None] * len(self.sources)
+
+        column[position] = value
+
+    def as_graph(self):
+        """
+        Returns this snapshot in the vertex/edge list form expected by datastream
+        graph fields. Attributes with missing values are omitted.
+        """
+
+        vertices = [{'i': vertex_id} for vertex_id in self.vertices]
+        for name, column in self.vertex_attributes.iteritems():
+            for vertex, value in zip(vertices, column):
+                if value is not None:
+                    vertex[name] = value
+
+        vertices_list = self.vertices
+        edges = [
+            {'f': vertices_list[source], 't': vertices_list[target]}
+            for source, target in zip(self.sources, self.targets)
+        ]
+        for name, column in self.edge_attributes.iteritems():
+            for edge, value in zip(edges, column):
+                if value is not None:
+                    edge[name] = value
+
+        return {'v': vertices, 'e': edges}
+
+
+class LinkClassDescriptor(object):
+    """
+    Describes how attributes of a specific topology link class are loaded.
+    """
+
+    def __init__(self, link_class):
+        """
+        Class constructor.
+
+        :param link_class: Topology link class
+        """
+
+        self.link_class = link_class
+        self.attributes = list(pool.get_attributes(base.LinkAttribute, link_class=link_class))
+        self.fields = [field.attname for field in link_class._meta.concrete_fields]
+        self.pk_field = link_class._meta.pk.attname
+        # Callable attributes receive a lightweight row instead of a model instance.
+        self.row_class = collections.namedtuple('%sRow' % link_class.__name__, self.fields)
+
+    def load(self, ctype_id):
+        """
+        Loads attribute values for all links of this class.
+
+        :param ctype_id: Content type identifier of the link class
+        :return: A dictionary mapping link primary keys to lists of (name, value) tuples
+        """
+
+        result = {}
+        if not self.attributes:
+            return result
+
+        queryset = self.link_class.objects.non_polymorphic().filter(polymorphic_ctype_id=ctype_id)
+        for row in queryset.values_list(*self.fields):
+            row = self.row_class._make(row)
+            values = []
+            for attribute in self.attributes:
+                if callable(attribute.value):
+                    value = attribute.value(row)
+                else:
+                    value = attribute.value
+
+                values.append((attribute.name, value))
+
+            result[getattr(row, self.pk_field)] = values
+
+        return result
+
+
+class TopologySnapshotBuilder(object):
+    """
+    Builds topology snapshots using a small number of flat queries.
+    """
+
+    def __init__(self):
+        """
+        Class constructor.
+        """
+
+        self._link_descriptors = {}
+
+    def get_link_descriptor(self, link_class):
+        """
+        Returns a cached link class descriptor.
+
+        :param link_class: Topology link class
+        """
+
+        try:
+            return self._link_descriptors[link_class]
+        except KeyError:
+            descriptor = self._link_descriptors[link_class] = LinkClassDescriptor(link_class)
+            return descriptor
+
+    def get_node_selectors(self):
+        """
+        Resolves registered node attributes into ORM selectors.
+
+        :return: A list of (attribute, selector) tuples
+        """
+
+        parser = expression.LookupExpressionParser()
+        selectors = []
+        for attribute in pool.get_attributes(base.NodeAttribute):
+            try:
+                info = parser.parse(attribute.field)
+                if not info.registration_point:
+                    info.registration_point = 'config'
+
+                selector, _, multiple = lookup.selector_for_lookup(core_models.Node, info)
+            except (TypeError, ValueError, KeyError, registry_exceptions.RegistryException):
+                continue
+
+            # Projecting items with multiple models would produce multiple rows per node.
+            if multiple:
+                continue
+
+            selectors.append((attribute, selector))
+
+        return selectors
+
+    def build(self):
+        """
+        Builds a snapshot of the current network topology.
+
+        :return: A TopologySnapshot instance
+        """
+
+        snapshot = TopologySnapshot()
+
+        # Load all links and group them by their concrete class.
+        links = monitor_models.TopologyLink.objects.non_polymorphic().values_list(
+            'pk', 'monitor__root_id', 'peer_id', 'polymorphic_ctype_id'
+        )
+        link_ctypes = collections.defaultdict(list)
+        for link_id, source_id, destination_id, ctype_id in links.iterator():
+            link_ctypes[ctype_id].append((link_id, snapshot.add_edge(str(source_id), str(destination_id))))
+
+        # Load any extra link attributes.
+        for ctype_id, edges in link_ctypes.iteritems():
+            link_class = contenttypes_models.ContentType.objects.get_for_id(ctype_id).model_class()
+            if link_class is None:
+                continue
+
+            values = self.get_link_descriptor(link_class).load(ctype_id)
+            if not values:
+                continue
+
+            for link_id, edge in edges:
+                for name, value in values.get(link_id, ()):
+                    snapshot.set_edge_attribute(edge, name, value)
+
+        # Load per-node attributes for all linked nodes and nodes that are up.
+        selectors = self.get_node_selectors()
+        status_selector = lookup.selector_for_lookup(
+            core_models.Node,
+            expression.LookupExpression(registration_point='monitoring', registry_id='core.status', field=['network']),
+        )[0]
+
+        queryset = core_models.Node.objects.filter(
+            models.Q(pk__in=list(snapshot.vertices)) | models.Q(**{status_selector: 'up'})
+        ).values_list('pk', *[selector for _, selector in selectors])
+
+        for row in queryset.iterator():
+            position = snapshot.add_vertex(str(row[0]))
+            for (attribute, _), value in zip(selectors, row[1:]):
+                if value is None:
+                    continue
+
+                # Apply any registered node attribute transformations.
+                if attribute.transform is not None:
+                    value = attribute.transform(value)
+
+                snapshot.set_vertex_attribute(position, attribute.name, value)
+
+        return snapshot
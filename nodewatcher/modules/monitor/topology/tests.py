@@ -0,0 +1,77 @@
+from django import test as django_test
+from django.contrib.gis import geos
+
+from nodewatcher.core import models as core_models
+from nodewatcher.core.generator.cgm import models as cgm_models
+from nodewatcher.core.monitor import models as monitor_models, processors as monitor_processors
+from nodewatcher.modules.administration.location import models as location_models
+from nodewatcher.modules.administration.status import models as status_models
+from nodewatcher.modules.administration.types import models as types_models
+from nodewatcher.modules.routing.olsr import models as olsr_models
+
+from . import processors, snapshot
+
+
+class TopologySnapshotTestCase(django_test.TestCase):
+    def setUp(self):
+        self.a = self.create_node('up', name='A', type='wireless', geolocation=geos.Point(14.5, 46.05))
+        self.b = self.create_node('up', type='backbone')
+        self.c = self.create_node('down')
+        # Nodes without links are only included when they are up.
+        self.d = self.create_node('up')
+        self.e = self.create_node('down')
+
+        rtm_a = self.create_monitor(self.a)
+        rtm_b = self.create_monitor(self.b)
+        olsr_models.OlsrTopologyLink.objects.create(monitor=rtm_a, peer=self.b, lq=1.0, ilq=0.5)
+        olsr_models.OlsrTopologyLink.objects.create(monitor=rtm_b, peer=self.a, lq=0.5, ilq=1.0)
+        # Generic links have no extra attributes.
+        monitor_models.TopologyLink.objects.create(monitor=rtm_b, peer=self.c)
+
+    def create_node(self, network, name=None, type=None, geolocation=None):
+        node = core_models.Node()
+        node.save()
+        node.monitoring.core.status(create=status_models.StatusMonitor, network=network).save()
+        if name is not None:
+            node.config.core.general(create=cgm_models.CgmGeneralConfig, name=name).save()
+        if type is not None:
+            node.config.core.type(create=types_models.TypeConfig, type=type).save()
+        if geolocation is not None:
+            node.config.core.location(create=location_models.LocationConfig, geolocation=geolocation).save()
+        return node
+
+    def create_monitor(self, node):
+        rtm = node.monitoring.network.routing.topology(
+            create=olsr_models.OlsrRoutingTopologyMonitor,
+            protocol=olsr_models.OLSR_PROTOCOL_NAME,
+        )
+        rtm.save()
+        return rtm
+
+    def test_build(self):
+        topology = snapshot.TopologySnapshotBuilder().build()
+        self.assertEqual(len(topology.sources), 3)
+        self.assertItemsEqual(topology.vertices, [str(node.pk) for node in (self.a, self.b, self.c, self.d)])
+
+        position = topology.index[str(self.a.pk)]
+        self.assertEqual(topology.vertex_attributes['n'][position], 'A')
+        self.assertEqual(topology.vertex_attributes['t'][position], 'wireless')
+        self.assertEqual(topology.vertex_attributes['l'][position], (14.5, 46.05))
+
+    def test_streams_data(self):
+        context = monitor_processors.ProcessorContext()
+        context, nodes = processors.Topology().process(context, set())
+        self.assertEqual(nodes, set())
+
+        graph = context.datastream.topology.topology
+        self.assertItemsEqual(graph['v'], [
+            {'i': str(self.a.pk), 'n': 'A', 't': 'wireless', 'l': (14.5, 46.05)},
+            {'i': str(self.b.pk), 't': 'backbone'},
+            {'i': str(self.c.pk)},
+            {'i': str(self.d.pk)},
+        ])
+        self.assertItemsEqual(graph['e'], [
+            {'f': str(self.a.pk), 't': str(self.b.pk), 'proto': 'olsr', 'lq': 1.0, 'ilq': 0.5},
+            {'f': str(self.b.pk), 't': str(self.a.pk), 'proto': 'olsr', 'lq': 0.5, 'ilq': 1.0},
+            {'f': str(self.b.pk), 't': str(self.c.pk)},
+        ])
@@ -0,0 +1,42 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from rest_framework import exceptions, response, viewsets
+
+from django_datastream import datastream
+
+from . import processors
+
+
+class TopologyViewSet(viewsets.ViewSet):
+    """
+    Endpoint for the network topology graph.
+    """
+
+    def list(self, request):
+        """
+        Returns the latest network topology graph or the graph at a specific
+        UNIX timestamp given by the ``at`` query parameter.
+        """
+
+        timestamp = request.query_params.get('at', None)
+        if timestamp is not None:
+            try:
+                timestamp = datetime.datetime.fromtimestamp(int(timestamp), timezone.utc)
+            except (ValueError, OverflowError):
+                raise exceptions.ParseError("Invalid timestamp.")
+
+        if getattr(settings, 'TOPOLOGY_DELTA_ENCODING', False):
+            descriptor = processors.TopologyDeltaStreams(None)
+            field = descriptor.topology_delta
+        else:
+            descriptor = processors.TopologyStreams(None)
+            field = descriptor.topology
+
+        graph = field.get_graph(descriptor, datastream, timestamp=timestamp)
+        if graph is None:
+            graph = {'v': [], 'e': []}
+
+        return response.Response(graph)
@@ -1,5 +1,8 @@
+import array
+import itertools
 import radix
 import socket
+import struct
 import telnetlib
 
 
@@ -7,6 +10,71 @@ class BabelParseFailed(Exception):
     pass
 
 
+def encode_address(address):
+    """
+    Encodes a textual address into an integer.
+
+    :param address: Textual IPv4 or IPv6 address
+    :return: A tuple (family, integer address)
+    """
+
+    try:
+        if ':' in address:
+            high, low = struct.unpack('!QQ', socket.inet_pton(socket.AF_INET6, address))
+            return socket.AF_INET6, (high << 64) | low
+
+        return socket.AF_INET, struct.unpack('!I', socket.inet_aton(address))[0]
+    except (socket.error, struct.error):
+        raise ValueError("Invalid address '%s'." % address)
+
+
+class BabelRouteTable(object):
+    """
+    Compact representation of a route table. Route prefixes are stored as
+    integer-encoded networks and prefix lengths, separately for each family.
+    """
+
+    def __init__(self):
+        """
+        Class constructor.
+        """
+
+        self.networks = {
+            socket.AF_INET: array.array('L'),
+            # IPv6 addresses do not fit into fixed-size integer arrays.
+            socket.AF_INET6: [],
+        }
+        self.prefix_lengths = {
+            socket.AF_INET: array.array('B'),
+            socket.AF_INET6: array.array('B'),
+        }
+
+    def __len__(self):
+        return sum([len(networks) for networks in self.networks.itervalues()])
+
+    def add(self, network, prefix_length):
+        """
+        Adds a route prefix.
+
+        :param network: Textual network address
+        :param prefix_length: Prefix length
+        """
+
+        family, network = encode_address(network)
+        self.networks[family].append(network)
+        self.prefix_lengths[family].append(prefix_length)
+
+    def iter_family(self, family):
+        """
+        Returns an iterator over (network, prefix length) tuples of routes in the
+        given family.
+
+        :param family: Address family
+        """
+
+        return itertools.izip(self.networks[family], self.prefix_lengths[family])
+
+
 class BabelParser(object):
     """
     Parser for babeld data feed.
@@ -115,3 +183,15 @@ class BabelParser(object):
         """
 
         return self._get_data()['routes']
+
+    @property
+    def route_table(self):
+        """
+        Returns a compact route table containing all the imported routes.
+        """
+
+        table = BabelRouteTable()
+        for node in self.routes.nodes():
+            table.add(node.network, node.prefixlen)
+
+        return table
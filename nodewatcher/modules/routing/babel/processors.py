@@ -1,13 +1,66 @@
+import bisect
+import socket
+
 from django.conf import settings
 from django.utils import timezone
 
 from nodewatcher.core import models as core_models
 from nodewatcher.core.monitor import processors as monitor_processors, events as monitor_events
 from nodewatcher.modules.monitor.sources.http import processors as http_processors
+from nodewatcher.modules.routing import snapshots as routing_snapshots
 from nodewatcher.utils import ipaddr
 
 from . import models as babel_models, parser as babel_parser
 
+# Routes with longer prefixes are specific enough to count a node as routable.
+ROUTABLE_PREFIX_LENGTH = 20
+
+
+class RouterIdIndex(object):
+    """
+    Sorted index of node router identifiers, which supports looking up all
+    router identifiers covered by a prefix.
+    """
+
+    def __init__(self, router_ids):
+        """
+        Class constructor.
+
+        :param router_ids: An iterable of (router identifier, node identifier) tuples
+        """
+
+        entries = {socket.AF_INET: [], socket.AF_INET6: []}
+        for router_id, node_id in router_ids:
+            try:
+                family, address = babel_parser.encode_address(router_id)
+            except ValueError:
+                continue
+
+            entries[family].append((address, node_id))
+
+        self.addresses = {}
+        self.nodes = {}
+        for family, items in entries.iteritems():
+            items.sort()
+            self.addresses[family] = [address for address, _ in items]
+            self.nodes[family] = [node_id for _, node_id in items]
+
+    def match(self, family, network, prefix_length):
+        """
+        Returns identifiers of nodes with router identifiers inside a prefix.
+
+        :param family: Address family
+        :param network: Integer-encoded network address
+        :param prefix_length: Prefix length
+        """
+
+        host_bits = (32 if family == socket.AF_INET else 128) - prefix_length
+        network = (network >> host_bits) << host_bits
+        addresses = self.addresses[family]
+        start = bisect.bisect_left(addresses, network)
+        end = bisect.bisect_right(addresses, network | ((1 << host_bits) - 1), start)
+        return self.nodes[family][start:end]
+
 
 class IncludeRoutableNodes(monitor_processors.NetworkProcessor):
     """
@@ -26,32 +79,37 @@ class IncludeRoutableNodes(monitor_processors.NetworkProcessor):
 
         # Fetch data from the Babel daemon.
         self.logger.info("Parsing babeld information...")
-        babel = babel_parser.BabelParser(
-            host=getattr(settings, 'BABELD_MONITOR_HOST', '::1'),
-            port=getattr(settings, 'BABELD_MONITOR_PORT', 33123),
-        )
+        host = getattr(settings, 'BABELD_MONITOR_HOST', '::1')
+        port = getattr(settings, 'BABELD_MONITOR_PORT', 33123)
+        babel = babel_parser.BabelParser(host=host, port=port)
 
         try:
-            routes = babel.routes
+            # Snapshots are shared with other runs that process the same daemon.
+            routes = routing_snapshots.RoutingSnapshotCache('babeld-%s-%s' % (host, port)).get(
+                lambda: babel.route_table
+            )
         except babel_parser.BabelParseFailed:
             self.logger.warning("Failed to parse babeld feeds!")
             return context, nodes
 
+        # Build an index of all node router identifiers.
+        router_ids = RouterIdIndex(core_models.RouterIdConfig.objects.filter(
+            rid_family__in=['ipv4', 'ipv6'],
+        ).values_list('router_id', 'root_id'))
+
+        # Walk the route table once and collect nodes covered by specific enough routes.
+        available = set()
+        for family in (socket.AF_INET, socket.AF_INET6):
+            for network, prefix_length in routes.iter_family(family):
+                if prefix_length > ROUTABLE_PREFIX_LENGTH:
+                    available.update(router_ids.match(family, network, prefix_length))
+
         # Determine which nodes are available.
-        for node in core_models.Node.objects.regpoint('config').registry_fields(
-            router_id='core.routerid__router_id'
-        ).registry_filter(
-            core_routerid__rid_family__in=['ipv4', 'ipv6'],
-        ):
-            for router_id in node.router_id.all():
-                # Try to find the most specific route for this router.
-                route = routes.search_best(router_id)
-                if route.prefixlen > 20:
-                    nodes.add(node)
-
-                    # A specific enough route exists for this node, count it as available.
-                    context.for_node[node.pk].node_available = True
-                    break
+        for node in core_models.Node.objects.filter(pk__in=available):
+            nodes.add(node)
+
+            # A specific enough route exists for this node, count it as available.
+            context.for_node[node.pk].node_available = True
 
         return context, nodes
 
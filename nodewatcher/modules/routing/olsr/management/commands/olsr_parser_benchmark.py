@@ -0,0 +1,82 @@
+import random
+import time
+
+from django.core.management import base
+
+from ... import parser as olsr_parser
+
+
+def generate_txtinfo(routers, degree, announces, aliases):
+    """
+    Generates a synthetic olsrd txtinfo dump.
+
+    :param routers: Number of routers
+    :param degree: Number of neighbours of each router
+    :param announces: Number of announced networks per router
+    :param aliases: Number of aliases per router
+    :return: A list of lines
+    """
+
+    def address(index, prefix=10):
+        return '%d.%d.%d.%d' % (prefix, (index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF)
+
+    lines = ['Table: Topology', 'Dest. IP\tLast hop IP\tLQ\tNLQ\tCost']
+    for router in xrange(routers):
+        for neighbour in random.sample(xrange(routers), min(degree, routers)):
+            lines.append('%s\t%s\t%.3f\t%.3f\t%.3f' % (
+                address(neighbour), address(router), random.random(), random.random(), 1 + random.random() * 10,
+            ))
+    lines.append('')
+
+    lines.extend(['Table: HNA', 'Destination\tGateway'])
+    for router in xrange(routers):
+        for announce in xrange(announces):
+            lines.append('%s/24\t%s' % (address((router * announces + announce) << 8, prefix=172), address(router)))
+    lines.append('')
+
+    lines.extend(['Table: MID', 'IP address\tAliases'])
+    for router in xrange(routers):
+        if aliases:
+            lines.append('%s\t%s' % (
+                address(router),
+                ';'.join([address(router * aliases + alias, prefix=11) for alias in xrange(aliases)]),
+            ))
+    lines.append('')
+
+    return [line + '\n' for line in lines]
+
+
+class Command(base.BaseCommand):
+    help = "Benchmarks the olsrd txtinfo parser on a synthetic dump."
+    requires_model_validation = False
+
+    def add_arguments(self, parser):
+        """Command arguments."""
+        parser.add_argument('--routers', type=int, default=5000, help="Number of routers")
+        parser.add_argument('--degree', type=int, default=8, help="Number of neighbours of each router")
+        parser.add_argument('--announces', type=int, default=2, help="Number of announced networks per router")
+        parser.add_argument('--aliases', type=int, default=2, help="Number of aliases per router")
+        parser.add_argument('--repeat', type=int, default=5, help="Number of benchmark repetitions")
+
+    def handle(self, *args, **options):
+        lines = generate_txtinfo(options['routers'], options['degree'], options['announces'], options['aliases'])
+        self.stdout.write("Generated synthetic dump with %d lines.\n" % len(lines))
+
+        parse_times = []
+        lookup_times = []
+        for _ in xrange(options['repeat']):
+            start_time = time.time()
+            index = olsr_parser.OlsrParser.parse(lines)
+            parse_times.append(time.time() - start_time)
+
+            # Lookups are what the global topology processor performs for each router.
+            start_time = time.time()
+            for router_id in index.get_router_ids():
+                index.get_neighbours(router_id)
+                index.get_announces(router_id)
+                index.get_aliases(router_id)
+            lookup_times.append(time.time() - start_time)
+
+        parse_time = min(parse_times)
+        self.stdout.write("Parse: %.3f s (%d lines/s)\n" % (parse_time, len(lines) / max(parse_time, 1e-9)))
+        self.stdout.write("Lookup: %.3f s for %d routers\n" % (min(lookup_times), len(index.neighbours)))
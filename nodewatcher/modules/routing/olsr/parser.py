@@ -1,12 +1,205 @@
+import array
+import socket
+import struct
 import urllib
 
-from nodewatcher.utils import ipaddr
-
 
 class OlsrParseFailed(Exception):
     pass
 
 
+class OlsrTopologyIndex(object):
+    """
+    Compact index of olsrd routing information keyed by router identifier. All
+    addresses are stored as integers and per-router adjacency information is
+    stored in arrays.
+    """
+
+    def __init__(self):
+        """
+        Class constructor.
+        """
+
+        self.version = None
+        self.neighbours = {}
+        self.announces = {}
+        self.aliases = {}
+
+    def encode_address(self, address):
+        """
+        Encodes a textual address into an integer.
+
+        :param address: Textual IPv4 or IPv6 address
+        :return: Integer representation of the address
+        """
+
+        version = 6 if ':' in address else 4
+        if self.version is None:
+            self.version = version
+        elif self.version != version:
+            raise ValueError("Mixed address families are not supported.")
+
+        try:
+            if version == 4:
+                return struct.unpack('!I', socket.inet_aton(address))[0]
+
+            high, low = struct.unpack('!QQ', socket.inet_pton(socket.AF_INET6, address))
+            return (high << 64) | low
+        except (socket.error, struct.error):
+            raise ValueError("Invalid address '%s'." % address)
+
+    def decode_address(self, address):
+        """
+        Decodes an integer address into its textual representation.
+
+        :param address: Integer representation of the address
+        :return: Textual address
+        """
+
+        if self.version == 4:
+            return socket.inet_ntoa(struct.pack('!I', address))
+
+        return socket.inet_ntop(socket.AF_INET6, struct.pack('!QQ', address >> 64, address & 0xFFFFFFFFFFFFFFFF))
+
+    def _address_array(self):
+        # Only IPv4 addresses fit into fixed-size integer arrays.
+        if self.version == 4:
+            return array.array('L')
+        return []
+
+    def add_link(self, source, destination, lq, ilq, cost):
+        """
+        Adds a topology link.
+        """
+
+        source = self.encode_address(source)
+        destination = self.encode_address(destination)
+        lq = float(lq)
+        ilq = float(ilq)
+        cost = float(cost)
+
+        try:
+            addresses, lqs, ilqs, costs = self.neighbours[source]
+        except KeyError:
+            addresses, lqs, ilqs, costs = self.neighbours[source] = (
+                self._address_array(),
+                array.array('d'),
+                array.array('d'),
+                array.array('d'),
+            )
+
+        addresses.append(destination)
+        lqs.append(lq)
+        ilqs.append(ilq)
+        costs.append(cost)
+
+    def add_announce(self, router_id, network):
+        """
+        Adds an announced network.
+        """
+
+        try:
+            network, prefix_length = network.split('/')
+            prefix_length = int(prefix_length)
+        except ValueError:
+            raise ValueError("Invalid network '%s'." % network)
+
+        network = self.encode_address(network)
+        self.announces.setdefault(self.encode_address(router_id), []).append((network, prefix_length))
+
+    def add_aliases(self, router_id, aliases):
+        """
+        Adds router aliases.
+        """
+
+        router_id = self.encode_address(router_id)
+        encoded = [self.encode_address(alias) for alias in aliases]
+
+        try:
+            self.aliases[router_id].extend(encoded)
+        except KeyError:
+            self.aliases[router_id] = self._address_array()
+            self.aliases[router_id].extend(encoded)
+
+    def get_router_ids(self):
+        """
+        Returns textual identifiers of all routers visible in the topology.
+        """
+
+        return [self.decode_address(router_id) for router_id in self.neighbours]
+
+    def iter_neighbour_addresses(self, router_id):
+        """
+        Returns textual addresses of all neighbours of a router.
+
+        :param router_id: Textual router identifier
+        """
+
+        try:
+            addresses = self.neighbours[self.encode_address(router_id)][0]
+        except (KeyError, ValueError):
+            return
+
+        for address in addresses:
+            yield self.decode_address(address)
+
+    def get_neighbours(self, router_id):
+        """
+        Returns neighbours of a router.
+
+        :param router_id: Textual router identifier
+        :return: A list of dictionaries with neighbour address and link metrics
+        """
+
+        try:
+            addresses, lqs, ilqs, costs = self.neighbours[self.encode_address(router_id)]
+        except (KeyError, ValueError):
+            return []
+
+        return [
+            {
+                'address': self.decode_address(address),
+                'lq': lq,
+                'ilq': ilq,
+                'cost': cost,
+            }
+            for address, lq, ilq, cost in zip(addresses, lqs, ilqs, costs)
+        ]
+
+    def get_announces(self, router_id):
+        """
+        Returns networks announced by a router.
+
+        :param router_id: Textual router identifier
+        :return: A list of dictionaries with announced networks
+        """
+
+        try:
+            announces = self.announces[self.encode_address(router_id)]
+        except (KeyError, ValueError):
+            return []
+
+        return [
+            {'dst_prefix': '%s/%d' % (self.decode_address(network), prefix_length)}
+            for network, prefix_length in announces
+        ]
+
+    def get_aliases(self, router_id):
+        """
+        Returns aliases of a router.
+
+        :param router_id: Textual router identifier
+        :return: A list of textual addresses
+        """
+
+        try:
+            aliases = self.aliases[self.encode_address(router_id)]
+        except (KeyError, ValueError):
+            return []
+
+        return [self.decode_address(alias) for alias in aliases]
+
+
 class OlsrParser(object):
     """
     A simple class for obtaining OLSR routing information from olsrd via
@@ -23,7 +216,59 @@ class OlsrParser(object):
 
         self.host = host
         self.port = port
-        self._tables = None
+        self._index = None
+
+    @staticmethod
+    def parse(lines):
+        """
+        Parses the txtinfo feed in a single pass.
+
+        :param lines: An iterable of txtinfo feed lines
+        :return: An OlsrTopologyIndex instance
+        """
+
+        index = OlsrTopologyIndex()
+        table = None
+        header = False
+        for line in lines:
+            line = line.strip()
+            if not line:
+                table = None
+                continue
+
+            if line.startswith('Table: '):
+                table = line[7:].strip().lower()
+                # Each table starts with a header line.
+                header = True
+                continue
+            elif header:
+                header = False
+                continue
+
+            if table == 'topology':
+                entry = line.split('\t')
+                try:
+                    dst, src, lq, ilq, etx = entry[:5]
+                    index.add_link(src, dst, lq, ilq, etx)
+                except ValueError:
+                    # Skip entries with INFINITE ETX value
+                    continue
+            elif table == 'hna':
+                entry = line.split('\t')
+                try:
+                    net, router_id = entry[:2]
+                    index.add_announce(router_id, net)
+                except ValueError:
+                    continue
+            elif table == 'mid':
+                entry = line.split('\t')
+                try:
+                    router_id, alias = entry[:2]
+                    index.add_aliases(router_id, alias.split(';'))
+                except ValueError:
+                    continue
+
+        return index
 
     def _fetch_data(self):
         """
@@ -31,79 +276,55 @@ class OlsrParser(object):
         """
 
         try:
-            data = urllib.urlopen(
+            response = urllib.urlopen(
                 'http://{host}:{port}/'.format(host=self.host, port=self.port)
-            ).read()
+            )
         except:
             raise OlsrParseFailed
 
         try:
-            tables = data.split('Table: ')[1:]
-            self._tables = {}
-            for table in tables:
-                table = table.strip().split('\n')
-                self._tables[table[0].strip().lower()] = [tuple(x.strip().split('\t')) for x in table[2:]]
-        except (ValueError, IndexError):
+            self._index = self.parse(response)
+        except (IOError, socket.error):
             raise OlsrParseFailed
+        finally:
+            response.close()
 
-    def get_topology(self):
+    def get_index(self):
         """
-        Returns topology information.
+        Returns the topology index.
         """
 
-        if self._tables is None:
+        if self._index is None:
             self._fetch_data()
 
-        # Parse topology information
-        topology = {}
-        for topo_entry in self._tables.get('topology', []):
-            dst, src, lq, ilq, etx = topo_entry[:5]
-            try:
-                topology.setdefault(src, []).append({
-                    'address': ipaddr.IPAddress(dst),
-                    'lq': float(lq),
-                    'ilq': float(ilq),
-                    'cost': float(etx),
-                })
-            except ValueError:
-                # Skip entries with INFINITE ETX value
-                continue
+        return self._index
+
+    def get_topology(self):
+        """
+        Returns topology information.
+        """
 
-        return topology
+        index = self.get_index()
+        return {router_id: index.get_neighbours(router_id) for router_id in index.get_router_ids()}
 
     def get_announces(self):
         """
         Returns node announces information.
         """
 
-        if self._tables is None:
-            self._fetch_data()
-
-        # Parse announced subnets information
-        announces = {}
-        for hna_entry in self._tables.get('hna', []):
-            net, router_id = hna_entry[:2]
-            announces.setdefault(router_id, []).append({
-                'dst_prefix': ipaddr.IPNetwork(net),
-            })
-
-        return announces
+        index = self.get_index()
+        return {
+            router_id: index.get_announces(router_id)
+            for router_id in [index.decode_address(x) for x in index.announces]
+        }
 
     def get_aliases(self):
         """
         Returns node announces information.
         """
 
-        if self._tables is None:
-            self._fetch_data()
-
-        # Parse router aliases information
-        aliases = {}
-        for mid_entry in self._tables.get('mid', []):
-            router_id, alias = mid_entry[:2]
-            tmp = aliases.setdefault(router_id, [])
-            tmp += [
-                ipaddr.IPAddress(x) for x in alias.split(';')
-            ]
-
-        return aliases
+        index = self.get_index()
+        return {
+            router_id: index.get_aliases(router_id)
+            for router_id in [index.decode_address(x) for x in index.aliases]
+        }
@@ -1,10 +1,14 @@
+import collections
 import uuid
 
 from django.conf import settings
+from django.db import models
 from django.utils import timezone
 
 from nodewatcher.core import models as core_models
 from nodewatcher.core.monitor import models as monitor_models, processors as monitor_processors, events as monitor_events
+from nodewatcher.core.registry import registration
+from nodewatcher.modules.routing import snapshots as routing_snapshots
 from nodewatcher.utils import ipaddr
 
 from . import models as olsr_models, parser as olsr_parser
@@ -26,22 +30,20 @@ class GlobalTopology(monitor_processors.NetworkProcessor):
         """
 
         self.logger.info("Parsing olsrd information...")
-        olsr_info = olsr_parser.OlsrParser(
-            host=getattr(settings, 'OLSRD_MONITOR_HOST', '127.0.0.1'),
-            port=getattr(settings, 'OLSRD_MONITOR_PORT', 2006),
-        )
+        host = getattr(settings, 'OLSRD_MONITOR_HOST', '127.0.0.1')
+        port = getattr(settings, 'OLSRD_MONITOR_PORT', 2006)
+        olsr_info = olsr_parser.OlsrParser(host=host, port=port)
 
         try:
-            topology = olsr_info.get_topology()
-            announces = olsr_info.get_announces()
-            aliases = olsr_info.get_aliases()
+            # Snapshots are shared with other runs that process the same daemon.
+            index = routing_snapshots.RoutingSnapshotCache('olsrd-%s-%s' % (host, port)).get(olsr_info.get_index)
         except olsr_parser.OlsrParseFailed:
             self.logger.warning("Failed to parse olsrd feeds!")
             return context, nodes
 
         # Create a mapping from router ids to nodes.
         self.logger.info("Mapping router IDs to node instances...")
-        visible_routers = set(topology.keys())
+        visible_routers = set(index.get_router_ids())
         registered_routers = set()
         router_id_map = {}
         for node in core_models.Node.objects.regpoint('config').registry_fields(
@@ -59,9 +61,9 @@ class GlobalTopology(monitor_processors.NetworkProcessor):
             # Store per-node routing data.
             olsr_data = context.for_node[node.pk].routing.olsr
             olsr_data.router_id = first_router_id
-            olsr_data.neighbours = topology.get(first_router_id, [])
-            olsr_data.announces = announces.get(first_router_id, [])
-            olsr_data.aliases = aliases.get(first_router_id, [])
+            olsr_data.neighbours = index.get_neighbours(first_router_id)
+            olsr_data.announces = index.get_announces(first_router_id)
+            olsr_data.aliases = index.get_aliases(first_router_id)
 
         self.logger.info("Creating unknown node instances...")
         for router_id in visible_routers.difference(registered_routers):
@@ -74,10 +76,10 @@ class GlobalTopology(monitor_processors.NetworkProcessor):
 
             # Store per-node routing data.
             olsr_data = context.for_node[node.pk].routing.olsr
-            olsr_data.router_id = first_router_id
-            olsr_data.neighbours = topology.get(first_router_id, [])
-            olsr_data.announces = announces.get(first_router_id, [])
-            olsr_data.aliases = aliases.get(first_router_id, [])
+            olsr_data.router_id = router_id
+            olsr_data.neighbours = index.get_neighbours(router_id)
+            olsr_data.announces = index.get_announces(router_id)
+            olsr_data.aliases = index.get_aliases(router_id)
 
             if created:
                 general_cfg = node.config.core.general(create=core_models.GeneralConfig)
@@ -91,12 +93,11 @@ class GlobalTopology(monitor_processors.NetworkProcessor):
                 ).save()
 
         # Prepare smaller router ID maps for each node.
-        for router_id, neighbours in topology.iteritems():
+        for router_id in visible_routers:
             node_id = router_id_map[router_id]
             olsr_data = context.for_node[node_id].routing.olsr
 
-            for neighbour in neighbours:
-                address = str(neighbour['address'])
+            for address in index.iter_neighbour_addresses(router_id):
                 olsr_data.router_id_map[address] = router_id_map[address]
 
         return context, nodes
@@ -167,6 +168,7 @@ class NodeTopology(monitor_processors.NodeProcessor):
                 announces = context.http.core.routing.olsr.exported_routes
                 aliases = context.http.core.routing.olsr.link_local
 
+        now = timezone.now()
         visible_lladdr = []
         visible_links = []
         visible_announces = []
@@ -174,57 +176,10 @@ class NodeTopology(monitor_processors.NodeProcessor):
         if version >= 1:
             # A list of link-local addresses of OLSR interfaces. This is required in order to be
             # able to generate a combined topology in case of push mode.
-            for address in aliases:
-                if isinstance(address, ipaddr.IPv4Address):
-                    interface = None
-                else:
-                    try:
-                        address, interface = address.split('%')
-                    except ValueError:
-                        interface = None
-
-                    address = ipaddr.IPv4Address(address)
-
-                lladdr, created = rtm.link_local.get_or_create(address=address)
-                lladdr.interface = interface
-                lladdr.save()
-                visible_lladdr.append(lladdr)
+            visible_lladdr = self.reconcile_link_local(rtm, aliases)
 
             # Neighbours.
-            for neighbour in neighbours:
-                if not push:
-                    try:
-                        dst_node = core_models.Node.objects.get(
-                            pk=context.routing.olsr.router_id_map.get(str(neighbour['address']), None)
-                        )
-                    except core_models.Node.DoesNotExist:
-                        # Skip unknown neighbour.
-                        self.logger.warning("Inconsistency in topology table for router ID %s!" % neighbour['address'])
-                        continue
-                else:
-                    # Attempt to resolve destination node.
-                    try:
-                        lladdr = olsr_models.LinkLocalAddress.objects.get(address=neighbour['address'])
-                    except olsr_models.LinkLocalAddress.DoesNotExist:
-                        # Skip unknown neighbour.
-                        continue
-
-                    dst_node = lladdr.router.root
-
-                elink, created = olsr_models.OlsrTopologyLink.objects.get_or_create(monitor=rtm, peer=dst_node)
-                elink.lq = neighbour['lq']
-                elink.ilq = neighbour['ilq']
-                elink.etx = neighbour['cost']
-                if push:
-                    # In push mode, link cost is reported as an integer.
-                    elink.etx = float(elink.etx) / 1024
-                elink.last_seen = timezone.now()
-                elink.save()
-                visible_links.append(elink)
-
-                if created:
-                    # TODO: This will still create one event for each end of the link.
-                    monitor_events.TopologyLinkEstablished(node, dst_node, olsr_models.OLSR_PROTOCOL_NAME).post()
+            visible_links = self.reconcile_links(context, node, rtm, neighbours, push, now)
 
             # Compute average values.
             if visible_links:
@@ -239,25 +194,228 @@ class NodeTopology(monitor_processors.NodeProcessor):
             context.datastream.olsr_links = visible_links
 
             # Setup networks in announce tables.
-            for announce in announces:
-                eannounce, created = olsr_models.OlsrRoutingAnnounceMonitor.objects.get_or_create(
-                    root=node,
-                    network=announce['dst_prefix'],
-                )
-                eannounce.status = 'ok'
-                eannounce.last_seen = timezone.now()
-                eannounce.save()
-                visible_announces.append(eannounce)
+            visible_announces = self.reconcile_announces(node, announces, now)
 
         # Remove all link-local addresses that do not exist anymore.
-        rtm.link_local.exclude(pk__in=[x.pk for x in visible_lladdr]).delete()
+        rtm.link_local.exclude(pk__in=visible_lladdr).delete()
         # Remove all links that do not exist anymore.
         rtm.links.exclude(pk__in=[x.pk for x in visible_links]).delete()
         # Remove all announces that do not exist anymore.
         node.monitoring.network.routing.announces(
             onlyclass=olsr_models.OlsrRoutingAnnounceMonitor, queryset=True
-        ).exclude(pk__in=[x.pk for x in visible_announces]).delete()
+        ).exclude(pk__in=visible_announces).delete()
 
         rtm.save()
 
         return context
+
+    def reconcile_link_local(self, rtm, aliases):
+        """
+        Brings stored link-local addresses of a router in line with the currently
+        visible ones.
+
+        :param rtm: OLSR routing topology monitor
+        :param aliases: A list of link-local addresses (optionally with interfaces)
+        :return: A list of primary keys of visible link-local addresses
+        """
+
+        desired = collections.OrderedDict()
+        for address in aliases:
+            if isinstance(address, ipaddr.IPv4Address):
+                interface = None
+            else:
+                try:
+                    address, interface = address.split('%')
+                except ValueError:
+                    interface = None
+
+                address = ipaddr.IPv4Address(address)
+
+            desired[_address_key(address)] = (address, interface)
+
+        visible = []
+        changed = {}
+        for lladdr in rtm.link_local.all():
+            key = _address_key(lladdr.address)
+            if key not in desired:
+                continue
+
+            # Duplicate addresses are removed as they are not part of the visible set.
+            address, interface = desired.pop(key)
+            if lladdr.interface != interface:
+                changed[lladdr.pk] = interface
+            visible.append(lladdr.pk)
+
+        if changed:
+            olsr_models.LinkLocalAddress.objects.filter(pk__in=changed.keys()).update(
+                interface=models.Case(
+                    *[models.When(pk=pk, then=models.Value(interface)) for pk, interface in changed.iteritems()],
+                    output_field=models.CharField()
+                )
+            )
+
+        if desired:
+            # PostgreSQL returns primary keys of bulk inserted rows.
+            created = olsr_models.LinkLocalAddress.objects.bulk_create([
+                olsr_models.LinkLocalAddress(router=rtm, address=address, interface=interface)
+                for address, interface in desired.itervalues()
+            ])
+            visible.extend([lladdr.pk for lladdr in created])
+
+        return visible
+
+    def reconcile_links(self, context, node, rtm, neighbours, push, now):
+        """
+        Brings stored topology links of a router in line with the currently visible
+        neighbours.
+
+        :param context: Current context
+        :param node: Node that is being processed
+        :param rtm: OLSR routing topology monitor
+        :param neighbours: A list of visible neighbours
+        :param push: True when processing in push context
+        :param now: Current timestamp
+        :return: A list of visible topology links
+        """
+
+        # Resolve all neighbour nodes at once.
+        if not push:
+            peers = {}
+            for neighbour in neighbours:
+                peer_id = context.routing.olsr.router_id_map.get(str(neighbour['address']), None)
+                if peer_id is not None:
+                    peers[_address_key(neighbour['address'])] = peer_id
+
+            existing_nodes = set(core_models.Node.objects.filter(pk__in=peers.values()).values_list('pk', flat=True))
+            peers = {address: peer_id for address, peer_id in peers.iteritems() if peer_id in existing_nodes}
+        else:
+            peers = {}
+            for address, peer_id in olsr_models.LinkLocalAddress.objects.filter(
+                address__in=[str(neighbour['address']) for neighbour in neighbours]
+            ).values_list('address', 'router__root_id'):
+                peers.setdefault(_address_key(address), peer_id)
+
+        desired = collections.OrderedDict()
+        for neighbour in neighbours:
+            try:
+                peer_id = peers[_address_key(neighbour['address'])]
+            except KeyError:
+                if not push:
+                    self.logger.warning("Inconsistency in topology table for router ID %s!" % neighbour['address'])
+                # Skip unknown neighbour.
+                continue
+
+            etx = neighbour['cost']
+            if push:
+                # In push mode, link cost is reported as an integer.
+                etx = float(etx) / 1024
+
+            desired[peer_id] = {'lq': neighbour['lq'], 'ilq': neighbour['ilq'], 'etx': etx}
+
+        # Update existing links.
+        visible = []
+        for link in olsr_models.OlsrTopologyLink.objects.filter(monitor=rtm):
+            try:
+                attributes = desired.pop(link.peer_id)
+            except KeyError:
+                # Duplicate links are removed as they are not part of the visible set.
+                continue
+
+            for name, value in attributes.iteritems():
+                setattr(link, name, value)
+            link.last_seen = now
+            visible.append(link)
+
+        if visible:
+            def case(name):
+                return models.Case(
+                    *[models.When(pk=link.pk, then=models.Value(getattr(link, name))) for link in visible],
+                    output_field=models.FloatField()
+                )
+
+            olsr_models.OlsrTopologyLink.objects.filter(pk__in=[link.pk for link in visible]).update(
+                lq=case('lq'),
+                ilq=case('ilq'),
+                etx=case('etx'),
+                last_seen=now,
+            )
+
+        # Create new links. Topology links use multi-table inheritance, so they cannot be
+        # created in bulk.
+        if desired:
+            peer_nodes = core_models.Node.objects.in_bulk(desired.keys())
+            for peer_id, attributes in desired.iteritems():
+                link = olsr_models.OlsrTopologyLink.objects.create(
+                    monitor=rtm,
+                    peer_id=peer_id,
+                    last_seen=now,
+                    **attributes
+                )
+                visible.append(link)
+
+                # TODO: This will still create one event for each end of the link.
+                monitor_events.TopologyLinkEstablished(node, peer_nodes[peer_id], olsr_models.OLSR_PROTOCOL_NAME).post()
+
+        return visible
+
+    def reconcile_announces(self, node, announces, now):
+        """
+        Brings stored announces of a node in line with the currently visible ones.
+
+        :param node: Node that is being processed
+        :param announces: A list of visible announces
+        :param now: Current timestamp
+        :return: A list of primary keys of visible announces
+        """
+
+        desired = collections.OrderedDict()
+        for announce in announces:
+            desired[_network_key(announce['dst_prefix'])] = announce['dst_prefix']
+
+        visible = []
+        for announce in node.monitoring.network.routing.announces(
+            onlyclass=olsr_models.OlsrRoutingAnnounceMonitor, queryset=True
+        ):
+            if desired.pop(_network_key(announce.network), None) is not None:
+                visible.append(announce.pk)
+
+        if visible:
+            olsr_models.OlsrRoutingAnnounceMonitor.objects.filter(pk__in=visible).update(
+                status='ok',
+                last_seen=now,
+            )
+            registration.point('node.monitoring').changed()
+
+        # Announces are registry items with multi-table inheritance, so they cannot be
+        # created in bulk.
+        for network in desired.itervalues():
+            visible.append(olsr_models.OlsrRoutingAnnounceMonitor.objects.create(
+                root=node,
+                network=network,
+                status='ok',
+                last_seen=now,
+            ).pk)
+
+        return visible
+
+
+def _address_key(address):
+    """
+    Returns a normalized representation of a host address.
+    """
+
+    if isinstance(address, ipaddr._BaseNet):
+        address = address.ip
+
+    return str(address)
+
+
+def _network_key(network):
+    """
+    Returns a normalized representation of a network.
+    """
+
+    if not isinstance(network, ipaddr._BaseNet):
+        network = ipaddr.IPNetwork(str(network))
+
+    return str(network)
@@ -0,0 +1,127 @@
+import cPickle
+import errno
+import fcntl
+import os
+import tempfile
+import time
+
+from django.conf import settings
+
+
+class RoutingSnapshotCache(object):
+    """
+    Cache of routing daemon snapshots shared between monitoring runs. Each
+    snapshot is stored in a file and is fetched from the daemon at most once per
+    freshness window, no matter how many runs request it.
+    """
+
+    def __init__(self, name, max_age=None, directory=None):
+        """
+        Class constructor.
+
+        :param name: Unique snapshot name (should identify the daemon)
+        :param max_age: Maximum snapshot age in seconds, by default the value of
+          the ROUTING_SNAPSHOT_MAX_AGE setting is used
+        :param directory: Directory where snapshots are stored, by default the
+          value of the ROUTING_SNAPSHOT_DIRECTORY setting is used
+        """
+
+        if max_age is None:
+            max_age = getattr(settings, 'ROUTING_SNAPSHOT_MAX_AGE', 30)
+        if directory is None:
+            directory = getattr(settings, 'ROUTING_SNAPSHOT_DIRECTORY', None)
+        if directory is None:
+            directory = os.path.join(tempfile.gettempdir(), 'nodewatcher-routing-%d' % os.getuid())
+
+        self.name = name.replace(os.sep, '_')
+        self.max_age = max_age
+        self.directory = directory
+
+    def _prepare_directory(self):
+        """
+        Ensures that the snapshot directory exists and is only accessible to the
+        current user.
+
+        :return: True if the directory may be used
+        """
+
+        try:
+            os.makedirs(self.directory, 0700)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                return False
+
+        try:
+            info = os.stat(self.directory)
+        except OSError:
+            return False
+
+        # Snapshots are unpickled, so they must not be writable by anyone else.
+        return info.st_uid == os.getuid() and not info.st_mode & 0022
+
+    def _load(self, path):
+        """
+        Loads a snapshot if it exists and is fresh enough.
+
+        :param path: Snapshot path
+        :return: Snapshot or None
+        """
+
+        try:
+            with open(path, 'rb') as snapshot_file:
+                if time.time() - os.fstat(snapshot_file.fileno()).st_mtime > self.max_age:
+                    return None
+
+                return cPickle.load(snapshot_file)
+        except (IOError, OSError, EOFError, cPickle.UnpicklingError, AttributeError, ImportError, ValueError):
+            return None
+
+    def _store(self, path, snapshot):
+        """
+        Atomically stores a snapshot.
+
+        :param path: Snapshot path
+        :param snapshot: Snapshot
+        """
+
+        fd, temporary_path = tempfile.mkstemp(dir=self.directory, prefix='.%s.' % self.name)
+        try:
+            with os.fdopen(fd, 'wb') as snapshot_file:
+                cPickle.dump(snapshot, snapshot_file, cPickle.HIGHEST_PROTOCOL)
+            os.rename(temporary_path, path)
+        except (IOError, OSError, cPickle.PicklingError, TypeError):
+            try:
+                os.unlink(temporary_path)
+            except OSError:
+                pass
+
+    def get(self, fetch):
+        """
+        Returns a fresh snapshot, fetching it when needed. Exceptions raised by
+        the fetch function are propagated and nothing is cached in this case.
+
+        :param fetch: A callable that fetches the snapshot from the daemon
+        :return: Snapshot
+        """
+
+        if self.max_age <= 0 or not self._prepare_directory():
+            return fetch()
+
+        path = os.path.join(self.directory, self.name)
+        snapshot = self._load(path)
+        if snapshot is not None:
+            return snapshot
+
+        # Serialize fetches so that concurrent runs do not all query the daemon.
+        with open('%s.lock' % path, 'w') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                # Another run may have fetched the snapshot while we were waiting.
+                snapshot = self._load(path)
+                if snapshot is None:
+                    snapshot = fetch()
+                    self._store(path, snapshot)
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+        return snapshot
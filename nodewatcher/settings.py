@@ -488,8 +488,8 @@ MONITOR_RUNS = {
             'nodewatcher.modules.routing.olsr.processors.GlobalTopology',
             'nodewatcher.modules.routing.babel.processors.IncludeRoutableNodes',
             'nodewatcher.modules.monitor.measurements.rtt.processors.RttMeasurement',
+            'nodewatcher.modules.monitor.measurements.rtt.processors.StoreNetwork',
             'nodewatcher.modules.monitor.datastream.processors.TrackRegistryModels',
-            'nodewatcher.modules.monitor.measurements.rtt.processors.StoreNode',
             'nodewatcher.modules.administration.status.processors.NodeStatus',
             'nodewatcher.modules.monitor.datastream.processors.NodeDatastream',
         ),
@@ -571,12 +571,68 @@ DATASTREAM_BACKEND_SETTINGS = {
     },
 }
 
+# Store network topology history as periodic keyframes followed by per-run deltas
+# instead of storing the whole topology graph on every topology run.
+TOPOLOGY_DELTA_ENCODING = False
+# Number of topology datapoints after which a new keyframe is stored.
+TOPOLOGY_DELTA_KEYFRAME_INTERVAL = 60
+# Cache holding the last stored topology graph, so that it does not need to be reconstructed
+# from keyframes and deltas on every topology run. Each monitoring cycle runs in its own
+# process, so the graph is only kept between cycles when this cache is shared between processes.
+DATASTREAM_GRAPH_CACHE = 'default'
+
+# Number of days after which events stored in the database are permanently removed by the
+# periodic cleanup task. By default events are kept forever; set for example to 365 to opt in.
+EVENTS_DATABASE_RETENTION = None
+# Number of days after which warnings that have not been seen anymore are permanently removed
+# by the periodic cleanup task. By default such warnings are kept forever; set for example to
+# 30 to opt in.
+EVENTS_DATABASE_WARNING_RETENTION = None
+# Maximum number of events or warnings removed by a single query during cleanup.
+EVENTS_DATABASE_CLEANUP_CHUNK_SIZE = 1000
+
+# Maximum age (in seconds) of routing daemon snapshots shared between monitoring runs. Set
+# to zero to fetch routing information from the daemons in every run.
+ROUTING_SNAPSHOT_MAX_AGE = 30
+# Directory where shared routing daemon snapshots are stored. When not set, a private
+# directory under the system temporary directory is used.
+ROUTING_SNAPSHOT_DIRECTORY = None
+
+# Maximum number of proxy models generated for registry field projections that are cached
+# in each process. Set to zero to disable the cache.
+REGISTRY_PROXY_MODEL_CACHE_SIZE = 256
+# Maximum number of parsed registry lookup and filter expressions that are cached in each
+# process.
+REGISTRY_EXPRESSION_CACHE_SIZE = 1024
+
+# Directory where clustered map tiles are cached. When not set, tiles are stored under
+# MEDIA_ROOT.
+MAP_TILE_CACHE_DIR = None
+# Maximum zoom level for which map tiles are served.
+MAP_TILE_MAX_ZOOM = 18
+# Maximum zoom level at which nodes are clustered in map tiles.
+MAP_TILE_CLUSTER_MAX_ZOOM = 16
+# Number of cluster cells along each side of a map tile.
+MAP_TILE_CLUSTER_GRID = 4
+
 OLSRD_MONITOR_HOST = '127.0.0.1'
 OLSRD_MONITOR_PORT = 2006
 
 # UUID of the node that is performing measurements (usually the node where the nodewatcher
 # monitor is running on).
 MEASUREMENT_SOURCE_NODE = ''
+# Engine used for RTT measurements. Either 'fping', which spawns fping processes, or 'builtin',
+# which uses the in-process prober.
+MEASUREMENT_RTT_PROBER = 'fping'
+# Transport used by the built-in RTT prober. Either 'icmp', which sends ICMP ECHO requests and
+# requires the CAP_NET_RAW capability, or 'udp', which requires an UDP echo service on nodes.
+MEASUREMENT_RTT_PROBE_TRANSPORT = 'icmp'
+# Destination port of the UDP echo service used by the 'udp' RTT probe transport.
+MEASUREMENT_RTT_PROBE_UDP_PORT = 7
+# Maximum number of probes per second sent by the built-in RTT prober.
+MEASUREMENT_RTT_PROBE_RATE = 1000
+# Time (in seconds) after which a probe sent by the built-in RTT prober is considered lost.
+MEASUREMENT_RTT_PROBE_TIMEOUT = 1.0
 
 # Storage for generated firmware images.
 GENERATOR_STORAGE = 'django.core.files.storage.FileSystemStorage'
@@ -716,6 +772,17 @@ REST_FRAMEWORK = {
     )
 }
 
+# Number of objects fetched and serialized at once when streaming API list responses
+# (requested using the stream query parameter).
+API_STREAM_CHUNK_SIZE = 500
+# Cache used for API responses. Responses are invalidated from all processes (including
+# monitoring workers), so responses are only cached when this cache is shared between
+# processes (for example memcached or a file-based cache on a shared volume). With the
+# default process-local cache, API responses are not cached.
+API_RESPONSE_CACHE = 'default'
+# Maximum time (in seconds) for which API responses are cached.
+API_RESPONSE_CACHE_TIMEOUT = 300
+
 CORS_ORIGIN_ALLOW_ALL = True
 # Currently only v2 API needs this. Tastypie API provides headers by itself.
 CORS_URLS_REGEX = r'^/api/v2/'
@@ -1,4 +1,5 @@
 import collections
+import threading
 
 
 # Based on http://code.activestate.com/recipes/576694/ (r9)
@@ -60,6 +61,80 @@ class OrderedSet(collections.MutableSet):
         return set(self) == set(other)
 
 
+class LRUCache(object):
+    """
+    A thread-safe bounded cache, which evicts the least recently used items.
+    """
+
+    def __init__(self, size):
+        """
+        Class constructor.
+
+        :param size: Maximum number of cached items or a callable returning it,
+          which is evaluated on each use, so that the size may follow settings
+        """
+
+        self._size = size
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def size(self):
+        """
+        Maximum number of cached items.
+        """
+
+        if callable(self._size):
+            return self._size()
+        return self._size
+
+    def get(self, key, default=None):
+        """
+        Returns a cached item.
+
+        :param key: Item key
+        :param default: Value returned when the item is not cached
+        """
+
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+
+            self._items[key] = value
+            return value
+
+    def put(self, key, value):
+        """
+        Stores an item into the cache.
+
+        :param key: Item key
+        :param value: Item value
+        """
+
+        size = self.size
+        if size <= 0:
+            return
+
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all cached items.
+        """
+
+        with self._lock:
+            self._items.clear()
+
+
 def merge_dict(a, b):
     """
     Merges two dictionaries recursively.
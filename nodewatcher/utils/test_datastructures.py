@@ -10,3 +10,33 @@ class DatastructuresTest(unittest.TestCase):
 
         result = datastructures.merge_dict({'a': {'b': 1, 'c': 2, 'd': {'e': 1}}}, {'a': {'foo': 1, 'd': {'f': 10}}})
         self.assertEqual(result, {'a': {'b': 1, 'c': 2, 'd': {'e': 1, 'f': 10}, 'foo': 1}})
+
+    def test_lru_cache(self):
+        cache = datastructures.LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+
+        # Least recently used item should be evicted.
+        cache.put('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+        cache.clear()
+        self.assertEqual(cache.get('a', 42), 42)
+
+        cache = datastructures.LRUCache(0)
+        cache.put('a', 1)
+        self.assertEqual(len(cache), 0)
+
+        # Size may be given as a callable, which is evaluated on each use.
+        size = [2]
+        cache = datastructures.LRUCache(lambda: size[0])
+        cache.put('a', 1)
+        cache.put('b', 2)
+        size[0] = 1
+        cache.put('c', 3)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('c'), 3)